@@ -0,0 +1,248 @@
+"""
+Batch re-render of archived scripts (scripts/YYMMDD_topic_script.json).
+
+Renders every matching script across a process pool, without the LLM:
+scripts are only repaired locally (script_schema.repair_script) before
+rendering. Outputs go to renders/<script name>.mp4.
+
+An output is skipped when renders/index.json already holds it under the
+same render hash: sha256 of the script file plus the renderer (the
+modules the render imports, the assets it draws with and the output
+settings of RenderConfig), so changing the layout re-renders the whole
+archive while an unchanged re-run is a no-op (--force renders anyway).
+
+Concurrent network requests (image APIs, TTS) across all workers are
+capped by one shared semaphore (--net-limit). A summary with throughput
+(videos/hour) and failures is printed and written to
+renders/backfill_summary.json.
+
+Usage:
+    python backfill_render.py                                  # all scripts
+    python backfill_render.py --glob "scripts/2602*_semicon_script.json"
+    python backfill_render.py --since 260201 --until 260228 --workers 2 --net-limit 4
+"""
+import argparse
+import glob
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from local_env import load_local_env
+
+RENDER_DIR = "renders"
+INDEX_FILE = "index.json"
+SUMMARY_FILE = "backfill_summary.json"
+WORK_DIR = os.path.join("temp_assets", "backfill")
+DEFAULT_WORKERS = max(1, (os.cpu_count() or 1) // 4) # Each encode already uses 4 threads
+DEFAULT_NET_LIMIT = 4
+# Everything the render reads besides the script: modules it imports, assets, output settings
+RENDERER_SOURCES = ["make_video.py", "encode_planner.py", "script_schema.py", "pipeline_dag.py",
+                    "tracing.py", "profiling.py", "memtrace.py"]
+RENDERER_ASSETS = [os.path.join("assets", "Roboto", "static", "Roboto-Bold.ttf"),
+                   os.path.join("assets", "Whoosh_4.mp3"),
+                   os.path.join("assets", "Daily Tech Chips.png"),
+                   os.path.join("assets", "Subscribe.png"),
+                   os.path.join("assets", "Daily Shorts News BGM.mp3")]
+RENDER_SETTINGS = ["font_size", "body_voice", "body_rate", "hook_rate", "renditions"]
+
+_SCRIPT_NAME_RE = re.compile(r"^(\d{6})_(.+)_script\.json$")
+
+
+def parse_script_name(path):
+    """(YYMMDD, topic) from scripts/YYMMDD_topic_script.json, or None."""
+    match = _SCRIPT_NAME_RE.match(os.path.basename(path))
+    return (match.group(1), match.group(2)) if match else None
+
+
+def find_scripts(pattern="scripts/*_script.json", since=None, until=None):
+    paths = []
+    for path in sorted(glob.glob(pattern)):
+        parsed = parse_script_name(path)
+        if parsed is None:
+            continue
+        date = parsed[0]
+        if (since and date < since) or (until and date > until):
+            continue
+        paths.append(path)
+    return paths
+
+
+def render_settings():
+    """Output-affecting RenderConfig fields, and whether the encoder settings are planned (encode_planner)."""
+    import dataclasses
+    import encode_planner
+    from make_video import RenderConfig
+
+    config = RenderConfig.from_env()
+    settings = {name: getattr(config, name) for name in RENDER_SETTINGS}
+    settings["renditions"] = [dataclasses.asdict(r) for r in config.renditions]
+    settings["planned_encode"] = config.plan_encode and encode_planner.active()
+    return settings
+
+
+def renderer_hash():
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.sha256()
+    for path in RENDERER_SOURCES + RENDERER_ASSETS:
+        digest.update(path.encode("utf-8"))
+        try:
+            with open(os.path.join(base_dir, path), "rb") as f:
+                digest.update(f.read())
+        except FileNotFoundError:
+            digest.update(b"<missing>") # Renderer falls back (default font, no BGM...)
+    digest.update(json.dumps(render_settings(), sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def render_hash(script_path, renderer):
+    with open(script_path, "rb") as f:
+        return hashlib.sha256(f.read() + renderer.encode("ascii")).hexdigest()
+
+
+def load_index(render_dir=RENDER_DIR):
+    try:
+        with open(os.path.join(render_dir, INDEX_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_index(index, render_dir=RENDER_DIR):
+    path = os.path.join(render_dir, INDEX_FILE)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, indent=1)
+    os.replace(path + ".tmp", path)
+
+
+# ---------- worker process ----------
+def _init_worker(net_slot):
+    if sys.platform.startswith('win'):
+        sys.stdout.reconfigure(encoding='utf-8')
+    import make_video
+    make_video.limit_network(net_slot)
+
+
+def render_one(script_path, output_file, topic=None, work_name=None):
+    """
+    Renders one archived script (topic defaults to the one in its file name)
+    in WORK_DIR/<work_name> (default: the script name).
+    Returns (output_file, seconds); raises on failure.
+    """
+    import asyncio
+    from make_video import VideoGenerator
+    from script_schema import repair_script
+
+    started = time.time()
+    with open(script_path, "r", encoding="utf-8") as f:
+        script_data = json.load(f)
+    repair_script(script_data) # 로컬 보정만 (LLM 재요청 없음)
+    if not script_data.get("segments"):
+        raise ValueError("script has no usable segments")
+
+    if topic is None:
+        topic = (parse_script_name(script_path) or (None, "technology"))[1]
+    name = os.path.splitext(os.path.basename(script_path))[0]
+    work_dir = os.path.join(WORK_DIR, work_name or name)
+    generator = VideoGenerator(work_dir, output_file)
+    try:
+        video_path = asyncio.run(generator.create_shorts(script_data, topic))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    if not video_path or not os.path.exists(video_path):
+        raise RuntimeError("renderer produced no video")
+    return video_path, time.time() - started
+
+
+# ---------- driver ----------
+def backfill(scripts, render_dir=RENDER_DIR, workers=DEFAULT_WORKERS, net_limit=DEFAULT_NET_LIMIT, force=False):
+    os.makedirs(render_dir, exist_ok=True)
+    index = load_index(render_dir)
+    renderer = renderer_hash()
+
+    jobs, skipped = [], []
+    for path in scripts:
+        name = os.path.splitext(os.path.basename(path))[0]
+        output_file = os.path.join(render_dir, f"{name}.mp4")
+        digest = render_hash(path, renderer)
+        entry = index.get(name)
+        if not force and entry and entry.get("hash") == digest and os.path.exists(output_file):
+            skipped.append(name)
+            continue
+        jobs.append((name, path, output_file, digest))
+    print(f"🎞️ Backfill: {len(scripts)} scripts, {len(skipped)} up to date, {len(jobs)} to render "
+          f"({workers} workers, {net_limit} concurrent requests)")
+
+    started = time.time()
+    rendered, failures, render_seconds = [], {}, 0.0
+    if jobs:
+        net_slot = multiprocessing.BoundedSemaphore(net_limit)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(net_slot,)) as pool:
+            futures = {pool.submit(render_one, path, output_file): (name, digest) for name, path, output_file, digest in jobs}
+            for future in as_completed(futures):
+                name, digest = futures[future]
+                try:
+                    output_file, seconds = future.result()
+                except Exception as e:
+                    failures[name] = f"{type(e).__name__}: {e}"
+                    print(f"❌ {name}: {failures[name]}")
+                    continue
+                rendered.append(name)
+                render_seconds += seconds
+                index[name] = {"hash": digest, "output": output_file, "seconds": round(seconds, 1), "rendered_at": time.time()}
+                save_index(index, render_dir) # 중단되어도 완료분은 다음 실행에서 건너뜀
+                print(f"✅ {name} ({seconds:.0f}s) [{len(rendered) + len(failures)}/{len(jobs)}]")
+
+    elapsed = time.time() - started
+    summary = {
+        "scripts": len(scripts),
+        "rendered": len(rendered),
+        "skipped": len(skipped),
+        "failed": len(failures),
+        "workers": workers,
+        "net_limit": net_limit,
+        "wall_seconds": round(elapsed, 1),
+        "avg_render_seconds": round(render_seconds / len(rendered), 1) if rendered else None,
+        "videos_per_hour": round(len(rendered) * 3600 / elapsed, 2) if rendered and elapsed else 0.0,
+        "failures": failures,
+        "finished_at": time.time(),
+    }
+    with open(os.path.join(render_dir, SUMMARY_FILE), "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=1)
+    print(f"\n📊 Backfill: {summary['rendered']} rendered, {summary['skipped']} skipped, {summary['failed']} failed "
+          f"in {elapsed:.0f}s ({summary['videos_per_hour']} videos/hour)")
+    for name, error in failures.items():
+        print(f"   ❌ {name}: {error}")
+    return summary
+
+
+def main():
+    if sys.platform.startswith('win'):
+        sys.stdout.reconfigure(encoding='utf-8')
+    parser = argparse.ArgumentParser(description="Re-render archived scripts into videos.")
+    parser.add_argument("--glob", default="scripts/*_script.json", help="script files to consider")
+    parser.add_argument("--since", help="first script date (YYMMDD), inclusive")
+    parser.add_argument("--until", help="last script date (YYMMDD), inclusive")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="render processes")
+    parser.add_argument("--net-limit", type=int, default=DEFAULT_NET_LIMIT, help="max concurrent network requests (all workers)")
+    parser.add_argument("--out", default=RENDER_DIR, help="output directory")
+    parser.add_argument("--force", action="store_true", help="re-render even if the render hash is unchanged")
+    args = parser.parse_args()
+    load_local_env() # Provider keys for make_video (imported lazily by the workers)
+
+    scripts = find_scripts(args.glob, args.since, args.until)
+    if not scripts:
+        print("⚠️ No scripts matched.")
+        return
+    summary = backfill(scripts, args.out, max(1, args.workers), max(1, args.net_limit), args.force)
+    if summary["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
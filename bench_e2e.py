@@ -0,0 +1,253 @@
+"""
+End-to-end offline benchmark of the daily flow.
+
+Runs `daily_shorts.py` (ingest → script → TTS / images → render → upload) in
+a subprocess against standin_server.py, which serves the RSS feeds, Gemini,
+edge-tts, the image providers and the YouTube API. The run happens in a
+scratch directory (assets symlinked, scripts/ copied) with its own
+SHORTS_CACHE_DIR, so the repo and the real caches are never touched.
+
+Reports wall time per stage (from the run's trace, see tracing.py), peak
+RSS (largest process, including ffmpeg), CPU time / utilization and the
+output file size, and appends the record to bench_history.jsonl.
+
+Usage:
+    python bench_e2e.py                        # benchmark the working tree
+    python bench_e2e.py --mode both --latency 0.2
+    python bench_e2e.py history                # one line per recorded run
+    python bench_e2e.py compare HEAD~3 HEAD    # latest recorded runs of two commits
+    python bench_e2e.py compare HEAD~3 HEAD --run   # benchmark both commits first (git worktree)
+"""
+import argparse
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+HISTORY_FILE = os.path.join(BASE_DIR, "bench_history.jsonl")
+DEFAULT_LATENCY = 0.2
+STAGE_CATEGORIES = ("daily", "render") # pipeline_dag spans (category = pipeline name)
+COMPARE_METRICS = ["wall_s", "cpu_s", "cpu_util", "peak_rss_mb", "output_mb"]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def git(*args, cwd=BASE_DIR):
+    return subprocess.run(["git", *args], capture_output=True, text=True, cwd=cwd).stdout.strip()
+
+
+def start_standin(code_dir, port, latency, scripts_glob, log):
+    proc = subprocess.Popen(
+        [sys.executable, os.path.join(code_dir, "standin_server.py"), "--port", str(port), "--latency", str(latency),
+         "--scripts", scripts_glob or os.path.join(code_dir, "scripts", "*_script.json")],
+        stdout=log, stderr=subprocess.STDOUT)
+    deadline = time.time() + 20
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/stats", timeout=1).read()
+            return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError("stand-in server did not start")
+
+
+def standin_env(code_dir, base_url):
+    sys.path.insert(0, code_dir)
+    try:
+        from standin_server import env_overrides
+    finally:
+        sys.path.pop(0)
+    return env_overrides(base_url)
+
+
+def stage_times(trace_path):
+    """{stage: wall seconds} for the pipeline stages recorded in the trace (summed over repeats)."""
+    try:
+        with open(trace_path, "r", encoding="utf-8") as f:
+            events = json.load(f)["traceEvents"]
+    except (OSError, ValueError, KeyError):
+        return {}
+    stages = {}
+    for e in events:
+        if e.get("ph") == "X" and e.get("cat") in STAGE_CATEGORIES:
+            name = f"{e['cat']}:{e['name']}"
+            stages[name] = round(stages.get(name, 0.0) + e["dur"] / 1e6, 3)
+    return stages
+
+
+def run_benchmark(code_dir=BASE_DIR, mode="Semicon", latency=DEFAULT_LATENCY, scripts_glob=None, keep=False):
+    """Runs the daily flow once from `code_dir` against a fresh stand-in. Returns the record."""
+    work_dir = tempfile.mkdtemp(prefix="bench_e2e_")
+    os.symlink(os.path.join(code_dir, "assets"), os.path.join(work_dir, "assets"))
+    shutil.copytree(os.path.join(code_dir, "scripts"), os.path.join(work_dir, "scripts"))
+    log_path = os.path.join(work_dir, "run.log")
+    trace_path = os.path.join(work_dir, "trace.json")
+
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    with open(log_path, "w", encoding="utf-8") as log:
+        standin = start_standin(code_dir, port, latency, scripts_glob, log)
+        try:
+            env = dict(os.environ, **standin_env(code_dir, base_url))
+            env.update({"SHORTS_CACHE_DIR": os.path.join(work_dir, ".cache"), "GEMINI_CACHE_MODE": "off",
+                        "SHORTS_TRACE": trace_path, "PYTHONUNBUFFERED": "1",
+                        "SHORTS_ENCODE_PLAN": "0"}) # Fixed encoder settings: runs stay comparable to the baseline
+            for name in ("SHORTS_TIME_BUDGET", "SHORTS_ENCODE_DEADLINE"):
+                env.pop(name, None)
+            started = time.perf_counter()
+            child = subprocess.Popen([sys.executable, os.path.join(code_dir, "daily_shorts.py"), "--mode", mode],
+                                     cwd=work_dir, env=env, stdout=log, stderr=subprocess.STDOUT)
+            # wait4: CPU and max RSS of the run including the children it reaped (ffmpeg)
+            _pid, status, usage = os.wait4(child.pid, 0)
+            child.returncode = os.waitstatus_to_exitcode(status)
+            wall = time.perf_counter() - started
+        finally:
+            standin.terminate()
+            standin.wait()
+
+    outputs = [os.path.join(work_dir, name) for name in os.listdir(work_dir)
+               if name.startswith("final_generated_shorts") and name.endswith(".mp4")]
+    with open(log_path, "r", encoding="utf-8", errors="replace") as f:
+        log_text = f.read()
+    cpu = usage.ru_utime + usage.ru_stime
+    record = {
+        "timestamp": time.time(),
+        "commit": git("rev-parse", "--short", "HEAD", cwd=code_dir),
+        "dirty": bool(git("status", "--porcelain", "--untracked-files=no", cwd=code_dir)),
+        "mode": mode,
+        "latency": latency,
+        "scripts": scripts_glob,
+        "cpu_count": os.cpu_count(),
+        "exit_code": child.returncode,
+        "ok": child.returncode == 0 and bool(outputs) and "Uploaded! Video ID" in log_text,
+        "wall_s": round(wall, 2),
+        "cpu_s": round(cpu, 2),
+        "cpu_util": round(cpu / wall, 3) if wall else 0.0, # Average busy cores
+        "peak_rss_mb": round(usage.ru_maxrss / 1024, 1), # Linux reports KiB
+        "output_mb": round(sum(os.path.getsize(p) for p in outputs) / 1e6, 3),
+        "videos": len(outputs),
+        "stages": stage_times(trace_path),
+    }
+    if not record["ok"]:
+        print("".join(log_text.splitlines(keepends=True)[-30:]))
+    if keep:
+        record["work_dir"] = work_dir
+    else:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return record
+
+
+# ---------- history ----------
+def append_history(record, path=HISTORY_FILE):
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record) + "\n")
+
+
+def load_history(path=HISTORY_FILE):
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def latest_for(history, rev):
+    commit = git("rev-parse", "--short", rev) or rev
+    matches = [r for r in history if r["commit"] and (r["commit"].startswith(commit) or commit.startswith(r["commit"]))]
+    return matches[-1] if matches else None
+
+
+def print_record(record):
+    status = "✅" if record["ok"] else "❌"
+    print(f"\n{status} {record['commit']}{'+' if record['dirty'] else ''} [{record['mode']}] "
+          f"wall {record['wall_s']:.1f}s | cpu {record['cpu_s']:.1f}s ({record['cpu_util']:.2f} cores of {record['cpu_count']}) | "
+          f"peak RSS {record['peak_rss_mb']:.0f} MB | output {record['output_mb']:.2f} MB ({record['videos']} video)")
+    stages = sorted(record["stages"].items(), key=lambda kv: -kv[1])
+    for name, seconds in stages[:15]:
+        print(f"   {name:<36} {seconds:8.2f}s")
+
+
+def compare(a, b):
+    print(f"\n📊 {'metric':<36} {a['commit']:>10} {b['commit']:>10} {'change':>8}")
+    rows = [(m, a.get(m), b.get(m)) for m in COMPARE_METRICS]
+    for name in sorted(set(a["stages"]) | set(b["stages"]), key=lambda n: -max(a["stages"].get(n, 0), b["stages"].get(n, 0)))[:12]:
+        rows.append((name, a["stages"].get(name), b["stages"].get(name)))
+    for name, va, vb in rows:
+        change = f"{vb / va - 1:+.1%}" if va and vb is not None else "-"
+        fmt = lambda v: f"{v:10.2f}" if isinstance(v, (int, float)) else f"{'-':>10}"
+        print(f"   {name:<36} {fmt(va)} {fmt(vb)} {change:>8}")
+
+
+def run_at_commit(rev, mode, latency, scripts_glob=None):
+    """Benchmarks `rev` from a temporary git worktree and records it in the history."""
+    tree = tempfile.mkdtemp(prefix="bench_tree_")
+    shutil.rmtree(tree)
+    subprocess.run(["git", "worktree", "add", "--detach", tree, rev], cwd=BASE_DIR, check=True, capture_output=True)
+    try:
+        print(f"⏱️ Benchmarking {rev} ({git('rev-parse', '--short', rev)})...")
+        record = run_benchmark(tree, mode, latency, scripts_glob)
+    finally:
+        subprocess.run(["git", "worktree", "remove", "--force", tree], cwd=BASE_DIR, capture_output=True)
+    append_history(record)
+    print_record(record)
+    return record
+
+
+def main():
+    if sys.platform.startswith('win'):
+        sys.stdout.reconfigure(encoding='utf-8')
+    parser = argparse.ArgumentParser(description="End-to-end offline benchmark of the daily flow.")
+    parser.add_argument("command", nargs="?", default="run", choices=["run", "history", "compare"])
+    parser.add_argument("revs", nargs="*", help="compare: two commits (e.g. HEAD~1 HEAD)")
+    parser.add_argument("--mode", default="Semicon", help="daily_shorts.py --mode (Semicon / General_IT / both)")
+    parser.add_argument("--latency", type=float, default=DEFAULT_LATENCY, help="stand-in latency per request (s)")
+    parser.add_argument("--scripts", help="glob of scripts the stand-in replays as Gemini output (default: the repo corpus)")
+    parser.add_argument("--run", action="store_true", help="compare: benchmark both commits first")
+    parser.add_argument("--keep", action="store_true", help="keep the scratch directory (log, trace, video)")
+    parser.add_argument("--no-history", action="store_true", help="do not append to bench_history.jsonl")
+    args = parser.parse_args()
+
+    if args.command == "history":
+        for r in load_history():
+            print(f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(r['timestamp']))} {r['commit']}{'+' if r['dirty'] else ''} "
+                  f"{r['mode']:<10} {'ok ' if r['ok'] else 'ERR'} wall {r['wall_s']:7.1f}s cpu {r['cpu_s']:7.1f}s "
+                  f"rss {r['peak_rss_mb']:6.0f}MB out {r['output_mb']:.2f}MB")
+        return
+
+    if args.command == "compare":
+        if len(args.revs) != 2:
+            parser.error("compare needs two commits")
+        if args.run:
+            a, b = (run_at_commit(rev, args.mode, args.latency, args.scripts) for rev in args.revs)
+        else:
+            history = load_history()
+            a, b = latest_for(history, args.revs[0]), latest_for(history, args.revs[1])
+            missing = [rev for rev, r in zip(args.revs, (a, b)) if r is None]
+            if missing:
+                print(f"⚠️ No recorded run for {', '.join(missing)} (use --run to benchmark it)")
+                sys.exit(1)
+        compare(a, b)
+        return
+
+    record = run_benchmark(BASE_DIR, args.mode, args.latency, args.scripts, args.keep)
+    if not args.no_history:
+        append_history(record)
+    print_record(record)
+    if args.keep:
+        print(f"📂 Scratch directory kept: {record['work_dir']}")
+    if not record["ok"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
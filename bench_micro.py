@@ -0,0 +1,213 @@
+"""
+Offline micro-benchmarks for the rendering hot paths.
+
+Runs against the fixtures in test_pipeline_assets/ and ken_burns_test_assets/
+only: image fetches resolve to fixture images and narration comes from the
+fixture mp3s, so no API key or network is needed.
+
+Clip builders in make_video return lazy moviepy clips, so each case builds
+the clip AND renders FRAMES_PER_CASE evenly spaced frames (where the real
+cost is). Each case runs once to warm up, then `--repeat` times; the median
+is compared against the baseline.
+
+Usage:
+    python bench_micro.py                          # run all, write bench_results.json, compare with baseline
+    python bench_micro.py --only ken_burns         # name filter (substring)
+    python bench_micro.py --skip-e2e               # leave out the 10s encode
+    python bench_micro.py --save-baseline          # store this run as bench_baseline.json
+    python bench_micro.py --threshold 0.2          # fail if a median is >20% slower than baseline
+
+Exit code 1 if any case regressed beyond the threshold.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PIPELINE_ASSETS = "test_pipeline_assets"
+KEN_BURNS_ASSETS = "ken_burns_test_assets"
+RESULTS_FILE = "bench_results.json"
+BASELINE_FILE = "bench_baseline.json"
+DEFAULT_REPEAT = 3
+DEFAULT_THRESHOLD = 0.15
+MIN_DELTA_S = 0.05 # Ignore slowdowns smaller than this (timer noise on the tiny cases)
+FRAMES_PER_CASE = 6
+E2E_SECONDS = 10.0
+
+EFFECTS = ["static", "zoom_in", "zoom_out", "pan_right", "pan_left"]
+SEGMENTS = [
+    {"text": "The semiconductor industry is booming like never before.", "camera_effect": "zoom_in"},
+    {"text": "Artificial intelligence is driving massive demand.", "camera_effect": "pan_right"},
+    {"text": "Nvidia is seeing record profits this quarter.", "camera_effect": "zoom_out"},
+    {"text": "Memory makers are racing to add HBM capacity.", "camera_effect": "pan_left"},
+]
+HOOK = {"overlay_text": "Chip War", "mood_color": "red", "image_description": "dark server room"}
+
+
+def render_frames(clip, frames=FRAMES_PER_CASE):
+    """Forces the lazy clip to render `frames` evenly spaced frames."""
+    duration = clip.duration or 1.0
+    for i in range(frames):
+        clip.get_frame(duration * (i + 0.5) / frames)
+
+
+def make_offline_generator(work_dir):
+    from make_video import RenderConfig, VideoGenerator
+
+    class OfflineGenerator(VideoGenerator):
+        """Image requests resolve to fixture images (cycled), so nothing hits the network."""
+        _fixture_images = sorted(
+            os.path.join(PIPELINE_ASSETS, name) for name in os.listdir(PIPELINE_ASSETS) if name.endswith(".jpg"))
+
+        def fetch_image_from_providers(self, query, segment_id, width=1024, height=1024):
+            source = self._fixture_images[zlib.crc32(segment_id.encode()) % len(self._fixture_images)]
+            target = os.path.join(self.output_dir, f"image_{segment_id}.jpg")
+            if not os.path.exists(target):
+                shutil.copyfile(source, target)
+            return target
+
+    # plan_encode=False: fixed encoder settings, so e2e_encode_10s stays comparable to its baseline
+    return OfflineGenerator(os.path.join(work_dir, "assets"), os.path.join(work_dir, "bench_e2e.mp4"),
+                            config=RenderConfig.from_env(plan_encode=False))
+
+
+def segment_data(i):
+    seg = SEGMENTS[i % len(SEGMENTS)]
+    return dict(seg, keyword="semiconductor", image_prompt=seg["text"],
+                audio_path=os.path.join(PIPELINE_ASSETS, f"audio_{i % len(SEGMENTS)}.mp3"))
+
+
+# ---------- cases ----------
+def build_cases(generator, skip_e2e=False):
+    from moviepy import concatenate_videoclips
+
+    cases = {}
+    cases["karaoke_clip"] = lambda: render_frames(generator.create_karaoke_clip(SEGMENTS[0]["text"], 3.0))
+    for effect in EFFECTS:
+        image = os.path.join(KEN_BURNS_ASSETS, "img_pan.jpg" if effect.startswith("pan") else "img_zoom.jpg")
+        cases[f"ken_burns.{effect}"] = lambda image=image, effect=effect: render_frames(generator.apply_ken_burns(image, effect, 4.0))
+    cases["process_segment"] = lambda: render_frames(generator.process_segment(segment_data(0), "bench_0"))
+    cases["hook_clip"] = lambda: render_frames(generator.create_hook_clip(HOOK, os.path.join(PIPELINE_ASSETS, "audio_1.mp3")))
+    cases["thumbnail"] = lambda: render_frames(generator.create_thumbnail("semiconductor", "Chip Boom", "wafer macro shot", "CHIP BOOM"))
+
+    def concat_sentences():
+        clips = [generator.process_segment(segment_data(i), f"bench_{i}") for i in range(len(SEGMENTS))]
+        render_frames(concatenate_videoclips(clips, method="compose"), frames=FRAMES_PER_CASE * 2)
+    cases["concat_sentences"] = concat_sentences
+
+    if not skip_e2e:
+        def encode_10s():
+            clips = [generator.process_segment(segment_data(i), f"bench_{i}") for i in range(len(SEGMENTS))]
+            video = generator.assemble_video(clips)
+            generator.encode_video(video.subclipped(0, min(E2E_SECONDS, video.duration)))
+        cases["e2e_encode_10s"] = encode_10s
+    return cases
+
+
+def run_case(fn, repeat):
+    fn() # Warm-up (fonts, header layer, file cache)
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return {"median_s": round(statistics.median(timings), 4), "min_s": round(min(timings), 4),
+            "runs": [round(t, 4) for t in timings]}
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=BASE_DIR).stdout.strip()
+    except OSError:
+        commit = None
+    return {"python": platform.python_version(), "platform": platform.platform(), "cpu_count": os.cpu_count(),
+            "commit": commit, "timestamp": time.time()}
+
+
+# ---------- baseline ----------
+def compare(results, baseline, threshold, min_delta=MIN_DELTA_S):
+    """
+    Prints a table against the baseline. Returns the names of regressed cases
+    (slower by more than `threshold` relative AND `min_delta` seconds).
+    """
+    regressions = []
+    print(f"\n📊 {'case':<22} {'median s':>9} {'baseline':>9} {'change':>8}")
+    for name, result in results.items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            print(f"   {name:<22} {result['median_s']:>9.3f} {'-':>9} {'new':>8}")
+            continue
+        change = result["median_s"] / base["median_s"] - 1 if base["median_s"] else 0.0
+        flag = ""
+        if change > threshold and result["median_s"] - base["median_s"] > min_delta:
+            regressions.append(name)
+            flag = " ❌"
+        elif change < -threshold:
+            flag = " 🚀"
+        print(f"   {name:<22} {result['median_s']:>9.3f} {base['median_s']:>9.3f} {change:>+7.1%}{flag}")
+    return regressions
+
+
+def main():
+    if sys.platform.startswith('win'):
+        sys.stdout.reconfigure(encoding='utf-8')
+    parser = argparse.ArgumentParser(description="Offline micro-benchmarks for the rendering hot paths.")
+    parser.add_argument("--only", help="run cases whose name contains this substring")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--skip-e2e", action="store_true", help="skip the 10-second end-to-end encode")
+    parser.add_argument("--out", default=RESULTS_FILE)
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true", help="write this run to the baseline file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="allowed slowdown (0.15 = 15%%)")
+    parser.add_argument("--min-delta", type=float, default=MIN_DELTA_S, help="ignore slowdowns below this many seconds")
+    args = parser.parse_args()
+
+    os.chdir(BASE_DIR) # Fixtures, fonts and the header logo are repo-relative
+    work_dir = tempfile.mkdtemp(prefix="bench_micro_")
+    try:
+        generator = make_offline_generator(work_dir)
+        cases = build_cases(generator, args.skip_e2e)
+        if args.only:
+            cases = {name: fn for name, fn in cases.items() if args.only in name}
+
+        results = {}
+        for name, fn in cases.items():
+            print(f"⏱️ {name}...", flush=True)
+            results[name] = run_case(fn, max(1, args.repeat))
+            print(f"   {name}: median {results[name]['median_s']:.3f}s (min {results[name]['min_s']:.3f}s)")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {"environment": environment(), "repeat": args.repeat, "frames_per_case": FRAMES_PER_CASE, "results": results}
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=1)
+    print(f"\n📂 Results written: {args.out}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=1)
+        print(f"📌 Baseline saved: {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"ℹ️ No baseline at {args.baseline} (create one with --save-baseline)")
+        return
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.threshold, args.min_delta)
+    if regressions:
+        print(f"\n❌ Regressed beyond {args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+    print(f"\n✅ No regressions beyond {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Checkpoint / resume for daily runs.
+
+Each run (one date + topic) has a manifest at `.cache/runs/<run_id>.json`
+recording completed stages (news, script, record, render, upload) and
+finished assets (TTS audio, images). Every file a stage produced is hashed
+and a copy kept under `.cache/runs/<run_id>/`, so it survives a wiped
+working tree (the CI runner persists `.cache/` between runs).
+
+With `resume=True` a stage whose files still verify is skipped and its
+recorded result reused; a missing working copy is restored from the run
+dir. Without it the manifest starts empty and every stage runs again.
+
+    manifest = RunManifest("261019_semicon", resume=True)
+    cached = manifest.get("script")
+    if cached is None:
+        result = make_script()
+        manifest.complete("script", result, files=[result[0]])
+
+Usage:
+    python checkpoint.py list
+    python checkpoint.py show 261019_semicon
+"""
+import hashlib
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+
+CACHE_DIR = os.environ.get("SHORTS_CACHE_DIR", ".cache")
+RUNS_DIR = os.path.join(CACHE_DIR, "runs")
+KEEP_RUNS_DAYS = 3
+
+
+def file_hash(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class RunManifest:
+    def __init__(self, run_id, resume=False, runs_dir=RUNS_DIR):
+        self.run_id = run_id
+        self.resume = resume
+        self.path = os.path.join(runs_dir, f"{run_id}.json")
+        self.files_dir = os.path.join(runs_dir, run_id)
+        self._lock = threading.Lock()
+        self.data = {"run_id": run_id, "created_at": time.time(), "stages": {}, "assets": {}}
+
+        if resume and os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self.data = json.load(f)
+                print(f"♻️ Resuming run {run_id}: {', '.join(self.data['stages']) or 'no completed stages'}")
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Unreadable manifest {self.path}, starting fresh: {e}")
+        elif os.path.isdir(self.files_dir):
+            shutil.rmtree(self.files_dir, ignore_errors=True)
+        prune_runs(runs_dir, keep=run_id)
+
+    # ---------- files ----------
+    def _keep(self, path):
+        """Hashes `path` and keeps a copy in the run dir. Returns the file record."""
+        digest = file_hash(path)
+        stored = os.path.join(self.files_dir, digest + os.path.splitext(path)[1])
+        # A real copy, not a hard link: ffmpeg -y / PIL rewrite working files in place.
+        # (samefile: replaces links kept by earlier versions)
+        if not os.path.exists(stored) or os.path.samefile(path, stored):
+            os.makedirs(self.files_dir, exist_ok=True)
+            shutil.copyfile(path, stored + ".tmp")
+            os.replace(stored + ".tmp", stored)
+        return {"path": path, "sha256": digest, "stored": stored}
+
+    @staticmethod
+    def _verify(record):
+        """True if the working copy matches its hash (restoring it from the run dir if needed)."""
+        path = record["path"]
+        if os.path.exists(path) and file_hash(path) == record["sha256"]:
+            return True
+        stored = record.get("stored")
+        if stored and os.path.exists(stored) and file_hash(stored) == record["sha256"]:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            shutil.copyfile(stored, path)
+            return True
+        return False
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.path)
+
+    # ---------- stages ----------
+    def complete(self, stage, value=None, files=()):
+        """Records a finished stage with its (JSON-serializable) result and output files."""
+        records = [self._keep(path) for path in files if path and os.path.exists(path)]
+        with self._lock:
+            self.data["stages"][stage] = {"value": value, "files": records, "finished_at": time.time()}
+            self._save()
+
+    def get(self, stage):
+        """Recorded result of a completed stage if resuming and all its files verify, else None."""
+        if not self.resume:
+            return None
+        entry = self.data["stages"].get(stage)
+        if entry is None:
+            return None
+        if not all(self._verify(record) for record in entry["files"]):
+            print(f"⚠️ Checkpoint '{stage}' failed verification, re-running it")
+            return None
+        print(f"♻️ Skipping completed stage '{stage}' ({len(entry['files'])} file(s) verified)")
+        return entry["value"]
+
+    # ---------- assets ----------
+    def put_asset(self, key, path, extra=None):
+        if not path or not os.path.exists(path):
+            return
+        record = self._keep(path)
+        record["extra"] = extra
+        with self._lock:
+            self.data["assets"][key] = record
+            self._save()
+
+    def get_asset(self, key):
+        """(path, extra) for a finished asset if resuming and it verifies, else None."""
+        if not self.resume:
+            return None
+        record = self.data["assets"].get(key)
+        if record is None or not self._verify(record):
+            return None
+        return record["path"], record.get("extra")
+
+
+def prune_runs(runs_dir=RUNS_DIR, keep=None, days=KEEP_RUNS_DAYS):
+    """Removes manifests (and their files) older than `days`."""
+    if not os.path.isdir(runs_dir):
+        return
+    cutoff = time.time() - days * 86400
+    for name in os.listdir(runs_dir):
+        if not name.endswith(".json") or name[:-5] == keep:
+            continue
+        path = os.path.join(runs_dir, name)
+        if os.path.getmtime(path) < cutoff:
+            os.remove(path)
+            shutil.rmtree(os.path.join(runs_dir, name[:-5]), ignore_errors=True)
+
+
+def main():
+    if sys.platform.startswith('win'):
+        sys.stdout.reconfigure(encoding='utf-8')
+    command = sys.argv[1] if len(sys.argv) > 1 else "list"
+    if command == "show" and len(sys.argv) > 2:
+        with open(os.path.join(RUNS_DIR, f"{sys.argv[2]}.json"), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        for stage, entry in data["stages"].items():
+            print(f"{stage:<10} {len(entry['files'])} file(s)  {time.ctime(entry['finished_at'])}")
+        print(f"assets     {len(data['assets'])}")
+    elif os.path.isdir(RUNS_DIR):
+        for name in sorted(os.listdir(RUNS_DIR)):
+            if name.endswith(".json"):
+                print(name[:-5])
+
+
+if __name__ == "__main__":
+    main()
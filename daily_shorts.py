@@ -1,96 +1,101 @@
 import os
 import json
-import feedparser
-import json
-import feedparser
-import google.generativeai as genai
+import contextlib
 import time
-from dotenv import load_dotenv # [NEW] Local .env support
-
-# Load environment variables from .env file (for local testing)
-# User requested specific path: C:\Coding\Python
-load_dotenv(r"C:\Coding\Python\.env")
 import socket
 from datetime import datetime, timedelta
-from time import mktime
-from google.generativeai.types import HarmCategory, HarmBlockThreshold
-
-# 네트워크 타임아웃 60초
-socket.setdefaulttimeout(60)
+from pipeline_dag import Pipeline, Skip
+import encode_planner
+import memtrace
+import profiling
+import tracing
+# google.generativeai는 gemini_client에서 첫 호출 시 로드 (import 시 부작용 없음)
 
 # ==========================================
 # [설정] 모델 이름
 MODEL_NAME = 'gemini-2.5-flash' 
+# 스트리밍 모드: 대본이 생성되는 동안 완성된 hook/segment부터 TTS·이미지 작업 시작
+STREAM_SCRIPT = os.environ.get("SHORTS_STREAM_SCRIPT", "1") != "0"
+STREAM_UPLOAD = os.environ.get("SHORTS_STREAM_UPLOAD", "0") == "1" # 인코딩 중 업로드 (--stream-upload)
 # ==========================================
 
-# 환경 변수 로드
-GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")
-
-if not GEMINI_API_KEY:
-    print("🚨 경고: GEMINI_API_KEY가 환경변수에 없습니다.")
-else:
-    genai.configure(api_key=GEMINI_API_KEY)
+# 안전 설정 (문자열 이름 = HarmCategory / HarmBlockThreshold enum 이름, genai 타입 import 불필요)
+SAFETY_SETTINGS = {
+    "HARM_CATEGORY_HARASSMENT": "BLOCK_NONE",
+    "HARM_CATEGORY_HATE_SPEECH": "BLOCK_NONE",
+    "HARM_CATEGORY_SEXUALLY_EXPLICIT": "BLOCK_NONE",
+    "HARM_CATEGORY_DANGEROUS_CONTENT": "BLOCK_NONE",
+}
 
 def get_gemini_response(prompt_text):
-    """Gemini API 호출 함수"""
+    """Gemini API 호출 함수 (모델 재사용 + 디스크 응답 캐시)"""
+    from gemini_client import get_client
+
     try:
-        model = genai.GenerativeModel(MODEL_NAME)
-    except:
-        model = genai.GenerativeModel('gemini-2.5-flash-lite')
+        with tracing.span("gemini.generate"):
+            return get_client(MODEL_NAME).generate(prompt_text, safety_settings=SAFETY_SETTINGS)
+    except Exception as e:
+        print(f"❌ Gemini API Error: {e}")
+        return f"ERROR: {str(e)}"
 
-    safety_settings = {
-        HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_NONE,
-        HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_NONE,
-        HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_NONE,
-        HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_NONE,
-    }
+def invalidate_gemini_response(prompt_text):
+    """파싱 불가능한 응답이 캐시에서 재사용되지 않도록 삭제"""
+    from gemini_client import get_client
 
+    get_client(MODEL_NAME).invalidate(prompt_text, safety_settings=SAFETY_SETTINGS)
+
+def stream_gemini_response(prompt_text, on_part):
+    """Gemini 스트리밍 호출: 완성된 hook_plan / thumbnail_plan / segment 객체를 즉시 on_part로 전달"""
+    from gemini_client import get_client
+    from script_stream import ScriptStreamScanner
+
+    scanner = ScriptStreamScanner()
+    chunks = []
+    started = time.perf_counter()
+    first_part_at = None
     try:
-        response = model.generate_content(prompt_text, safety_settings=safety_settings)
-        return response.text
+        with tracing.span("gemini.stream"):
+            for chunk in get_client(MODEL_NAME).generate_stream(prompt_text, safety_settings=SAFETY_SETTINGS):
+                chunks.append(chunk)
+                for kind, index, part in scanner.feed(chunk):
+                    if first_part_at is None:
+                        first_part_at = time.perf_counter() - started
+                        print(f"⚡ First script part ({kind}) ready after {first_part_at:.1f}s, starting asset work...")
+                    try:
+                        on_part(kind, index, part)
+                    except Exception as e:
+                        print(f"⚠️ Prefetch for {kind} failed: {e}")
     except Exception as e:
         print(f"❌ Gemini API Error: {e}")
         return f"ERROR: {str(e)}"
 
+    total = time.perf_counter() - started
+    if first_part_at is not None:
+        print(f"⏱️ Script stream: first asset request at {first_part_at:.1f}s of {total:.1f}s total")
+    return "".join(chunks)
+
+def format_news_items(entries, limit=3):
+    """뉴스 항목을 프롬프트용 텍스트로 변환 (토큰 예산 내로 정리/압축)"""
+    from news_context import build_news_context
+
+    context, stats = build_news_context(entries, limit=limit)
+    if stats["items"]:
+        print(f"🧾 News context: ~{stats['context_tokens']} tokens from ~{stats['raw_tokens']} raw "
+              f"({stats['items']} items, {stats['per_item_tokens']} tokens/item budget)")
+    return context
+
 def fetch_rss_feed(url, limit=3, days=1):
-    """RSS 피드에서 뉴스 가져오기"""
-    feed = feedparser.parse(url)
-    news_items = []
-    
-    now = datetime.now()
-    cutoff_date = now - timedelta(days=days)
-    
-    print(f"🔍 Searching News (Limit: {limit}, Since: {cutoff_date.strftime('%Y-%m-%d')})...")
-
-    count = 0
-    for entry in feed.entries:
-        if count >= limit:
-            break
-            
-        if hasattr(entry, 'published_parsed'):
-            pub_date = datetime.fromtimestamp(mktime(entry.published_parsed))
-            if pub_date < cutoff_date:
-                continue
-        
-        # Try to find a summary or description
-        content_snippet = ""
-        if hasattr(entry, 'summary'):
-            content_snippet = entry.summary
-        elif hasattr(entry, 'description'):
-            content_snippet = entry.description
-            
-        # Basic HTML tag removal
-        import re
-        clean_content = re.sub('<[^<]+?>', '', content_snippet).strip()
-        
-        news_items.append(f"- Title: {entry.title}\n- Content: {clean_content}\n- Link: {entry.link}")
-        count += 1
-        
-    return "\n\n".join(news_items)
+    """RSS 피드에서 뉴스 가져오기 (조건부 GET 캐시 사용)"""
+    from news_ingest import fetch_feeds, recent_entries
+
+    print(f"🔍 Searching News (Limit: {limit}, Since: {(datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')})...")
+    entries = recent_entries(fetch_feeds([url])[url], days)
+    return format_news_items(entries, limit)
 
-def generate_english_shorts_script(news_data, topic_keyword, mode="General_IT"):
+def generate_english_shorts_script(news_data, topic_keyword, mode="General_IT", on_part=None):
     """
     뉴스 데이터를 바탕으로 영어 쇼츠 대본 생성 (Dual Mode)
+    on_part가 주어지면 스트리밍으로 생성하며, 완성된 부분 객체마다 on_part(kind, index, obj) 호출
     """
     
     # ---------------------------------------------------------
@@ -217,37 +222,67 @@ def generate_english_shorts_script(news_data, topic_keyword, mode="General_IT"):
       ]
     }}
     """
-    response_text = get_gemini_response(prompt)
+    from news_context import count_tokens
+    print(f"🧾 Prompt size: ~{count_tokens(prompt)} tokens (news ~{count_tokens(news_data)})")
+
+    if on_part is None:
+        response_text = get_gemini_response(prompt)
+    else:
+        response_text = stream_gemini_response(prompt, on_part)
     
-    # JSON helper (remove markdown code blocks if present)
-    import re
-    import json
-    try:
-        json_text = re.sub(r'```json\s*|\s*```', '', response_text).strip()
-        result = json.loads(json_text)
-        
-        # [User Request] Deduplicate and Force Static Outro
-        if "segments" in result:
-            # 1. Remove any LLM-generated segments that look like an outro
-            result["segments"] = [
-                s for s in result["segments"] 
-                if "subscribe" not in s.get("text", "").lower() 
-                and "subscribe" not in s.get("keyword", "").lower()
-            ]
-            
-            # 2. Append the ONE true static outro
-            result["segments"].append({
-                "text": "If useful, please like and subscribe!", 
-                "image_prompt": "Subscribe", # Triggers static image in make_video.py
-                "keyword": "Subscribe"       # Triggers static image in make_video.py
-            })
-            
-        return result
-    except Exception as e:
-        print(f"❌ JSON Parsing Error: {e}")
+    # 스키마 검증 + 로컬 복구 (코드펜스, trailing comma, 잘린 JSON, 누락된 image_prompt/camera_effect)
+    from script_schema import parse_script, repair_script, repair_with_llm
+    result, issues = parse_script(response_text)
+    if result is None:
+        # 복구 불가 → 캐시된 불량 응답을 지우고 전체 대본을 한 번만 다시 요청
+        print("❌ JSON Parsing Error (unrecoverable)")
         print(f"📜 Raw Response Text:\n{response_text}") # Debugging info
+        invalidate_gemini_response(prompt)
+        result, issues = parse_script(get_gemini_response(prompt))
+        if result is None:
+            return None
+
+    # [User Request] Deduplicate and Force Static Outro
+    # 1. Remove any LLM-generated segments that look like an outro
+    result["segments"] = [
+        s for s in result.get("segments") or []
+        if "subscribe" not in s.get("text", "").lower()
+        and "subscribe" not in s.get("keyword", "").lower()
+    ]
+    issues = repair_script(result)
+
+    # 실패한 부분(hook_plan / thumbnail_plan / 부족한 segments)만 다시 요청
+    if issues:
+        print(f"⚠️ Script issues: {issues}")
+        issues = repair_with_llm(result, issues, prompt, get_gemini_response, invalidate_gemini_response)
+        if issues:
+            print(f"⚠️ Unresolved after repair (renderer falls back to defaults): {issues}")
+    if not result["segments"]:
+        print("❌ Script has no usable segments.")
         return None
 
+    # 2. Append the ONE true static outro
+    result["segments"].append({
+        "text": "If useful, please like and subscribe!",
+        "image_prompt": "Subscribe", # Triggers static image in make_video.py
+        "keyword": "Subscribe"       # Triggers static image in make_video.py
+    })
+    return result
+
+# 모드별 주제 설정 (시간대 자동 선택 / 배치 실행 모두 사용)
+TOPIC_CONFIGS = {
+    "Semicon": {
+        "keyword": "semicon",
+        "search_query": "semiconductor+industry+AI+chip+market+trend+nvidia+tsmc+samsung",
+        "mode": "Semicon"
+    },
+    "General_IT": {
+        "keyword": "tech",
+        "search_query": "latest+tech+news+iphone+ai+tesla+google+gadgets",
+        "mode": "General_IT"
+    },
+}
+
 def get_topic_by_time():
     """시간대에 따라 주제와 모드를 결정하는 함수"""
     current_hour = datetime.utcnow().hour
@@ -256,105 +291,311 @@ def get_topic_by_time():
     # [Semicon Mode] - 미국 장 마감 직후/한국 출근 시간
     if current_hour >= 22 or current_hour == 0:
         print(f"⏰ Current UTC: {current_hour}h -> [MODE: SEMICON Analyst] Activated")
-        return {
-            "keyword": "semicon",
-            "search_query": "semiconductor+industry+AI+chip+market+trend+nvidia+tsmc+samsung",
-            "mode": "Semicon"
-        }
+        return dict(TOPIC_CONFIGS["Semicon"])
         
     # CASE 2: UTC 01시 ~ 03시 (KST 10시 ~ 12시 / EST 20시 ~ 22시)
     # [General IT Mode] - 미국 취침 전/한국 점심 시간
     else:
         print(f"⏰ Current UTC: {current_hour}h -> [MODE: IT TREND Hunter] Activated")
-        return {
-            "keyword": "tech",
-            "search_query": "latest+tech+news+iphone+ai+tesla+google+gadgets",
-            "mode": "General_IT"
-        }
-
-if __name__ == "__main__":
-    # =================================================
-    # [설정] 시간 기반 자동 실행
-    # =================================================
-    
-    # 1. Get Config based on Time
-    target_config = get_topic_by_time()
-    
-    TOPIC_KEYWORD = target_config["keyword"]
-    SEARCH_QUERY = target_config["search_query"]
-    MODE = target_config["mode"]
+        return dict(TOPIC_CONFIGS["General_IT"])
+
+def select_news(mode, news_entries, story_index, exclude_links=()):
+    """이미 다룬 기사 제외 → 관련도 순위 → 토큰 예산 내 프롬프트용 텍스트. (entries, content) 반환"""
+    from news_rank import rank_entries
+
+    # 이미 다룬 기사 (링크 / 유사 제목) 제외 (배치 실행 시 다른 모드가 고른 기사도 제외)
+    news_entries = [e for e in story_index.filter_new(news_entries) if e.get("link") not in exclude_links]
+
+    # 피드 순서 대신 모드 키워드 프로필과의 관련도(BM25 + 최신성)로 상위 3개 선택
+    news_entries = rank_entries(news_entries, mode, top_k=3)
+    return news_entries, format_news_items(news_entries, limit=3)
+
+def script_path_for(topic_keyword):
+    """파일명 포맷: scripts/YYMMDD_주제_script.json (GitHub Actions UTC -> US EST 기준 날짜)"""
+    us_now = datetime.utcnow() - timedelta(hours=5)
+    today_str = us_now.strftime("%y%m%d") # 240206 형태로 변환
+    return today_str, f"scripts/{today_str}_{topic_keyword}_script.json"
+
+def open_story_index():
+    """중복 제외 인덱스 열기 + 기존 scripts/*.json 증분 색인"""
+    from story_index import StoryIndex
+    story_index = StoryIndex()
+    story_index.backfill()
+    return story_index
+
+def select_all_news(configs, ingested, story_index, exclude_links=()):
+    """모드별 기사 선택 (앞 모드가 고른 기사는 뒤 모드에서 제외). {mode: (keyword, entries, content)}"""
+    selected = {}
+    picked_links = set(exclude_links)
+    for config, (keyword, news_entries) in zip(configs, ingested):
+        news_entries, news_content = select_news(config["mode"], news_entries, story_index, picked_links)
+        picked_links.update(e.get("link") for e in news_entries)
+        selected[config["mode"]] = (keyword, news_entries, news_content)
+    return selected
+
+def render_config(job):
+    """작업별 RenderConfig: temp_assets/<job> 작업 폴더 + final_generated_shorts_<job>.mp4 (동시 실행 시 파일 충돌 방지)"""
+    from make_video import RenderConfig
+
+    return RenderConfig.from_env().for_job(job)
+
+def make_generator(job, prefetch_pool=None, manifest=None):
+    """VideoGenerator 준비 (뉴스 수집과 병렬로). 실패 시 None"""
+    try:
+        from make_video import VideoGenerator
+        # --resume 시 작업 폴더를 지우지 않고 체크포인트된 이미지/오디오를 재사용
+        resume = manifest is not None and manifest.resume
+        return VideoGenerator(prefetch_pool=prefetch_pool, clean=not resume, checkpoint=manifest, config=render_config(job))
+    except Exception as e:
+        print(f"⚠️ Asset prefetch disabled: {e}")
+        return None
 
-    rss_url = f"https://news.google.com/rss/search?q={SEARCH_QUERY}+when:1d&hl=en-US&gl=US&ceid=US:en"
-    
-    print(f"📰 Fetching News for Topic: {TOPIC_KEYWORD} (Mode: {MODE})...")
+def write_script(mode, news, generator):
+    """
+    대본 생성 후 저장. 스트리밍 모드에서는 대본 생성 중에 완성된 부분부터 에셋 prefetch 시작.
+    (script_path, script_data, today_str) 반환
+    """
+    topic_keyword, _news_entries, news_content = news
+    print(f"✅ News Fetched. Generating Script for {mode}...")
+
+    on_part = None
+    if STREAM_SCRIPT and generator is not None:
+        on_part = lambda kind, index, part: generator.prefetch_part(kind, index, part, topic_keyword)
+
+    script_data = generate_english_shorts_script(news_content, topic_keyword, mode=mode, on_part=on_part)
+    if not script_data:
+        raise RuntimeError(f"Failed to generate script ({mode}).")
+
+    print("\n🎬 Generated Shorts Script Data:\n")
+    print(json.dumps(script_data, indent=2))
+
+    today_str, filename = script_path_for(topic_keyword)
+    os.makedirs("scripts", exist_ok=True)
+    with open(filename, "w", encoding="utf-8") as f:
+        json.dump(script_data, f, ensure_ascii=False, indent=2)
+    print(f"\n📂 Script saved to: {filename}")
+    return filename, script_data, today_str
+
+def render_video(script, news, generator, job, prefetch_pool=None, render_slot=None, stream=None):
+    """🚀 VIDEO GENERATION: 영상 파일 경로 반환 (stream이 있으면 인코딩 중 업로드 스테이지로 전달)"""
+    from make_video import VideoGenerator
+    import asyncio
+
+    _filename, script_data, _today_str = script
+    topic_keyword = news[0]
+    print("🎥 Starting Video Generation Process...")
+    generator = generator or VideoGenerator(prefetch_pool=prefetch_pool, config=render_config(job))
+    # 합성/인코딩은 CPU·메모리 작업: 배치 실행에서는 render slot으로 한 번에 하나만 (다른 작업의 대본/에셋 생성과는 겹침)
+    try:
+        with render_slot or contextlib.nullcontext():
+            video_path = asyncio.run(generator.create_shorts(script_data, topic_keyword, stream))
+    finally:
+        if stream is not None:
+            stream.abort() # 인코딩 전에 실패/중단된 경우 업로더가 기다리지 않도록 (정상 종료 후에는 no-op)
+        encode_planner.render_finished() # 남은 렌더들이 남은 시간을 나눠 씀
+    if not video_path or not os.path.exists(video_path):
+        raise Skip("Video file not found, skipping upload.")
+    return video_path
+
+def upload_short(script, news, video_path, stream=None):
+    """🚀 UPLOAD (stream이 있으면 렌더와 동시에 시작해 인코딩 중인 파일을 업로드)"""
+    from upload_shorts import upload_stream, upload_video
+
+    _filename, script_data, today_str = script
+    topic_keyword = news[0]
+    print("\n🚀 Starting Upload Process...")
+    video_title = f"{script_data.get('title', 'Daily News')} {today_str} #{topic_keyword}"
+    video_description = f"Daily news update about {topic_keyword}.\n\nSource: Google News\nGenerated by AI."
     
-    news_content = fetch_rss_feed(rss_url, limit=3, days=1)
+    if stream is not None:
+        result = upload_stream(stream, video_title, video_description)
+        if result is None:
+            raise Skip("Encoding did not start, skipping upload.")
+        video_path = stream.path
+    else:
+        result = upload_video(video_path, video_title, video_description)
     
-    # [Fallback Logic] If 'tech' yields no results, try 'IT'
-    if not news_content and TOPIC_KEYWORD == "tech":
-        print("⚠️ No news found for 'tech'. Retrying with keyword 'IT'...")
-        TOPIC_KEYWORD = "IT"
-        SEARCH_QUERY = "IT+industry+news+technology+trends"
-        rss_url = f"https://news.google.com/rss/search?q={SEARCH_QUERY}+when:1d&hl=en-US&gl=US&ceid=US:en"
-        news_content = fetch_rss_feed(rss_url, limit=3, days=1)
-
-    if news_content:
-        print(f"✅ News Fetched. Generating Script for {MODE}...")
-        
-        script_data = generate_english_shorts_script(news_content, TOPIC_KEYWORD, mode=MODE)
-        
-        if script_data:
-            print("\n🎬 Generated Shorts Script Data:\n")
-            print(json.dumps(script_data, indent=2))
-            
-            # [수정됨] 파일명 포맷: YYMMDD_주제_script.txt
-            # GitHub Actions (UTC) -> US EST (UTC-5) 변환
-            us_now = datetime.utcnow() - timedelta(hours=5)
-            today_str = us_now.strftime("%y%m%d") # 240206 형태로 변환
-            filename = f"scripts/{today_str}_{TOPIC_KEYWORD}_script.json"
-            
-            os.makedirs("scripts", exist_ok=True)
-            
-            with open(filename, "w", encoding="utf-8") as f:
-                json.dump(script_data, f, ensure_ascii=False, indent=2)
-            print(f"\n📂 Script saved to: {filename}")
-
-            # 🚀 VIDEO GENERATION START
-            try:
-                from make_video import VideoGenerator
-                import asyncio
-                
-                print("🎥 Starting Video Generation Process...")
-                generator = VideoGenerator()
-                asyncio.run(generator.create_shorts(script_data, TOPIC_KEYWORD))
-                
-                # 🚀 UPLOAD START
-                generated_video_path = "final_generated_shorts.mp4"
-                if os.path.exists(generated_video_path):
-                    print("\n🚀 Starting Upload Process...")
-                    try:
-                        from upload_shorts import upload_video
-                        
-                        video_title = f"{script_data.get('title', 'Daily News')} {today_str} #{TOPIC_KEYWORD}"
-                        video_description = f"Daily news update about {TOPIC_KEYWORD}.\n\nSource: Google News\nGenerated by AI."
-                        
-                        upload_video(generated_video_path, video_title, video_description)
-                        
-                        # [User Request] Cleanup after upload
-                        print(f"🗑️ Deleting uploaded video: {generated_video_path}")
-                        # os.remove(generated_video_path)
-                        
-                    except Exception as e:
-                        print(f"❌ Upload Failed: {e}")
-                else:
-                    print("⚠️ Video file not found, skipping upload.")
-
-            except Exception as e:
-                print(f"❌ Video Generation Failed: {e}")
-                print("Make sure you have valid API Keys and dependencies installed.")
+    # [User Request] Cleanup after upload
+    print(f"🗑️ Deleting uploaded video: {video_path}")
+    # os.remove(video_path)
+    return result
 
+def checkpointed(manifest, stage, fn, files=lambda result: ()):
+    """
+    스테이지 함수를 체크포인트로 감쌈: --resume 시 해시 검증된 결과가 있으면 재사용,
+    없으면 실행 후 결과와 출력 파일을 manifest에 기록 (None 결과는 기록하지 않음)
+    """
+    def run(*args):
+        cached = manifest.get(stage)
+        if cached is not None:
+            return cached
+        result = fn(*args)
+        if result is not None:
+            manifest.complete(stage, result, files(result))
+        return result
+    return run
+
+def open_manifests(configs, resume=False):
+    """모드별 RunManifest (run id: 날짜_주제). {mode: manifest}"""
+    from checkpoint import RunManifest
+    manifests = {}
+    for config in configs:
+        today_str, _ = script_path_for(config["keyword"])
+        manifests[config["mode"]] = RunManifest(f"{today_str}_{config['keyword']}", resume=resume)
+    return manifests
+
+def build_daily_pipeline(configs, batch=False, resume=False, stream_upload=False, time_budget=None):
+    """
+    하루 실행 전체를 스테이지 DAG로 구성 (pipeline_dag.py).
+    뉴스 수집 / 인덱스 로딩 / VideoGenerator 준비가 병렬로 시작되고, 모드별로
+    news → script → (record, render → upload) 가 입력이 준비되는 대로 실행됨.
+    stream_upload=True면 upload가 render와 동시에 시작되어 인코딩 중인 파일을 업로드 (EncodeStream).
+    time_budget(초)이 있으면 남은 렌더들이 시간을 나눠 인코더 설정을 고름 (encode_planner.py).
+    모드별 출력 파일/작업 폴더는 항상 분리 (render_config). batch=True면 prefetch 풀과 render slot을 공유.
+    모든 스테이지는 체크포인트(checkpoint.py)되며, resume=True면 검증된 스테이지는 건너뜀.
+    """
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+    from news_ingest import ingest_many
+
+    manifests = open_manifests(configs, resume)
+    cached_news = {mode: manifest.get("news") for mode, manifest in manifests.items()}
+    # 뉴스가 체크포인트된 모드는 수집/선택을 건너뜀 (그 모드가 고른 기사는 다른 모드에서 제외)
+    pending = [config for config in configs if cached_news[config["mode"]] is None]
+    picked_links = {e.get("link") for news in cached_news.values() if news for e in news[1]}
+
+    dag = Pipeline("daily")
+    dag.add("story_index", open_story_index)
+    if pending:
+        dag.add("ingest", lambda: ingest_many(pending, days=1))
+        dag.add("select", lambda ingested, story_index: select_all_news(pending, ingested, story_index, picked_links),
+                ["ingest", "story_index"])
+
+    prefetch_pool = render_slot = None
+    if batch:
+        from make_video import PREFETCH_WORKERS
+        prefetch_pool = ThreadPoolExecutor(max_workers=PREFETCH_WORKERS * len(configs), thread_name_prefix="prefetch")
+        render_slot = threading.Semaphore(1)
+    index_lock = threading.Lock() # SQLite 인덱스 접근 직렬화
+
+    def pick(selected, mode):
+        keyword, news_entries, news_content = selected[mode]
+        if not news_content:
+            raise Skip(f"No recent news found for {mode}.")
+        return keyword, news_entries, news_content
+
+    def record(script, news, story_index):
+        # 다음 실행에서 중복 제외되도록 사용한 기사와 대본을 인덱스에 기록
+        filename, script_data, _ = script
+        with index_lock:
+            story_index.add_entries(news[1])
+            story_index.add_script(filename, script_data)
+        return True
+
+    for config in configs:
+        mode = config["mode"]
+        job = config["keyword"] # 작업별 작업 폴더/출력 파일 (render_config)
+        manifest = manifests[mode]
+
+        dag.add(f"{mode}.generator", lambda job=job, m=manifest: make_generator(job, prefetch_pool, m))
+        if cached_news[mode] is not None:
+            dag.add(f"{mode}.news", lambda news=cached_news[mode]: news)
         else:
-            print("❌ Failed to generate script.")
-        
-    else:
-        print("⚠️ No recent news found.")
\ No newline at end of file
+            dag.add(f"{mode}.news", checkpointed(manifest, "news", lambda selected, mode=mode: pick(selected, mode)), ["select"])
+        dag.add(f"{mode}.script",
+                checkpointed(manifest, "script", lambda news, generator, mode=mode: write_script(mode, news, generator),
+                             files=lambda script: [script[0]]),
+                [f"{mode}.news", f"{mode}.generator"])
+        dag.add(f"{mode}.record", checkpointed(manifest, "record", record), [f"{mode}.script", f"{mode}.news", "story_index"])
+        # 렌더가 이미 체크포인트된 경우(--resume)는 완성된 파일을 일반 업로드
+        stream = None
+        if stream_upload and manifest.get("render") is None:
+            from upload_shorts import EncodeStream
+            stream = EncodeStream()
+        dag.add(f"{mode}.render",
+                checkpointed(manifest, "render",
+                             lambda script, news, generator, job=job, stream=stream:
+                                 render_video(script, news, generator, job, prefetch_pool, render_slot, stream),
+                             files=lambda video_path: [video_path]),
+                [f"{mode}.script", f"{mode}.news", f"{mode}.generator"])
+        if stream is not None:
+            # render와 같은 입력 → 둘이 동시에 시작 (render가 실패하면 stream.abort()로 업로드도 종료)
+            dag.add(f"{mode}.upload",
+                    checkpointed(manifest, "upload", lambda script, news, _generator, stream=stream: upload_short(script, news, None, stream)),
+                    [f"{mode}.script", f"{mode}.news", f"{mode}.generator"])
+        else:
+            dag.add(f"{mode}.upload", checkpointed(manifest, "upload", upload_short), [f"{mode}.script", f"{mode}.news", f"{mode}.render"])
+
+    renders = sum(manifest.get("render") is None for manifest in manifests.values())
+    if time_budget and renders and render_config(configs[0]["keyword"]).plan_encode:
+        encode_planner.start_run(time_budget, renders)
+        # 인코더 calibration (머신당 1회, .cache에 저장)은 뉴스/대본 생성과 병렬로
+        dag.add("encode_calibration", encode_planner.calibrate)
+    return dag, prefetch_pool
+
+def run_daily(configs, batch=False, resume=False, stream_upload=False, time_budget=None):
+    """DAG 실행 후 스테이지별 시간과 critical path 출력"""
+    for config in configs:
+        print(f"📰 Fetching News for Topic: {config['keyword']} (Mode: {config['mode']})...")
+    dag, prefetch_pool = build_daily_pipeline(configs, batch, resume, stream_upload, time_budget)
+    try:
+        results = dag.run()
+    finally:
+        if prefetch_pool is not None:
+            prefetch_pool.shutdown(wait=False)
+    if results.get("story_index") is not None:
+        results["story_index"].close()
+    dag.report()
+    return results
+
+def main():
+    import argparse
+    from local_env import load_local_env
+
+    # 로컬 테스트용 .env 로드 + 네트워크 타임아웃 60초 (import 시가 아니라 실행 시에만)
+    load_local_env()
+    socket.setdefaulttimeout(60)
+
+    parser = argparse.ArgumentParser(description="Daily news shorts: script → video → upload.")
+    parser.add_argument("--mode", choices=["auto", "both"] + list(TOPIC_CONFIGS), default="auto",
+                        help="auto: pick the mode by UTC hour; both: all modes in one batch process")
+    parser.add_argument("--resume", action="store_true",
+                        help="skip stages already completed today (verified against the run manifest in .cache/runs)")
+    parser.add_argument("--stream-upload", action="store_true", default=STREAM_UPLOAD,
+                        help="upload while encoding (fragmented mp4, env SHORTS_STREAM_UPLOAD=1)")
+    parser.add_argument("--time-budget", type=float, default=float(os.environ.get("SHORTS_TIME_BUDGET") or 0) or None,
+                        help="seconds the whole run may take; encoder settings are planned to fit (env SHORTS_TIME_BUDGET)")
+    parser.add_argument("--trace", nargs="?", const=tracing.DEFAULT_TRACE_PATH, default=tracing.trace_path(),
+                        help=f"record spans and write a Chrome trace (default path: {tracing.DEFAULT_TRACE_PATH}; env {tracing.TRACE_ENV})")
+    parser.add_argument("--profile", nargs="?", const=profiling.DEFAULT_PROFILE_DIR, default=profiling.profile_dir(),
+                        help=f"cProfile + sampled stacks per stage (default dir: {profiling.DEFAULT_PROFILE_DIR}; env {profiling.PROFILE_ENV})")
+    parser.add_argument("--memory", nargs="?", const=memtrace.DEFAULT_REPORT_PATH, default=memtrace.report_path(),
+                        help=f"RSS + tracemalloc per stage, JSON report (default path: {memtrace.DEFAULT_REPORT_PATH}; env {memtrace.MEMORY_ENV})")
+    parser.add_argument("--memory-mode", choices=memtrace.MODES, default="peak",
+                        help="rss: RSS only; peak: + tracemalloc high-water sites; stages: + per-stage retained sites (slow)")
+    args = parser.parse_args()
+
+    if args.trace:
+        tracing.enable()
+    if args.profile:
+        profiling.enable()
+    if args.memory:
+        memtrace.enable(args.memory_mode)
+    try:
+        if args.mode == "both":
+            run_daily([dict(config) for config in TOPIC_CONFIGS.values()], batch=True, resume=args.resume, stream_upload=args.stream_upload, time_budget=args.time_budget)
+        elif args.mode == "auto":
+            run_daily([get_topic_by_time()], resume=args.resume, stream_upload=args.stream_upload, time_budget=args.time_budget)
+        else:
+            run_daily([dict(TOPIC_CONFIGS[args.mode])], resume=args.resume, stream_upload=args.stream_upload, time_budget=args.time_budget)
+    finally:
+        if args.trace:
+            tracing.export_chrome(args.trace)
+            tracing.print_summary()
+        if args.profile:
+            profiling.write_all(args.profile)
+        if args.memory:
+            memtrace.write_report(args.memory)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""
+x264 settings chosen from the time left in the run.
+
+    import encode_planner
+    encode_planner.start_run(budget, renders=2)    # daily entry point only (SHORTS_TIME_BUDGET)
+    encode_planner.calibrate()                     # e.g. as a stage running alongside news / script
+    if encode_planner.active():
+        plan = encode_planner.plan(frames, 1080, 1920) # EncodePlan(preset, crf, threads, predicted, budget, ...)
+        ... encode with plan.preset / plan.crf / plan.threads ...
+        encode_planner.record(plan, seconds)       # logs predicted vs actual, appends to the history
+    encode_planner.render_finished()
+
+Model: encoding `frames` frames of `megapixels` takes
+
+    frames * (compose + x264[preset] * megapixels * CRF_COST[crf])   seconds
+
+  x264[preset]  seconds per megapixel-frame at the chosen thread count,
+                measured once per machine by a short ffmpeg run on a synthetic
+                source (.cache/encode_calibration.json, keyed by CPU and cores)
+  compose       moviepy's per-frame composition cost (it feeds the encoder),
+                learned from recent actual encodes (.cache/encode_history.jsonl)
+
+Planning only happens against a real deadline: SHORTS_ENCODE_DEADLINE
+(epoch seconds), or the run budget registered by start_run() (daily_shorts,
+SHORTS_TIME_BUDGET set by the workflow). Anything else (benchmarks,
+render_daemon, backfill_render) keeps the fixed encoder settings and never
+touches the history. The time left, minus UPLOAD_RESERVE per pending render,
+is split evenly across the renders still pending; the plan is the highest
+rung of LADDER whose prediction x SAFETY_MARGIN fits that share. If nothing
+fits, the fastest rung is used.
+"""
+import dataclasses
+import json
+import os
+import platform
+import statistics
+import subprocess
+import threading
+import time
+
+CACHE_DIR = os.environ.get("SHORTS_CACHE_DIR", ".cache")
+CALIBRATION_PATH = os.path.join(CACHE_DIR, "encode_calibration.json")
+HISTORY_PATH = os.path.join(CACHE_DIR, "encode_history.jsonl")
+UPLOAD_RESERVE = 120 # Left for upload / cleanup after each encode
+SAFETY_MARGIN = 1.25
+COMPOSE_SECONDS = 0.3 # Per-frame composition cost until the history says otherwise
+HISTORY_KEEP = 50
+HISTORY_WINDOW = 10 # Recent runs used to estimate the composition cost
+
+# Lowest -> highest quality; the current default (medium, CRF 23) is a middle rung
+LADDER = (
+    ("ultrafast", 23),
+    ("veryfast", 23),
+    ("fast", 23),
+    ("medium", 23),
+    ("medium", 20),
+    ("slow", 20),
+)
+CRF_COST = {23: 1.0, 20: 1.1} # Lower CRF -> more bits to code, slightly slower
+CALIBRATION_SIZE = (540, 960) # Half resolution keeps the calibration to a few seconds
+CALIBRATION_FRAMES = 24
+
+_IMPORTED = time.time()
+_lock = threading.Lock()
+_calibration = None
+_run_deadline = None # Set by start_run()
+_pending_renders = 1
+
+
+@dataclasses.dataclass(frozen=True)
+class EncodePlan:
+    preset: str
+    crf: int
+    threads: int
+    frames: int
+    megapixels: float
+    predicted: float # Seconds
+    budget: float # Seconds left before the deadline when planned
+    encode_seconds: float # x264 part of `predicted`
+
+    def describe(self):
+        return f"{self.preset}/crf{self.crf}/{self.threads} threads"
+
+
+def encoder_threads():
+    """x264 threads: all cores, minus one for the moviepy process feeding frames on larger machines."""
+    cores = os.cpu_count() or 1
+    return cores - 1 if cores > 2 else cores
+
+
+def _machine_key():
+    cpu = platform.processor() or platform.machine()
+    try:
+        with open("/proc/cpuinfo", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    cpu = line.split(":", 1)[1].strip()
+                    break
+    except OSError:
+        pass
+    return f"{cpu}|{os.cpu_count()}|{encoder_threads()}"
+
+
+def _process_start():
+    """Wall-clock start of this process (Linux /proc), else the time this module was imported."""
+    try:
+        with open("/proc/self/stat", "r", encoding="utf-8") as f:
+            start_ticks = float(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime", "r", encoding="utf-8") as f:
+            uptime = float(f.read().split()[0])
+        return time.time() - uptime + start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return _IMPORTED
+
+
+def start_run(budget, renders=1):
+    """Registers the run deadline (process start + `budget` seconds), shared by `renders` encodes."""
+    global _run_deadline, _pending_renders
+    with _lock:
+        _run_deadline = _process_start() + budget
+        _pending_renders = max(1, renders)
+
+
+def render_finished():
+    """One of the run's renders is done (or failed): the rest split the remaining time."""
+    global _pending_renders
+    with _lock:
+        _pending_renders = max(1, _pending_renders - 1)
+
+
+def deadline():
+    """Epoch seconds the encodes must finish by, None when there is no real deadline."""
+    value = os.environ.get("SHORTS_ENCODE_DEADLINE")
+    return float(value) if value else _run_deadline
+
+
+def active():
+    return deadline() is not None
+
+
+def time_left():
+    """Seconds available for the next encode: its share of the time left before the deadline."""
+    pending = _pending_renders
+    return (deadline() - time.time() - UPLOAD_RESERVE * pending) / pending
+
+
+# ---------- calibration ----------
+def _measure(preset, threads):
+    """Seconds per megapixel-frame for one preset (synthetic source, null muxer)."""
+    from moviepy.config import FFMPEG_BINARY
+
+    width, height = CALIBRATION_SIZE
+    cmd = [FFMPEG_BINARY, "-v", "error", "-f", "lavfi",
+           "-i", f"testsrc2=size={width}x{height}:rate=24",
+           "-frames:v", str(CALIBRATION_FRAMES), "-c:v", "libx264", "-preset", preset, "-crf", "23",
+           "-threads", str(threads), "-f", "null", "-"]
+    started = time.perf_counter()
+    subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    elapsed = time.perf_counter() - started
+    return elapsed / CALIBRATION_FRAMES / (width * height / 1e6)
+
+
+def calibrate():
+    """{preset: seconds per megapixel-frame}, measured once per machine and cached."""
+    global _calibration
+    with _lock:
+        if _calibration is not None:
+            return _calibration
+        key = _machine_key()
+        try:
+            with open(CALIBRATION_PATH, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+            if cached.get("machine") == key:
+                _calibration = cached["seconds_per_mp_frame"]
+                return _calibration
+        except (OSError, ValueError, KeyError):
+            pass
+
+        threads = encoder_threads()
+        presets = sorted({preset for preset, _ in LADDER}, key=[p for p, _ in LADDER].index)
+        started = time.perf_counter()
+        try:
+            measured = {preset: _measure(preset, threads) for preset in presets}
+        except (OSError, subprocess.CalledProcessError) as e:
+            print(f"⚠️ Encoder calibration failed ({e}); keeping the default encoder settings.")
+            _calibration = {}
+            return _calibration
+        print(f"📐 Encoder calibrated in {time.perf_counter() - started:.1f}s: "
+              + ", ".join(f"{p} {1 / s:.0f} MP-frames/s" for p, s in measured.items()))
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(CALIBRATION_PATH, "w", encoding="utf-8") as f:
+            json.dump({"machine": key, "seconds_per_mp_frame": measured}, f, indent=2)
+        _calibration = measured
+        return _calibration
+
+
+# ---------- history ----------
+def _history():
+    try:
+        with open(HISTORY_PATH, "r", encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+    except (OSError, ValueError):
+        return []
+
+
+def compose_seconds():
+    """Per-frame composition cost: median of (actual - predicted x264 time) / frames over recent runs."""
+    key = _machine_key()
+    samples = [max(0.0, (h["actual"] - h["encode_seconds"]) / h["frames"])
+               for h in _history()[-HISTORY_WINDOW:]
+               if h.get("machine") == key and h.get("frames")]
+    return statistics.median(samples) if samples else COMPOSE_SECONDS
+
+
+# ---------- planning ----------
+def plan(frames, width, height, extra_pixels=0, budget=None):
+    """
+    Picks preset / CRF / threads for `frames` frames of width x height (plus
+    `extra_pixels` per frame for extra renditions). None without a deadline or a calibration.
+    """
+    if budget is None and not active():
+        return None
+    calibration = calibrate()
+    if not calibration:
+        return None
+    budget = time_left() if budget is None else budget
+    megapixels = (width * height + extra_pixels) / 1e6
+    compose = compose_seconds()
+
+    def predict(preset, crf):
+        encode = frames * calibration[preset] * megapixels * CRF_COST[crf]
+        return frames * compose + encode, encode
+
+    chosen = None
+    for preset, crf in LADDER:
+        predicted, encode = predict(preset, crf)
+        if chosen is None or predicted * SAFETY_MARGIN <= budget:
+            chosen = EncodePlan(preset, crf, encoder_threads(), frames, round(megapixels, 3),
+                                round(predicted, 1), round(budget, 1), round(encode, 1))
+    fits = chosen.predicted * SAFETY_MARGIN <= budget
+    print(f"📐 Encode plan: {chosen.describe()} for {frames} frames, predicted {chosen.predicted:.0f}s "
+          f"of {budget:.0f}s left" + ("" if fits else " ⚠️ (over budget, fastest settings)"))
+    return chosen
+
+
+def record(plan, actual):
+    """Logs predicted vs actual encode time and appends the run to the history."""
+    error = (actual - plan.predicted) / plan.predicted if plan.predicted else 0.0
+    print(f"⏱️ Encode {plan.describe()}: predicted {plan.predicted:.1f}s, actual {actual:.1f}s ({error:+.0%})")
+    entry = dict(dataclasses.asdict(plan), actual=round(actual, 2), machine=_machine_key(), ts=round(time.time()))
+    history = _history()[-(HISTORY_KEEP - 1):] + [entry]
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_path = HISTORY_PATH + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for item in history:
+            f.write(json.dumps(item) + "\n")
+    os.replace(tmp_path, HISTORY_PATH)
@@ -0,0 +1,224 @@
+"""
+Reusable Gemini client with an on-disk response cache.
+
+- `google.generativeai` is imported and configured (GEMINI_API_KEY, plus
+  GEMINI_API_BASE for a local stand-in) on first model use, not at import.
+- `GenerativeModel` instances are built once per process and reused.
+- Responses are cached under `.cache/gemini/` keyed by
+  (model name, prompt hash, safety settings), with a TTL.
+- GEMINI_CACHE_MODE controls the cache:
+    readwrite (default)  use cached responses, store new ones
+    refresh              always call the API, store the result
+    replay               offline: only serve cached responses, never call the API
+    off                  no caching
+
+Usage:
+    python gemini_client.py stats
+    python gemini_client.py clear
+"""
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+
+CACHE_DIR = os.environ.get("SHORTS_CACHE_DIR", ".cache")
+GEMINI_CACHE_DIR = os.path.join(CACHE_DIR, "gemini")
+GEMINI_CACHE_MODE = os.environ.get("GEMINI_CACHE_MODE", "readwrite")
+GEMINI_CACHE_TTL = float(os.environ.get("GEMINI_CACHE_TTL", 24 * 3600))
+
+FALLBACK_MODEL_NAME = 'gemini-2.5-flash-lite'
+
+_models = {}
+_models_lock = threading.Lock()
+_configured = False
+
+
+def _configure(genai):
+    """genai.configure() from the environment, once per process. Caller holds _models_lock."""
+    global _configured
+    if _configured:
+        return
+    _configured = True
+    api_key = os.environ.get("GEMINI_API_KEY")
+    # 로컬 stand-in 서버 사용 시 (standin_server.py) REST 엔드포인트 override
+    api_base = os.environ.get("GEMINI_API_BASE")
+    if not api_key:
+        print("🚨 경고: GEMINI_API_KEY가 환경변수에 없습니다.")
+    elif api_base:
+        genai.configure(api_key=api_key, transport="rest", client_options={"api_endpoint": api_base})
+    else:
+        genai.configure(api_key=api_key)
+
+
+def get_model(model_name):
+    """Returns the process-wide GenerativeModel for `model_name` (built on first use)."""
+    import google.generativeai as genai
+
+    with _models_lock:
+        _configure(genai)
+        model = _models.get(model_name)
+        if model is None:
+            try:
+                model = genai.GenerativeModel(model_name)
+            except Exception:
+                model = genai.GenerativeModel(FALLBACK_MODEL_NAME)
+            _models[model_name] = model
+        return model
+
+
+def _settings_key(safety_settings):
+    """Stable string form of a {HarmCategory: HarmBlockThreshold} dict."""
+    if not safety_settings:
+        return ""
+    items = sorted((getattr(k, "name", str(k)), getattr(v, "name", str(v))) for k, v in safety_settings.items())
+    return json.dumps(items)
+
+
+class ResponseCache:
+    def __init__(self, cache_dir=GEMINI_CACHE_DIR, ttl=GEMINI_CACHE_TTL, mode=GEMINI_CACHE_MODE):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.mode = mode
+
+    def key(self, model_name, prompt, safety_settings=None):
+        prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        raw = json.dumps([model_name, prompt_hash, _settings_key(safety_settings)])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key):
+        if self.mode in ("off", "refresh"):
+            return None
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                record = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # Replay mode serves stale entries too: being offline beats being fresh
+        if self.mode != "replay" and time.time() - record.get("created_at", 0) > self.ttl:
+            return None
+        return record["text"]
+
+    def put(self, key, text, model_name):
+        if self.mode in ("off", "replay"):
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = self._path(key) + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"model": model_name, "created_at": time.time(), "text": text}, f, ensure_ascii=False)
+        os.replace(tmp_path, self._path(key))
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def stats(self):
+        if not os.path.isdir(self.cache_dir):
+            return {"entries": 0, "bytes": 0}
+        files = [os.path.join(self.cache_dir, n) for n in os.listdir(self.cache_dir) if n.endswith(".json")]
+        return {"entries": len(files), "bytes": sum(os.path.getsize(p) for p in files)}
+
+    def clear(self):
+        removed = 0
+        if os.path.isdir(self.cache_dir):
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(".json"):
+                    os.remove(os.path.join(self.cache_dir, name))
+                    removed += 1
+        return removed
+
+
+class GeminiClient:
+    def __init__(self, model_name, cache=None):
+        self.model_name = model_name
+        self.cache = cache or ResponseCache()
+
+    def generate(self, prompt, safety_settings=None):
+        """
+        Returns the response text. Raises on API errors (nothing is cached then)
+        and raises LookupError on a cache miss in replay mode.
+        """
+        key = self.cache.key(self.model_name, prompt, safety_settings)
+        started = time.perf_counter()
+        cached = self.cache.get(key)
+        if cached is not None:
+            print(f"♻️ Gemini cache hit ({key[:12]}, {(time.perf_counter() - started) * 1000:.1f}ms)")
+            return cached
+        if self.cache.mode == "replay":
+            raise LookupError(f"No cached Gemini response for {key[:12]} (GEMINI_CACHE_MODE=replay)")
+
+        model = get_model(self.model_name)
+        response = model.generate_content(prompt, safety_settings=safety_settings)
+        text = response.text
+        print(f"🤖 Gemini response in {time.perf_counter() - started:.1f}s ({len(text)} chars)")
+        self.cache.put(key, text, self.model_name)
+        return text
+
+    def invalidate(self, prompt, safety_settings=None):
+        """Drops the cached response for `prompt` (e.g. it failed validation)."""
+        self.cache.delete(self.cache.key(self.model_name, prompt, safety_settings))
+
+    def generate_stream(self, prompt, safety_settings=None):
+        """
+        Yields response text chunks as they arrive. A cache hit yields the whole
+        cached text at once; the full text is cached after the stream completes.
+        """
+        key = self.cache.key(self.model_name, prompt, safety_settings)
+        cached = self.cache.get(key)
+        if cached is not None:
+            print(f"♻️ Gemini cache hit ({key[:12]})")
+            yield cached
+            return
+        if self.cache.mode == "replay":
+            raise LookupError(f"No cached Gemini response for {key[:12]} (GEMINI_CACHE_MODE=replay)")
+
+        started = time.perf_counter()
+        first_chunk_at = None
+        model = get_model(self.model_name)
+        response = model.generate_content(prompt, safety_settings=safety_settings, stream=True)
+        parts = []
+        for chunk in response:
+            text = chunk.text
+            if not text:
+                continue
+            if first_chunk_at is None:
+                first_chunk_at = time.perf_counter() - started
+            parts.append(text)
+            yield text
+
+        text = "".join(parts)
+        print(f"🤖 Gemini streamed {len(text)} chars in {time.perf_counter() - started:.1f}s "
+              f"(first token {first_chunk_at or 0:.1f}s)")
+        self.cache.put(key, text, self.model_name)
+
+
+_clients = {}
+
+
+def get_client(model_name):
+    """Process-wide GeminiClient per model name."""
+    client = _clients.get(model_name)
+    if client is None:
+        client = _clients[model_name] = GeminiClient(model_name)
+    return client
+
+
+def main():
+    if sys.platform.startswith('win'):
+        sys.stdout.reconfigure(encoding='utf-8')
+    command = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    cache = ResponseCache()
+    if command == "clear":
+        print(f"🗑️ Removed {cache.clear()} cached response(s) from {cache.cache_dir}")
+    else:
+        print(json.dumps(dict(cache.stats(), dir=cache.cache_dir, mode=cache.mode, ttl=cache.ttl), indent=2))
+
+
+if __name__ == "__main__":
+    main()
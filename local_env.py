@@ -0,0 +1,33 @@
+"""
+Local .env loading for development runs.
+
+In CI the secrets arrive as environment variables; locally they come from a
+.env file. Entry points call load_local_env() at the start of main(), never
+at import time, so importing a module does not touch the environment.
+
+The file is SHORTS_DOTENV if set, else the shared C:\\Coding\\Python\\.env.
+Variables that are already set in the environment win.
+"""
+import os
+
+DOTENV_ENV = "SHORTS_DOTENV"
+DEFAULT_DOTENV = r"C:\Coding\Python\.env"
+
+_loaded = None
+
+
+def load_local_env():
+    """Loads the .env file once per process. Returns its path ("" if there is none)."""
+    global _loaded
+    if _loaded is not None:
+        return _loaded
+    path = os.environ.get(DOTENV_ENV) or DEFAULT_DOTENV
+    _loaded = path if os.path.isfile(path) else ""
+    if _loaded:
+        try:
+            from dotenv import load_dotenv
+        except ImportError:
+            print(f"⚠️ python-dotenv is not installed, ignoring {_loaded}")
+            return _loaded
+        load_dotenv(_loaded)
+    return _loaded
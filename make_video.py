@@ -5,55 +5,139 @@ if sys.platform.startswith('win'):
     sys.stdout.reconfigure(encoding='utf-8')
 
 import asyncio
-import requests
 import random
 import re
 import json
 import shutil
 import textwrap
 import io
-from PIL import Image, ImageDraw, ImageFont
-from moviepy import VideoFileClip, AudioFileClip, TextClip, CompositeVideoClip, concatenate_videoclips, vfx, ColorClip, ImageClip, CompositeAudioClip, afx
-import edge_tts
-
-# ... (Configuration section remains same)
-
-
-from dotenv import load_dotenv
-
-# Load environment variables from .env file (for local testing)
-load_dotenv(r"C:\Coding\Python\.env")
+import hashlib
+import threading
+import contextlib
+import dataclasses
+import functools
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+import encode_planner
+from script_schema import repair_segment
+from tracing import traced
+# moviepy, PIL, edge_tts and requests are imported where they are used, so
+# importing this module stays cheap (python -X importtime) and side-effect free
 
 # ==========================================
 # [Configuration]
 # ==========================================
 #PEXELS_API_KEY = os.environ.get("PEXELS_API_KEY")
-PIXABAY_API_KEY = os.environ.get("PIXABAY_API_KEY")
-HF_TOKEN = os.environ.get("HF_TOKEN")
-CLOUDFLARE_ACCOUNT_ID = os.environ.get("CLOUDFLARE_ACCOUNT_ID")
-CLOUDFLARE_API_KEY = os.environ.get("CLOUDFLARE_API_KEY") or os.environ.get("CLOUDFLARE_API_TOKEN")
-
 VOICE_NAME = "en-US-ChristopherNeural" # options: en-US-AriaNeural, en-US-GuyNeural
+BODY_VOICE = "en-US-AndrewNeural" # [User Request] Energetic Voice (Andrew) for Hook & Body
+BODY_RATE = "+10%" # Body speed +10%
+HOOK_RATE = "+15%" # Hook speed +15%
+PREFETCH_WORKERS = 4 # Concurrent TTS / image requests started ahead of rendering
 VIDEO_WIDTH = 1080
 VIDEO_HEIGHT = 1920 # [User Request] Revert to 9:16 Vertical Ratio (Mobile)
 FONT_SIZE = 70
 MAX_SUBTITLE_CHARS = 120 # [User Request] Increased limit for longer subtitles
+HTTP_POOL_SIZE = 16 # Keep-alive connections per host, shared by all generators in the process
 # ImageMagick path configuration might be needed on Windows
 # change_settings({"IMAGEMAGICK_BINARY": r"C:\Program Files\ImageMagick-7.1.1-Q16-HDRI\magick.exe"})
 
-# [NEW] Font Configuration
 # [NEW] Font Configuration
 # User provided font in assets/Roboto/static/Roboto-Bold.ttf
 FONT_PATH = os.path.join("assets", "Roboto", "static", "Roboto-Bold.ttf")
+WHOOSH_PATH = os.path.join("assets", "Whoosh_4.mp3")
+HEADER_IMG_PATH = os.path.join("assets", "Daily Tech Chips.png")
+WORK_DIR = "temp_assets"
+OUTPUT_FILE = "final_generated_shorts.mp4"
+VIDEO_FPS = 24
+ENCODE_THREADS = 4
+
+@dataclasses.dataclass(frozen=True)
+class Rendition:
+    """
+    One encoded output of a render. width/height None keeps the composited
+    size; with neither video_bitrate nor crf the encoder default applies.
+    """
+    name: str
+    width: int = None
+    height: int = None
+    video_bitrate: str = None
+    crf: int = None
+    preset: str = "medium"
+    codec: str = "libx264"
+    audio_codec: str = "aac"
+    audio_bitrate: str = None # None + aac -> the mixed soundtrack is copied, not re-encoded
+    container: str = "mp4"
+
+    def path_for(self, output_file):
+        """Path next to the main output: final_generated_shorts_<job>_<name>.<container>."""
+        return f"{os.path.splitext(output_file)[0]}_{self.name}.{self.container}"
+
+MAIN_RENDITION = Rendition("main") # The upload file (output_file)
+PREVIEW_RENDITION = Rendition("preview", width=360, height=640, video_bitrate="400k", preset="veryfast", audio_bitrate="64k")
+
+@dataclasses.dataclass(frozen=True)
+class RenderConfig:
+    """
+    Per-job render settings: output paths, assets, voices and provider keys.
+
+    Each VideoGenerator reads only its own config, so generators in one
+    process (batch runs, render_daemon) or in parallel processes sharing a
+    checkout don't step on each other. The frame size stays VIDEO_WIDTH x
+    VIDEO_HEIGHT: the layout is drawn for 1080x1920.
+    """
+    output_dir: str = WORK_DIR
+    output_file: str = OUTPUT_FILE
+    font_path: str = FONT_PATH
+    font_size: int = FONT_SIZE
+    whoosh_path: str = WHOOSH_PATH
+    header_path: str = HEADER_IMG_PATH
+    body_voice: str = BODY_VOICE
+    body_rate: str = BODY_RATE
+    hook_rate: str = HOOK_RATE
+    prefetch_workers: int = PREFETCH_WORKERS
+    pixabay_api_key: str = None
+    hf_token: str = None
+    cloudflare_account_id: str = None
+    cloudflare_api_key: str = None
+    # Provider base URLs (override to point at a local stand-in, see standin_server.py)
+    cloudflare_api_base: str = "https://api.cloudflare.com/client/v4"
+    hf_api_base: str = "https://router.huggingface.co"
+    pollinations_api_base: str = "https://image.pollinations.ai"
+    edge_tts_api_base: str = "" # Empty -> real edge-tts
+    renditions: tuple = () # Extra outputs (e.g. PREVIEW_RENDITION) encoded in the same pass as output_file
+    plan_encode: bool = True # x264 preset / CRF / threads from the time left, when the run has a deadline (encode_planner.py)
+
+    @classmethod
+    def from_env(cls, environ=None, **overrides):
+        """Provider keys / base URLs from the environment (read now, not at import), plus overrides."""
+        env = os.environ if environ is None else environ
+        values = dict(
+            pixabay_api_key=env.get("PIXABAY_API_KEY"),
+            hf_token=env.get("HF_TOKEN"),
+            cloudflare_account_id=env.get("CLOUDFLARE_ACCOUNT_ID"),
+            cloudflare_api_key=env.get("CLOUDFLARE_API_KEY") or env.get("CLOUDFLARE_API_TOKEN"),
+            cloudflare_api_base=env.get("CLOUDFLARE_API_BASE", cls.cloudflare_api_base).rstrip("/"),
+            hf_api_base=env.get("HF_API_BASE", cls.hf_api_base).rstrip("/"),
+            pollinations_api_base=env.get("POLLINATIONS_API_BASE", cls.pollinations_api_base).rstrip("/"),
+            edge_tts_api_base=(env.get("EDGE_TTS_API_BASE") or "").rstrip("/"),
+            renditions=(PREVIEW_RENDITION,) if env.get("SHORTS_PREVIEW") == "1" else (),
+            plan_encode=env.get("SHORTS_ENCODE_PLAN", "1") != "0",
+        )
+        values.update(overrides)
+        return cls(**values)
 
-def download_font():
-    """Checks if Roboto-Bold font exists."""
-    global FONT_PATH
-    
+    def for_job(self, job, base_dir=WORK_DIR):
+        """Copy with a job-specific work dir (base_dir/job) and output file (final_generated_shorts_<job>.mp4)."""
+        return dataclasses.replace(self, output_dir=os.path.join(base_dir, job),
+                                   output_file=f"{os.path.splitext(OUTPUT_FILE)[0]}_{job}.mp4")
+
+@functools.lru_cache(maxsize=None)
+def download_font(font_path=FONT_PATH):
+    """Checks if Roboto-Bold font exists (once per path). Returns the path to use."""
     # Check Default Path
-    if os.path.exists(FONT_PATH):
-        print(f"✅ Found font: {FONT_PATH}")
-        return
+    if os.path.exists(font_path):
+        print(f"✅ Found font: {font_path}")
+        return font_path
 
     # Check Alternates
     alternates = [
@@ -63,62 +147,184 @@ def download_font():
     
     for alt in alternates:
         if os.path.exists(alt):
-             FONT_PATH = alt
-             print(f"✅ Found font in alternate location: {FONT_PATH}")
-             return
+             print(f"✅ Found font in alternate location: {alt}")
+             return alt
 
-    print(f"⚠️ Font not found at {FONT_PATH}. Please ensure 'Roboto-Bold.ttf' is in 'assets/Roboto/static/' or 'assets/'.")
+    print(f"⚠️ Font not found at {font_path}. Please ensure 'Roboto-Bold.ttf' is in 'assets/Roboto/static/' or 'assets/'.")
+    return font_path
 
 # [NEW] Whoosh Sound Download
-WHOOSH_PATH = os.path.join("assets", "Whoosh_4.mp3")
-
-def download_whoosh():
-    """Checks if Whoosh sound exists."""
-    if not os.path.exists(WHOOSH_PATH):
-        print(f"⚠️ Whoosh sound not found at {WHOOSH_PATH}")
+@functools.lru_cache(maxsize=None)
+def download_whoosh(whoosh_path=WHOOSH_PATH):
+    """Checks if Whoosh sound exists (once per path)."""
+    if not os.path.exists(whoosh_path):
+        print(f"⚠️ Whoosh sound not found at {whoosh_path}")
     else: 
-        print(f"✅ Found Whoosh sound: {WHOOSH_PATH}")
-
-# Ensure assets exist
-download_font()
-download_whoosh()
+        print(f"✅ Found Whoosh sound: {whoosh_path}")
+
+_http_session = None
+_http_lock = threading.Lock()
+_network_slot = None # [NEW] Optional cap on concurrent outbound requests (shared across worker processes by backfill_render.py)
+
+def limit_network(slot):
+    """Caps concurrent network requests (image APIs, TTS) with a threading/multiprocessing semaphore."""
+    global _network_slot
+    _network_slot = slot
+
+def network_slot():
+    return _network_slot or contextlib.nullcontext()
+
+def http_session():
+    """Process-wide requests.Session so every generator (and job) reuses one keep-alive pool."""
+    global _http_session
+    with _http_lock:
+        if _http_session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            class _ThrottledSession(requests.Session):
+                def request(self, *args, **kwargs):
+                    with network_slot():
+                        return super().request(*args, **kwargs)
+
+            session = _ThrottledSession()
+            adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _http_session = session
+        return _http_session
+
+# ---------- Warm resources ----------
+# Loaded once per process (per path) and shared by every generator, so a
+# long-lived worker (render_daemon.py) only pays them on its first video.
+
+@functools.lru_cache(maxsize=None)
+def load_fonts(font_size, font_path=FONT_PATH):
+    """(font, font_bold) for subtitles: custom font → system fonts → tiny default."""
+    from PIL import ImageFont
+    font_path = download_font(font_path)
+    try:
+        return ImageFont.truetype(font_path, font_size), ImageFont.truetype(font_path, font_size)
+    except Exception as e:
+        print(f"⚠️ Failed to load {font_path}: {e}")
+
+    for sys_font in ["arial.ttf", "Arial.ttf", "DejaVuSans-Bold.ttf", "liberation-sans"]:
+        try:
+            font = ImageFont.truetype(sys_font, font_size)
+            print(f"ℹ️ Using fallback font: {sys_font}")
+            return font, font # Use same or bold var if known
+        except Exception:
+            continue
+
+    print("⚠️ All font loads failed. Using tiny default font.")
+    font = ImageFont.load_default()
+    return font, font # Default font doesn't scale, so it will be tiny!
+
+@functools.lru_cache(maxsize=None)
+def header_logo(target_w, target_h, path=HEADER_IMG_PATH):
+    """Header logo auto-cropped and fitted into (target_w, target_h) as an RGBA array, or None."""
+    from PIL import Image
+    if not os.path.exists(path):
+        return None
+    import numpy as np
+    with Image.open(path) as pil_img:
+        pil_img = pil_img.convert("RGBA")
+        # Auto-Crop Transparent Borders
+        bbox = pil_img.getbbox()
+        if bbox:
+            pil_img = pil_img.crop(bbox)
+        img_w, img_h = pil_img.size
+        ratio = min(target_w / img_w, target_h / img_h)
+        pil_img = pil_img.resize((int(img_w * ratio), int(img_h * ratio)), Image.Resampling.LANCZOS)
+        array = np.array(pil_img)
+    array.flags.writeable = False # Shared by every clip
+    return array
+
+_whoosh_clips = {} # path -> clip (None if it failed to load)
+_whoosh_lock = threading.Lock()
+
+def whoosh_sfx(path=WHOOSH_PATH):
+    """Whoosh transition SFX (volume-scaled AudioFileClip), or None if unavailable."""
+    from moviepy import AudioFileClip
+    download_whoosh(path)
+    with _whoosh_lock:
+        if path not in _whoosh_clips:
+            clip = None
+            if os.path.exists(path):
+                try:
+                    # Ensure it's not too loud
+                    clip = AudioFileClip(path).with_volume_scaled(0.4)
+                except Exception as e:
+                    print(f"⚠️ Failed to load Whoosh SFX: {e}")
+            _whoosh_clips[path] = clip
+        return _whoosh_clips[path]
+
+def warm_up(config=None):
+    """Loads the shared resources up front (fonts, header layer, SFX, HTTP pool)."""
+    config = config or RenderConfig()
+    load_fonts(config.font_size, config.font_path)
+    header_logo(int(VIDEO_WIDTH * 0.9), int(200 * 0.85), config.header_path)
+    whoosh_sfx(config.whoosh_path)
+    http_session()
 
 class VideoGenerator:
-    _font_warning_shown = False # [NEW] Class-level flag for log suppression
-
-    def __init__(self, output_dir="temp_assets"):
-        self.output_dir = output_dir
+    def __init__(self, output_dir=None, output_file=None, prefetch_pool=None, clean=True, checkpoint=None, config=None):
+        # [NEW] Per-job settings (RenderConfig); output_dir / output_file override the config's
+        config = config or RenderConfig.from_env()
+        if output_dir is not None:
+            config = dataclasses.replace(config, output_dir=output_dir)
+        if output_file is not None:
+            config = dataclasses.replace(config, output_file=output_file)
+        self.config = config
+        self.output_dir = config.output_dir
+        self.output_file = config.output_file
+        self._font_warning_shown = False # [NEW] Per-generator flag for log suppression
         self.image_cache = {} 
+        # [NEW] checkpoint.RunManifest: finished images/audio are recorded and reused on --resume
+        self.checkpoint = checkpoint
         
-        if os.path.exists(output_dir):
+        # [NEW] Asset prefetch (content-keyed futures, filled while the script is still streaming)
+        # A batch run passes one shared pool to all its generators
+        self._prefetch_pool = prefetch_pool
+        self._prefetch_lock = threading.Lock()
+        self._image_futures = {} # (query, width, height, variant) -> Future[path]
+        self._audio_futures = {} # (text, voice, rate) -> Future[(path, word_events)]
+        
+        if clean and os.path.exists(self.output_dir):
             import shutil
             try:
-                shutil.rmtree(output_dir)
-                print(f"🧹 Cleaned up existing temp directory: {output_dir}")
+                shutil.rmtree(self.output_dir)
+                print(f"🧹 Cleaned up existing temp directory: {self.output_dir}")
             except Exception as e:
                 print(f"⚠️ Warning: Could not fully clean temp dir: {e}")
 
-        os.makedirs(output_dir, exist_ok=True)
+        os.makedirs(self.output_dir, exist_ok=True)
+
+    @property
+    def font_path(self):
+        return download_font(self.config.font_path)
 
     # ... (Rest of existing methods) ...
 
     def create_karaoke_clip(self, text, duration):
         # ... (Existing implementation) ...
+            from PIL import ImageFont
             # Font Settings
             font_size = 70 
             try:
-                font = ImageFont.truetype(FONT_PATH, font_size)
-                font_bold = ImageFont.truetype(FONT_PATH, font_size)
+                font = ImageFont.truetype(self.font_path, font_size)
+                font_bold = ImageFont.truetype(self.font_path, font_size)
             except:
-                if not VideoGenerator._font_warning_shown: # [NEW] Suppress generic log
+                if not self._font_warning_shown: # [NEW] Suppress generic log
                     print("⚠️ Failed to load Roboto-Black.ttf, using default.")
-                    VideoGenerator._font_warning_shown = True
+                    self._font_warning_shown = True
                 font = ImageFont.load_default()
                 font_bold = font
             
             # ... (Rest of existing implementation) ...
 
     async def create_shorts(self, script_data, global_topic):
+        from moviepy import AudioFileClip, concatenate_videoclips, vfx, CompositeAudioClip
         print("🚀 Starting Shorts Generation...")
         
         segments_data = script_data.get('segments', [])
@@ -128,9 +334,9 @@ class VideoGenerator:
         
         # [NEW] Whoosh Sound Loading
         whoosh_clip = None
-        if os.path.exists(WHOOSH_PATH):
+        if os.path.exists(self.config.whoosh_path):
             try:
-                whoosh_clip = AudioFileClip(WHOOSH_PATH)
+                whoosh_clip = AudioFileClip(self.config.whoosh_path)
                 # Ensure it's not too loud
                 whoosh_clip = whoosh_clip.with_volume_scaled(0.4)
             except Exception as e:
@@ -257,18 +463,25 @@ class VideoGenerator:
     async def generate_audio_segment(self, text, segment_id):
         """Generates audio and returns path + word timings."""
         output_file = os.path.join(self.output_dir, f"audio_{segment_id}.mp3")
-        
-        # Use edge-tts with WordBoundary
-        # [User Request] Switch to Energetic Voice (Andrew) for Body too
-        voice = "en-US-AndrewNeural" 
-        rate = "+10%" # Body speed +10%
-        communicate = edge_tts.Communicate(text, voice, rate=rate, boundary="WordBoundary")
-        
+        return await self.get_speech(text, output_file, self.config.body_voice, self.config.body_rate)
+
+    async def get_speech(self, text, output_file, voice, rate):
+        """Prefetched TTS result for (text, voice, rate) if one was started, else synthesizes now."""
+        future = self._audio_futures.get((text, voice, rate))
+        if future is not None:
+            audio_path, word_events = await asyncio.wrap_future(future)
+            if audio_path:
+                return audio_path, word_events
+        return await self.synthesize_speech(text, voice, rate, output_file)
+
+    @traced("tts")
+    async def synthesize_speech(self, text, voice, rate, output_file):
+        """Runs TTS into output_file. Returns (path, word_events) or (None, []) on failure."""
         word_events = []
         
         try:
             with open(output_file, "wb") as f:
-                async for chunk in communicate.stream():
+                async for chunk in self.stream_tts(text, voice, rate):
                     if chunk["type"] == "audio":
                         f.write(chunk["data"])
                     elif chunk["type"] == "WordBoundary":
@@ -285,6 +498,35 @@ class VideoGenerator:
             print(f"      ⚠️ TTS Generation failed: {e}")
             return None, []
 
+    async def stream_tts(self, text, voice, rate):
+        """
+        Yields edge-tts style chunks ({'type': 'audio', 'data': ...} / {'type': 'WordBoundary', ...}).
+        If config.edge_tts_api_base (EDGE_TTS_API_BASE) is set, the chunks come from that HTTP stand-in instead of edge-tts.
+        """
+        import edge_tts
+        if not self.config.edge_tts_api_base:
+            slot = network_slot()
+            await asyncio.to_thread(slot.__enter__)
+            try:
+                communicate = edge_tts.Communicate(text, voice, rate=rate, boundary="WordBoundary")
+                async for chunk in communicate.stream():
+                    yield chunk
+            finally:
+                slot.__exit__(None, None, None)
+            return
+
+        import base64
+        payload = {"text": text, "voice": voice, "rate": rate}
+        response = await asyncio.to_thread(http_session().post, f"{self.config.edge_tts_api_base}/tts", json=payload, timeout=60)
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if not line: continue
+            chunk = json.loads(line)
+            if chunk["type"] == "audio":
+                chunk["data"] = base64.b64decode(chunk["data"])
+            yield chunk
+
+    @traced("image.cloudflare")
     def fetch_cloudflare_image(self, query, segment_id, width=1024, height=1024):
         """
         Fetches an AI-generated image from Cloudflare Workers AI (Direct API).
@@ -292,19 +534,20 @@ class VideoGenerator:
         """
         output_filename = os.path.join(self.output_dir, f"image_{segment_id}.jpg")
         
-        if not CLOUDFLARE_ACCOUNT_ID or not CLOUDFLARE_API_KEY or "your-account-id" in CLOUDFLARE_ACCOUNT_ID:
-            print(f"      ⚠️ Cloudflare credentials not set (ID={bool(CLOUDFLARE_ACCOUNT_ID)}, Key={bool(CLOUDFLARE_API_KEY)}). Skipping.")
+        account_id, api_key = self.config.cloudflare_account_id, self.config.cloudflare_api_key
+        if not account_id or not api_key or "your-account-id" in account_id:
+            print(f"      ⚠️ Cloudflare credentials not set (ID={bool(account_id)}, Key={bool(api_key)}). Skipping.")
             return None
 
         # Build API URL
         # Docs: https://developers.cloudflare.com/workers-ai/models/flux-1-schnell/
-        API_URL = f"https://api.cloudflare.com/client/v4/accounts/{CLOUDFLARE_ACCOUNT_ID}/ai/run/@cf/black-forest-labs/flux-1-schnell"
+        API_URL = f"{self.config.cloudflare_api_base}/accounts/{account_id}/ai/run/@cf/black-forest-labs/flux-1-schnell"
 
         # Enhanced Prompt
         enhanced_query = f"{query}, high quality, detailed, realistic, cinematic lighting"
         
         headers = {
-            "Authorization": f"Bearer {CLOUDFLARE_API_KEY}",
+            "Authorization": f"Bearer {api_key}",
             "Content-Type": "application/json"
         }
         
@@ -317,7 +560,7 @@ class VideoGenerator:
 
         try:
             print(f"      🎨 [Cloudflare] Generating image for: '{query}'...")
-            response = requests.post(API_URL, headers=headers, json=payload, timeout=60)
+            response = http_session().post(API_URL, headers=headers, json=payload, timeout=60)
             
             if response.status_code == 200:
                 result = response.json()
@@ -342,6 +585,149 @@ class VideoGenerator:
             print(f"      ⚠️ Cloudflare Exception: {e}")
             return None
 
+    # ---------- Asset prefetch ----------
+    def _submit(self, fn, *args):
+        if self._prefetch_pool is None:
+            self._prefetch_pool = ThreadPoolExecutor(max_workers=self.config.prefetch_workers, thread_name_prefix="prefetch")
+        return self._prefetch_pool.submit(fn, *args)
+
+    @staticmethod
+    def _asset_key(*parts):
+        return hashlib.sha1(json.dumps(parts).encode("utf-8")).hexdigest()[:12]
+
+    def _restored(self, asset, with_extra=False):
+        """Completed future for an asset verified in the resume checkpoint, else None."""
+        restored = self.checkpoint.get_asset(asset) if self.checkpoint is not None else None
+        if restored is None:
+            return None
+        future = Future()
+        future.set_result(restored if with_extra else restored[0])
+        return future
+
+    def _keep_asset(self, asset, fetch):
+        """Runs fetch() and records its output file in the checkpoint. fetch returns path or (path, extra)."""
+        result = fetch()
+        if self.checkpoint is not None:
+            path, extra = result if isinstance(result, tuple) else (result, None)
+            try:
+                self.checkpoint.put_asset(asset, path, extra)
+            except OSError as e:
+                print(f"      ⚠️ Checkpoint write failed for {asset}: {e}")
+        return result
+
+    def prefetch_image(self, query, width, height, variant=0):
+        """Starts fetching an image in the background (deduplicated by request)."""
+        key = (query, width, height, variant)
+        with self._prefetch_lock:
+            if key not in self._image_futures:
+                segment_id = f"pf_{self._asset_key(*key)}"
+                asset = f"image_{segment_id}"
+                self._image_futures[key] = self._restored(asset) or self._submit(
+                    self._keep_asset, asset, lambda: self.fetch_image_from_providers(query, segment_id, width, height))
+            return self._image_futures[key]
+
+    def prefetch_audio(self, text, voice=None, rate=None):
+        """Starts TTS in the background (deduplicated by text/voice/rate; default: the body voice and rate)."""
+        voice = voice or self.config.body_voice
+        rate = rate or self.config.body_rate
+        key = (text, voice, rate)
+        with self._prefetch_lock:
+            if key not in self._audio_futures:
+                asset = f"audio_pf_{self._asset_key(*key)}"
+                output_file = os.path.join(self.output_dir, f"{asset}.mp3")
+                self._audio_futures[key] = self._restored(asset, with_extra=True) or self._submit(
+                    self._keep_asset, asset, lambda: asyncio.run(self.synthesize_speech(text, voice, rate, output_file)))
+            return self._audio_futures[key]
+
+    def fetch_image(self, query, segment_id, width=1024, height=1024, variant=0):
+        """Prefetched image for this request if one was started, else fetches it now."""
+        future = self._image_futures.get((query, width, height, variant))
+        if future is not None:
+            try:
+                image_path = future.result()
+                if image_path:
+                    return image_path
+            except Exception as e:
+                print(f"      ⚠️ Prefetched image failed: {e}")
+        return self.fetch_image_from_providers(query, segment_id, width, height)
+
+    def prefetch_part(self, kind, index, part, global_topic):
+        """Starts asset work for one script part as soon as it is available (see script_stream.py)."""
+        if kind in ("hook_plan", "hook"):
+            self.prefetch_hook(part)
+        elif kind == "thumbnail_plan":
+            self.prefetch_image(self.thumbnail_image_prompt(global_topic, part.get('image_description')), 1080, 1920)
+        elif kind == "segments":
+            # Streamed parts are not repaired yet: request what the renderer will ask for after repair_script
+            seg = repair_segment(dict(part))
+            if seg is not None:
+                self.prefetch_segment(seg, global_topic)
+
+    def prefetch_script(self, script_data, global_topic):
+        """Starts asset work for a complete script."""
+        hook_data = script_data.get('hook_plan') or script_data.get('hook')
+        if hook_data:
+            self.prefetch_hook(hook_data)
+        thumb_data = script_data.get('thumbnail_plan')
+        thumb_prompt = thumb_data.get('image_description') if thumb_data else script_data.get('thumbnail_prompt')
+        self.prefetch_image(self.thumbnail_image_prompt(global_topic, thumb_prompt), 1080, 1920)
+        for seg in script_data.get('segments', []):
+            self.prefetch_segment(seg, global_topic)
+
+    def prefetch_hook(self, hook_data):
+        narration_text = hook_data.get('narration')
+        if narration_text:
+            self.prefetch_audio(narration_text, self.config.body_voice, self.config.hook_rate)
+        self.prefetch_image(self.hook_image_prompt(hook_data), 1080, 1920)
+
+    def prefetch_segment(self, seg, global_topic):
+        original_text = seg.get('text', '').strip()
+        keyword = seg.get('keyword') or global_topic
+        # Outro segments are replaced by the static Subscribe image
+        if not original_text or keyword == "Subscribe" or "subscribe" in original_text.lower():
+            return
+        image_query, req_w, req_h = self.segment_image_request(seg.get('image_prompt', keyword), seg.get('camera_effect', 'static'))
+        for sentence_idx, sentence in enumerate(self.split_sentences(original_text)):
+            self.prefetch_audio(sentence)
+            self.prefetch_image(image_query, req_w, req_h, variant=sentence_idx)
+
+    def split_sentences(self, text):
+        # [User Request] Split by period for better subtitles
+        return [s.strip() for s in text.split('.') if s.strip()]
+
+    def segment_image_request(self, image_query, camera_effect):
+        """
+        Returns (query, width, height) for a body image.
+        We want the FINAL display to be 810x1080 (3:4 Ratio).
+        For Pan: Generate Wide (16:9) -> Crop/Pan inside 3:4
+        For Zoom/Static: Generate Vertical (3:4) -> exact fit
+        """
+        if camera_effect in ['pan_right', 'pan_left']:
+            # Wide 16:9 for Panning
+            req_w, req_h = 1920, 1080
+            if "wide" not in image_query.lower():
+                image_query += ", wide angle shot, 16:9 aspect ratio"
+        else:
+            # Vertical 3:4 for Zoom/Static
+            # Flux/SDXL likes 832x1216 or similar. 
+            # Let's request 1024x1360 (Standard 3:4 High Res, divisible by 8)
+            req_w, req_h = 1024, 1360 
+            if "vertical" not in image_query.lower():
+                image_query += ", vertical 3:4 aspect ratio"
+        return image_query, req_w, req_h
+
+    def hook_image_prompt(self, hook_data):
+        image_prompt = hook_data.get('image_description') or hook_data.get('image_prompt', 'dark cinematic background')
+        # Force high contrast, no text
+        return f"{image_prompt}, high contrast, cinematic, no text, vertical, 9:16 aspect ratio"
+
+    def thumbnail_image_prompt(self, topic, thumbnail_prompt=None):
+        if thumbnail_prompt:
+            # Use the specific prompt from LLM
+            return f"{thumbnail_prompt}, no text, vertical, 9:16 aspect ratio"
+        # Fallback to generic
+        return f"{topic}, cinematic background, dark atmosphere, high contrast, 8k, no text, vertical, 9:16 aspect ratio"
+
     def fetch_image_from_providers(self, query, segment_id, width=1024, height=1024):
         """
         Tries to fetch image from providers in order:
@@ -361,13 +747,15 @@ class VideoGenerator:
         # 3. Pollinations
         return self.fetch_hf_image(query, segment_id, width, height) # Fallback logic is inside fetch_hf_image wrapping polliniations
 
+    @traced("image.hf")
     def fetch_hf_image(self, query, segment_id, width=1024, height=1024):
         """
         Fetches an AI-generated image from Hugging Face Inference API (Flux model).
         """
         output_filename = os.path.join(self.output_dir, f"image_{segment_id}.jpg")
         
-        if not HF_TOKEN:
+        hf_token = self.config.hf_token
+        if not hf_token:
             print("      ⚠️ HF_TOKEN not found. Using random background.")
             return self.create_random_bg(output_filename)
 
@@ -382,8 +770,8 @@ class VideoGenerator:
         enhanced_query = f"{query}, high quality, detailed, realistic, cinematic lighting"
         
         for model in MODELS:
-            API_URL = f"https://router.huggingface.co/hf-inference/models/{model}"
-            headers = {"Authorization": f"Bearer {HF_TOKEN}"}
+            API_URL = f"{self.config.hf_api_base}/hf-inference/models/{model}"
+            headers = {"Authorization": f"Bearer {hf_token}"}
             
             # Adjust generic params
             use_width = width
@@ -410,7 +798,7 @@ class VideoGenerator:
 
             try:
                 print(f"      🎨 [Hugging Face] Generating image with {model}...")
-                response = requests.post(API_URL, headers=headers, json=payload, timeout=60)
+                response = http_session().post(API_URL, headers=headers, json=payload, timeout=60)
                 
                 if response.status_code == 200:
                     with open(output_filename, 'wb') as f:
@@ -428,10 +816,12 @@ class VideoGenerator:
         print("      ❌ All HF models failed. Falling back to Pollinations AI...")
         return self.fetch_pollinations_image(query, segment_id, width, height)
 
+    @traced("image.pollinations")
     def fetch_pollinations_image(self, query, segment_id, width=1024, height=1024):
         """
         Fetches an AI-generated image from Pollinations (Flux model) as a fallback.
         """
+        import requests
         output_filename = os.path.join(self.output_dir, f"image_{segment_id}.jpg")
         
         # Enhanced Prompt
@@ -439,11 +829,11 @@ class VideoGenerator:
         encoded_query = requests.utils.quote(enhanced_query)
         
         # URL for Pollinations
-        url = f"https://image.pollinations.ai/prompt/{encoded_query}?width={width}&height={height}&model=flux&nologo=true&seed={random.randint(0, 100000)}"
+        url = f"{self.config.pollinations_api_base}/prompt/{encoded_query}?width={width}&height={height}&model=flux&nologo=true&seed={random.randint(0, 100000)}"
         
         try:
             print(f"      🎨 [Pollinations] Generating image for: '{query}'...")
-            response = requests.get(url, timeout=60) 
+            response = http_session().get(url, timeout=60) 
             
             if response.status_code == 200:
                 with open(output_filename, 'wb') as f:
@@ -458,7 +848,9 @@ class VideoGenerator:
             print(f"      ⚠️ Pollinations Exception: {e}")
             return self.create_random_bg(output_filename)
 
+    @traced("image.random_bg")
     def create_random_bg(self, output_filename):
+        from PIL import Image
         # Random dark colors for text readability
         r = random.randint(10, 50)
         g = random.randint(10, 50)
@@ -491,7 +883,9 @@ class VideoGenerator:
             new_h = cur_w / target_ratio
             return clip_in.cropped(y_center=cur_h/2, width=cur_w, height=new_h)
 
+    @traced("ken_burns")
     def apply_ken_burns(self, image_path, effect_type, duration, time_offset=0):
+        from moviepy import CompositeVideoClip, vfx, ImageClip
         try:
             # Load image
             clip = ImageClip(image_path).with_duration(duration)
@@ -605,7 +999,7 @@ class VideoGenerator:
         
         try:
             print(f"      ⬇️ Downloading video to {output_path}...")
-            with requests.get(url, stream=True) as r:
+            with http_session().get(url, stream=True) as r:
                 r.raise_for_status()
                 with open(output_path, 'wb') as f:
                     for chunk in r.iter_content(chunk_size=8192):
@@ -652,11 +1046,13 @@ class VideoGenerator:
             chunks.append(" ".join(current_chunk))
         return chunks
 
+    @traced("subtitles")
     def create_karaoke_clip(self, text, duration):
         """
         Creates a karaoke-style subtitle clip where the active word is highlighted.
         Uses PIL (Pillow) to generate images directly.
         """
+        from moviepy import concatenate_videoclips, ImageClip
         try:
             from PIL import Image, ImageDraw, ImageFont
             
@@ -676,43 +1072,9 @@ class VideoGenerator:
             clips = []
             
             # Font Settings
-            font_size = 70 # Slightly smaller to be safe
-            # Font Settings
-            font_size = 70 
-            font = None
-            font_bold = None
-
-            # 1. Try Custom Font (Roboto-Black)
-            try:
-                font = ImageFont.truetype(FONT_PATH, font_size)
-                font_bold = ImageFont.truetype(FONT_PATH, font_size)
-            except Exception as e:
-                if not VideoGenerator._font_warning_shown:
-                    print(f"⚠️ Failed to load {FONT_PATH}: {e}")
-            
-            # 2. Try System Fonts (Windows/Linux) if custom failed
-            if font is None:
-                system_fonts = ["arial.ttf", "Arial.ttf", "DejaVuSans-Bold.ttf", "liberation-sans"]
-                for sys_font in system_fonts:
-                    try:
-                        font = ImageFont.truetype(sys_font, font_size)
-                        font_bold = ImageFont.truetype(sys_font, font_size) # Use same or bold var if known
-                        if not VideoGenerator._font_warning_shown:
-                            print(f"ℹ️ Using fallback font: {sys_font}")
-                        break
-                    except:
-                        continue
-            
-            # 3. Last Resort (Tiny Default)
-            if font is None:
-                if not VideoGenerator._font_warning_shown:
-                    print("⚠️ All font loads failed. Using tiny default font.")
-                    VideoGenerator._font_warning_shown = True
-                font = ImageFont.load_default()
-                font_bold = font # Default font doesn't scale, so it will be tiny!
-            else:
-                 # Reset warning flag if we found a good font so we don't spam for next clips if successful
-                 pass
+            font_size = self.config.font_size
+            # Custom font → system fonts → tiny default, loaded once per process (load_fonts)
+            font, font_bold = load_fonts(font_size, self.config.font_path)
             
             # Canvas Size
             W, H = VIDEO_WIDTH, 200
@@ -779,6 +1141,7 @@ class VideoGenerator:
 
     def create_subtitle_clip(self, text, duration):
         """Creates a TextClip for the subtitle with manual wrapping."""
+        from moviepy import TextClip
         try:
             # [User Fix] Bigger Font + Manual Wrapping
             # Font Size 60 -> Approx 30px width per char.
@@ -813,6 +1176,7 @@ class VideoGenerator:
         process_segment with Image Caching support for split sentences.
         If duration_override is provided, use it. Otherwise use audio duration.
         """
+        from moviepy import AudioFileClip, CompositeVideoClip, ColorClip, ImageClip
         text = segment_data['text']
         audio_path = segment_data.get('audio_path')
         keyword = segment_data.get('keyword', 'technology')
@@ -842,39 +1206,14 @@ class VideoGenerator:
         # 3. Header
         header_height = 200
         header_bg = ColorClip(size=(VIDEO_WIDTH, header_height), color=(0, 51, 102)).with_duration(duration).with_position(('center', 'top'))
-        header_img_path = os.path.join("assets", "Daily Tech Chips.png")
-        if os.path.exists(header_img_path):
+        if os.path.exists(self.config.header_path):
             try:
                 # [User Request] Auto-Crop and Maximize Logo Size
-                with Image.open(header_img_path) as pil_img:
-                    pil_img = pil_img.convert("RGBA")
-                    # Auto-Crop Transparent Borders
-                    bbox = pil_img.getbbox()
-                    if bbox:
-                        pil_img = pil_img.crop(bbox)
-                    
-                    # Calculate Best Fit Dimensions
-                    # Target Height: 85% of Header Height (200 * 0.85 = 170)
-                    # Target Width:  90% of Video Width (1080 * 0.9 = 972)
-                    
-                    target_h = int(header_height * 0.85)
-                    target_w = int(VIDEO_WIDTH * 0.9)
-                    
-                    img_w, img_h = pil_img.size
-                    ratio = min(target_w / img_w, target_h / img_h)
-                    
-                    new_w = int(img_w * ratio)
-                    new_h = int(img_h * ratio)
-                    
-                    pil_img = pil_img.resize((new_w, new_h), Image.Resampling.LANCZOS)
-                    
-                    # Convert to ImageClip by saving temporarily or byte stream?
-                    # Since ImageClip accepts a path or numpy array.
-                    # Easier to save temp or convert to array.
-                    # Let's use numpy array conversion for speed.
-                    import numpy as np
-                    img_array = np.array(pil_img)
-                    header_img = ImageClip(img_array).with_duration(duration)
+                # Target Height: 85% of Header Height (200 * 0.85 = 170)
+                # Target Width:  90% of Video Width (1080 * 0.9 = 972)
+                # Cropped/resized once per process (header_logo), not per chunk
+                img_array = header_logo(int(VIDEO_WIDTH * 0.9), int(header_height * 0.85), self.config.header_path)
+                header_img = ImageClip(img_array).with_duration(duration)
                 
                 header_img = header_img.with_position('center')
                 header_combined = CompositeVideoClip([header_bg, header_img], size=(VIDEO_WIDTH, header_height)).with_position(('center', 'top'))
@@ -920,30 +1259,9 @@ class VideoGenerator:
                 image_path = None # Prevent falling into Ken Burns block
              
         else:
-            # Generate New
-            image_query = segment_data.get('image_prompt', keyword)
-            
-            # [NEW] Determine Dimensions based on Camera Effect
-            # We want the FINAL display to be 810x1080 (3:4 Ratio).
-            # For Pan: Generate Wide (16:9) -> Crop/Pan inside 3:4
-            # For Zoom/Static: Generate Vertical (3:4) -> exact fit
-            
-            if camera_effect in ['pan_right', 'pan_left']:
-                # Wide 16:9 for Panning
-                req_w, req_h = 1920, 1080
-                if "wide" not in image_query.lower():
-                    image_query += ", wide angle shot, 16:9 aspect ratio"
-            else:
-                # Vertical 3:4 for Zoom/Static
-                # 810x1080 is the target. Let's request slightly higher res for zoom headroom?
-                # Flux/SDXL likes 832x1216 or similar. 
-                # Flux/SDXL likes 832x1216 or similar. 
-                # Let's request 1024x1360 (Standard 3:4 High Res, divisible by 8)
-                req_w, req_h = 1024, 1360 
-                if "vertical" not in image_query.lower():
-                    image_query += ", vertical 3:4 aspect ratio"
-            
-            image_path = self.fetch_image_from_providers(image_query, segment_id, req_w, req_h)
+            # Generate New (or pick up the prefetched image)
+            image_query, req_w, req_h = self.segment_image_request(segment_data.get('image_prompt', keyword), camera_effect)
+            image_path = self.fetch_image(image_query, segment_id, req_w, req_h, variant=segment_data.get('image_variant', 0))
             
             # Save to cache if group_id exists
             if group_id and image_path:
@@ -992,22 +1310,87 @@ class VideoGenerator:
         return final_clip
 
 
-    async def create_shorts(self, script_data, global_topic):
+    async def create_shorts(self, script_data, global_topic, stream=None, renditions=None):
+        """
+        Builds the short as a stage DAG (see pipeline_dag.py): hook / thumbnail
+        images and per-sentence TTS + images run concurrently on the prefetch pool,
+        each clip is composed as soon as its own assets are ready, then
+        assemble -> encode. Prints per-stage timings and the critical path.
+        `stream` (upload_shorts.EncodeStream) makes the encode upload-while-writing;
+        `renditions` (default: config.renditions) are extra outputs from the same
+        composited frames. Returns the main output path.
+        """
+        from pipeline_dag import Pipeline
+
         print("🚀 Starting Shorts Generation...")
         
         # 1. Parse Script (JSON)
         # script_data expected to be {'title': '...', 'segments': [{'text': '...', 'keyword': '...'}, ...]}
         segments_data = script_data.get('segments', [])
-        
-        segments = []
-        clips = [] # [User Request] Ensure clips list is initialized
-        global_segment_index = 0
-        
-        # [NEW] Generate Viral Hook (1.5s + Narration)
-        try:
-            # Support both 'hook_plan' and legacy 'hook'
-            hook_data = script_data.get('hook_plan') or script_data.get('hook')
+        # Support both 'hook_plan' and legacy 'hook'
+        hook_data = script_data.get('hook_plan') or script_data.get('hook')
+        thumb_data = script_data.get('thumbnail_plan')
+        thumb_prompt = thumb_data.get('image_description') if thumb_data else script_data.get('thumbnail_prompt')
+
+        # [NEW] Whoosh Sound Loading (shared, loaded once per process)
+        whoosh_clip = whoosh_sfx(self.config.whoosh_path)
+
+        # Asset stages only wait on the shared prefetch futures (no-ops if streaming already started them);
+        # clip stages never raise, so one bad clip is left out instead of cancelling the video
+        dag = Pipeline("render")
+        clip_stages = []
+        sentence_count = 0
+        if hook_data:
+            hook_assets = [dag.add("hook.image", lambda: self._wait(self.prefetch_image(self.hook_image_prompt(hook_data), 1080, 1920)))]
+            if hook_data.get('narration'):
+                hook_assets.append(dag.add("hook.audio", lambda: self._wait(self.prefetch_audio(hook_data['narration'], self.config.body_voice, self.config.hook_rate))))
+            clip_stages.append(dag.add("hook", lambda *_: self.compose_hook(hook_data), hook_assets))
+
+        for i, seg in enumerate(segments_data):
+            original_text = seg.get('text', '').strip()
+            keyword = seg.get('keyword') or global_topic
             
+            if not original_text and keyword != "Subscribe":
+                print(f"⚠️ Skipping segment {i} due to missing text.")
+                continue
+
+            # [User Request] Split by period for better subtitles
+            for sentence_idx, sentence in enumerate(self.split_sentences(original_text)):
+                n = sentence_count
+                sentence_count += 1
+                assets = [dag.add(f"sentence.{n}.audio", lambda s=sentence: self._wait(self.prefetch_audio(s)))]
+                if keyword != "Subscribe":
+                    image_request = self.segment_image_request(seg.get('image_prompt', keyword), seg.get('camera_effect', 'static'))
+                    assets.append(dag.add(f"sentence.{n}.image", lambda r=image_request, v=sentence_idx: self._wait(self.prefetch_image(*r, variant=v))))
+                clip_stages.append(dag.add(
+                    f"sentence.{n}",
+                    lambda *_, args=(sentence, n, seg, keyword, i, sentence_idx): self.compose_sentence(*args, whoosh_clip),
+                    assets))
+
+        # [NEW] Add Thumbnail at the END (0.1s)
+        dag.add("thumbnail.image", lambda: self._wait(self.prefetch_image(self.thumbnail_image_prompt(global_topic, thumb_prompt), 1080, 1920)))
+        clip_stages.append(dag.add("thumbnail", lambda _: self.compose_thumbnail(script_data, global_topic), ["thumbnail.image"]))
+
+        # 2. Assemble Video (Hook + Sentence Clips + Thumbnail), then encode
+        dag.add("assemble", lambda *clips: self.assemble_video([c for c in clips if c]), clip_stages)
+        dag.add("encode", lambda final_video: self.encode_video(final_video, stream, renditions), ["assemble"])
+
+        results = await asyncio.to_thread(dag.run)
+        dag.report(top=12)
+        return results["encode"]
+
+    @staticmethod
+    def _wait(future):
+        """Result of a prefetch future, None if it failed (the composer then fetches again)."""
+        try:
+            return future.result()
+        except Exception as e:
+            print(f"      ⚠️ Prefetch failed: {e}")
+            return None
+
+    async def compose_hook(self, hook_data):
+        """Hook clip (1.5s + narration)."""
+        try:
             if hook_data:
                 # [NEW] Generate Hook Audio if narration exists
                 hook_audio_path = None
@@ -1022,14 +1405,10 @@ class VideoGenerator:
                     safe_filename = "hook_narration"
                     hook_audio_path = os.path.join(self.output_dir, f"{safe_filename}.mp3")
                     
-                    # Communicate with EDGE-TTS
-                    voice = "en-US-AndrewNeural"
-                    rate = "+15%" # Hook speed +15%
-                    
-                    communicate = edge_tts.Communicate(narration_text, voice, rate=rate)
-                    await communicate.save(hook_audio_path)
+                    # Communicate with EDGE-TTS (Hook speed +15%), or pick up the prefetched audio
+                    hook_audio_path, _ = await self.get_speech(narration_text, hook_audio_path, self.config.body_voice, self.config.hook_rate)
                     
-                    if not os.path.exists(hook_audio_path):
+                    if not hook_audio_path or not os.path.exists(hook_audio_path):
                         print("⚠️ Hook audio generation failed.")
                         hook_audio_path = None
                     else:
@@ -1038,186 +1417,166 @@ class VideoGenerator:
                 hook_clip = self.create_hook_clip(hook_data, audio_path=hook_audio_path)
                 
                 if hook_clip:
-                    clips.append(hook_clip)
                     print("✅ Viral Hook added to start of video.")
+                return hook_clip
         except Exception as e:
             print(f"⚠️ Hook integration failed: {e}")
+        return None
 
-        # [NEW] Whoosh Sound Loading
-        whoosh_clip = None
-        if os.path.exists(WHOOSH_PATH):
-            try:
-                whoosh_clip = AudioFileClip(WHOOSH_PATH)
-                # Ensure it's not too loud
-                whoosh_clip = whoosh_clip.with_volume_scaled(0.4)
-            except Exception as e:
-                print(f"⚠️ Failed to load Whoosh SFX: {e}")
-
-        for i, seg in enumerate(segments_data):
-            original_text = seg.get('text', '').strip()
-            keyword = seg.get('keyword') or global_topic
-            
-            if not original_text and keyword != "Subscribe":
-                print(f"⚠️ Skipping segment {i} due to missing text.")
-                continue
-
-            # [User Request] Split by period for better subtitles
-            # Split by . ! ? but keep the delimiter if possible, or just split by period.
-            # Simple split by period is requested.
-            sentences = [s.strip() for s in original_text.split('.') if s.strip()]
+    async def compose_sentence(self, sentence, n, seg, keyword, seg_index, sentence_idx, whoosh_clip):
+        """Karaoke clip for one sentence (audio + chunked subtitles over the segment image), or None."""
+        from moviepy import AudioFileClip, concatenate_videoclips, vfx, CompositeAudioClip
+        print(f"   🔹 Processing Sentence {n+1}: {sentence[:30]}...")
+        try:
+            # 1. Generate Audio for ONLY the Sentence
+            audio_path, word_events = await self.generate_audio_segment(sentence, n)
             
-            for sentence_idx, sentence in enumerate(sentences):
-                print(f"   🔹 Processing Sentence {global_segment_index+1}: {sentence[:30]}...")
-                
-                # 1. Generate Audio for ONLY the Sentence
-                audio_path, word_events = await self.generate_audio_segment(sentence, global_segment_index)
-                
-                # Check Duration
-                if not audio_path or not os.path.exists(audio_path):
-                    print("      ⚠️ Audio generation failed, skipping.")
-                    continue
-                    
-                full_audio_clip = AudioFileClip(audio_path)
-                full_duration = full_audio_clip.duration
-                
-                # 2. Group Words into Chunks (Karaoke Style)
-                # We use the words from TTS (word_events) to ensure sync.
-                # Note: TTS text might differ slightly (normalization), but it matches audio.
+            # Check Duration
+            if not audio_path or not os.path.exists(audio_path):
+                print("      ⚠️ Audio generation failed, skipping.")
+                return None
                 
-                chunks = []
+            full_audio_clip = AudioFileClip(audio_path)
+            full_duration = full_audio_clip.duration
+            
+            # 2. Group Words into Chunks (Karaoke Style)
+            # We use the words from TTS (word_events) to ensure sync.
+            # Note: TTS text might differ slightly (normalization), but it matches audio.
+            
+            chunks = []
+            current_chunk_words = []
+            current_len = 0
+            max_chars = 25
+            
+            # Helper to flush current chunk
+            def flush_chunk():
+                nonlocal current_chunk_words, current_len
+                if not current_chunk_words: return
+                
+                # Determine start time (start of first word)
+                start_t = current_chunk_words[0]['start']
+                
+                # Text for subtitle
+                text_str = " ".join([w['text'] for w in current_chunk_words])
+                
+                chunks.append({
+                    "text": text_str,
+                    "start": start_t,
+                    "words": current_chunk_words # Keep raw data just in case
+                })
                 current_chunk_words = []
                 current_len = 0
-                max_chars = 25
-                
-                # Helper to flush current chunk
-                def flush_chunk():
-                    nonlocal current_chunk_words, current_len
-                    if not current_chunk_words: return
-                    
-                    # Determine start time (start of first word)
-                    start_t = current_chunk_words[0]['start']
-                    
-                    # Text for subtitle
-                    text_str = " ".join([w['text'] for w in current_chunk_words])
-                    
+
+            if not word_events:
+                # Fallback if no events (e.g. silence or error)
+                # Use simple split
+                raw_chunks = self.split_text_by_words(sentence, max_chars)
+                chunk_duration = full_duration / len(raw_chunks) if raw_chunks else 1
+                for idx, txt in enumerate(raw_chunks):
                     chunks.append({
-                        "text": text_str,
-                        "start": start_t,
-                        "words": current_chunk_words # Keep raw data just in case
+                        "text": txt,
+                        "start": idx * chunk_duration,
+                        "duration_override": chunk_duration 
                     })
-                    current_chunk_words = []
-                    current_len = 0
-
-                if not word_events:
-                    # Fallback if no events (e.g. silence or error)
-                    # Use simple split
-                    raw_chunks = self.split_text_by_words(sentence, max_chars)
-                    chunk_duration = full_duration / len(raw_chunks) if raw_chunks else 1
-                    for idx, txt in enumerate(raw_chunks):
-                        chunks.append({
-                            "text": txt,
-                            "start": idx * chunk_duration,
-                            "duration_override": chunk_duration 
-                        })
-                else:
-                    for evt in word_events:
-                        w_len = len(evt['text'])
-                        if current_len + w_len + 1 > max_chars and current_chunk_words:
-                            flush_chunk()
-                        
-                        current_chunk_words.append(evt)
-                        current_len += w_len + 1
-                    flush_chunk() # Flush remaining
-
-                    # Calculate Durations based on NEXT chunk start
-                    for idx, chunk in enumerate(chunks):
-                        if idx < len(chunks) - 1:
-                            # End at start of next chunk
-                            end_t = chunks[idx+1]['start']
-                        else:
-                            # Last chunk ends at full audio duration
-                            end_t = full_duration
-                        
-                        # Ensure duration is positive
-                        dur = end_t - chunk['start']
-                        if dur <= 0: dur = 0.1 # Safety
-                        chunk['duration_override'] = dur
-
-                sentence_group_id = f"group_{global_segment_index}"
-                sentence_clips = []
-                
-                # [Fix] Reset time offset for each new sentence group
-                # Actually, chunks are sequential parts of ONE sentence.
-                # So offset should accumulate.
-                current_time_offset = 0 # Track time for this sentence
-                
-                for chunk_idx, chunk_info in enumerate(chunks):
-                    chunk_text = chunk_info['text']
-                    chunk_duration = chunk_info.get('duration_override')
-                    
-                    # Validate duration
-                    if chunk_duration is None:
-                        # Should not happen with new logic, but safe fallback
-                        chunk_duration = 1.0
-
-                    # Use provided image prompt
-                    image_prompt = seg.get('image_prompt', keyword)
-                    camera_effect = seg.get('camera_effect', 'static') # Extract here
+            else:
+                for evt in word_events:
+                    w_len = len(evt['text'])
+                    if current_len + w_len + 1 > max_chars and current_chunk_words:
+                        flush_chunk()
                     
-                    chunk_data = {
-                        "text": chunk_text,
-                        "image_prompt": image_prompt,
-                        "keyword": keyword,
-                        "group_id": sentence_group_id,
-                        "camera_effect": camera_effect, # Pass down
-                        "time_offset": current_time_offset, # Pass down
-                        "total_duration": full_duration 
-                    }
+                    current_chunk_words.append(evt)
+                    current_len += w_len + 1
+                flush_chunk() # Flush remaining
+
+                # Calculate Durations based on NEXT chunk start
+                for idx, chunk in enumerate(chunks):
+                    if idx < len(chunks) - 1:
+                        # End at start of next chunk
+                        end_t = chunks[idx+1]['start']
+                    else:
+                        # Last chunk ends at full audio duration
+                        end_t = full_duration
                     
-                    # Create visual clip (mute)
-                    chunk_clip = self.process_segment(chunk_data, f"{global_segment_index}_{chunk_idx}", duration_override=chunk_duration)
-                    if chunk_clip:
-                        # [NEW] Crossfade Logic (Visual Only)
-                        sentence_clips.append(chunk_clip)
-                        
-                    current_time_offset += chunk_duration # Increment offset
-                
-                if sentence_clips:
-                    # Concatenate visual clips
-                    sentence_visual = concatenate_videoclips(sentence_clips, method="compose")
-                    # Set Audio
-                    sentence_final = sentence_visual.with_audio(full_audio_clip)
+                    # Ensure duration is positive
+                    dur = end_t - chunk['start']
+                    if dur <= 0: dur = 0.1 # Safety
+                    chunk['duration_override'] = dur
 
-                    # [NEW] Apply Audio-Visual Transition Effect to the SENTENCE clip
-                    # 1. Visual Fade In (0.5s) - Soft transition
-                    sentence_final = sentence_final.with_effects([vfx.FadeIn(0.5)])
+            sentence_group_id = f"group_{n}"
+            sentence_clips = []
+            
+            # [Fix] Reset time offset for each new sentence group
+            # Actually, chunks are sequential parts of ONE sentence.
+            # So offset should accumulate.
+            current_time_offset = 0 # Track time for this sentence
+            
+            for chunk_idx, chunk_info in enumerate(chunks):
+                chunk_text = chunk_info['text']
+                chunk_duration = chunk_info.get('duration_override')
+                
+                # Validate duration
+                if chunk_duration is None:
+                    # Should not happen with new logic, but safe fallback
+                    chunk_duration = 1.0
+
+                # Use provided image prompt
+                image_prompt = seg.get('image_prompt', keyword)
+                camera_effect = seg.get('camera_effect', 'static') # Extract here
+                
+                chunk_data = {
+                    "text": chunk_text,
+                    "image_prompt": image_prompt,
+                    "keyword": keyword,
+                    "group_id": sentence_group_id,
+                    "camera_effect": camera_effect, # Pass down
+                    "time_offset": current_time_offset, # Pass down
+                    "total_duration": full_duration,
+                    "image_variant": sentence_idx # Matches prefetch_segment
+                }
+                
+                # Create visual clip (mute)
+                chunk_clip = self.process_segment(chunk_data, f"{n}_{chunk_idx}", duration_override=chunk_duration)
+                if chunk_clip:
+                    # [NEW] Crossfade Logic (Visual Only)
+                    sentence_clips.append(chunk_clip)
                     
-                    # 2. Add Whoosh at the beginning (Mixed Audio)
-                    # [USER REQUEST] Only for topic change (Segment > 0)
-                    if whoosh_clip and i > 0 and sentence_idx == 0: 
-                        try:
-                            
-                            # Mix whoosh with voice
-                            # Create CompositeAudioClip
-                            start_whoosh = whoosh_clip.with_volume_scaled(0.8) # Adjust volume (User requested louder)
-                            # If whoosh is longer than sentence, cut it
-                            if start_whoosh.duration > sentence_final.duration:
-                                start_whoosh = start_whoosh.subclipped(0, sentence_final.duration)
-                            
-                            new_audio = CompositeAudioClip([sentence_final.audio, start_whoosh])
-                            sentence_final = sentence_final.with_audio(new_audio)
-                        except Exception as ex:
-                            print(f"      ⚠️ Failed to mix whoosh: {ex}")
+                current_time_offset += chunk_duration # Increment offset
+            
+            if sentence_clips:
+                # Concatenate visual clips
+                sentence_visual = concatenate_videoclips(sentence_clips, method="compose")
+                # Set Audio
+                sentence_final = sentence_visual.with_audio(full_audio_clip)
+
+                # [NEW] Apply Audio-Visual Transition Effect to the SENTENCE clip
+                # 1. Visual Fade In (0.5s) - Soft transition
+                sentence_final = sentence_final.with_effects([vfx.FadeIn(0.5)])
+                
+                # 2. Add Whoosh at the beginning (Mixed Audio)
+                # [USER REQUEST] Only for topic change (Segment > 0)
+                if whoosh_clip and seg_index > 0 and sentence_idx == 0: 
+                    try:
+                        
+                        # Mix whoosh with voice
+                        # Create CompositeAudioClip
+                        start_whoosh = whoosh_clip.with_volume_scaled(0.8) # Adjust volume (User requested louder)
+                        # If whoosh is longer than sentence, cut it
+                        if start_whoosh.duration > sentence_final.duration:
+                            start_whoosh = start_whoosh.subclipped(0, sentence_final.duration)
+                        
+                        new_audio = CompositeAudioClip([sentence_final.audio, start_whoosh])
+                        sentence_final = sentence_final.with_audio(new_audio)
+                    except Exception as ex:
+                        print(f"      ⚠️ Failed to mix whoosh: {ex}")
 
-                    clips.append(sentence_final)
-                
-                global_segment_index += 1
+                return sentence_final
+            return None
+        except Exception as e:
+            print(f"      ⚠️ Sentence {n} failed: {e}")
+            return None
 
-        # 2. Assemble Video
-        print("🎬 Assembling Final Video...")
-        # clips list now contains Hook + Sentence Clips
-        
-        # [NEW] Add Thumbnail at the END (0.1s)
+    def compose_thumbnail(self, script_data, global_topic):
+        """Thumbnail clip appended at the END of the video."""
         try:
             video_title = script_data.get('title', 'Daily News')
             
@@ -1239,11 +1598,16 @@ class VideoGenerator:
             )
             
             if thumb_clip:
-                clips.append(thumb_clip)
                 print("✅ Thumbnail added to END of video.")
+            return thumb_clip
         except Exception as e:
              print(f"⚠️ Thumbnail integration failed: {e}")
+             return None
 
+    def assemble_video(self, clips):
+        """Concatenates the clips and mixes in the background music."""
+        from moviepy import AudioFileClip, concatenate_videoclips, CompositeAudioClip, afx
+        print("🎬 Assembling Final Video...")
         if not clips:
             print("❌ No clips generated!")
             return None
@@ -1270,22 +1634,148 @@ class VideoGenerator:
                 final_video = final_video.with_audio(final_audio)
             except Exception as e:
                 print(f"⚠️ Failed to add BGM: {e}")
-        
-        output_filename = "final_generated_shorts.mp4"
-        final_video.write_videofile(
-            output_filename, 
-            fps=24, 
-            codec='libx264', 
-            audio_codec='aac',
-            threads=4,
-            preset='medium'
-        )
+        return final_video
+
+    def encode_video(self, final_video, stream=None, renditions=None):
+        """
+        Encodes the final video. With a `stream` (upload_shorts.EncodeStream) the
+        mp4 is written fragmented with an empty moov up front, so the file only
+        ever grows and the uploader can send finished bytes during the encode.
+        Extra `renditions` are encoded in the same pass (encode_renditions).
+        Preset / CRF / threads come from encode_planner when the run has a deadline
+        (and config.plan_encode is on), else the fixed medium / CRF 23 / 4 threads.
+        """
+        if final_video is None:
+            return None
+        output_filename = self.output_file
+        renditions = self.config.renditions if renditions is None else renditions
+        plan = None
+        if self.config.plan_encode and encode_planner.active():
+            width, height = final_video.size
+            extra_pixels = sum((r.width or width) * (r.height or height) for r in renditions)
+            plan = encode_planner.plan(int(final_video.duration * VIDEO_FPS), width, height, extra_pixels)
+        preset, threads = (plan.preset, plan.threads) if plan else ('medium', ENCODE_THREADS)
+        ffmpeg_params = ["-crf", str(plan.crf)] if plan else []
+        if stream is not None:
+            ffmpeg_params += ["-movflags", "+frag_keyframe+empty_moov+default_base_moof"]
+            if os.path.exists(output_filename):
+                os.remove(output_filename) # 이전 실행의 파일을 업로더가 읽지 않도록
+            stream.open(output_filename)
+        started = time.perf_counter()
+        try:
+            if renditions:
+                main = dataclasses.replace(MAIN_RENDITION, preset=preset)
+                outputs = [(main, output_filename)] + [(r, r.path_for(output_filename)) for r in renditions]
+                self.encode_renditions(final_video, outputs, threads=threads, main_params=ffmpeg_params)
+            else:
+                final_video.write_videofile(
+                    output_filename, 
+                    fps=VIDEO_FPS, 
+                    codec='libx264', 
+                    audio_codec='aac',
+                    threads=threads,
+                    preset=preset,
+                    ffmpeg_params=ffmpeg_params or None
+                )
+        except Exception:
+            if stream is not None:
+                stream.abort()
+            raise
+        if stream is not None:
+            stream.close()
+        if plan is not None:
+            encode_planner.record(plan, time.perf_counter() - started)
         
         print(f"🎉 Video Saved: {output_filename}")
+        for rendition in renditions:
+            print(f"🎞️ {rendition.name} rendition saved: {rendition.path_for(output_filename)}")
         return output_filename
 
+    def encode_renditions(self, final_video, outputs, fps=VIDEO_FPS, threads=ENCODE_THREADS, main_params=()):
+        """
+        Encodes several renditions from one pass over the composited frames:
+        every frame is rendered once and piped into a single ffmpeg whose
+        filter graph splits (and scales) the stream into one output per
+        rendition. `outputs` is [(Rendition, path)], the first being the main
+        file (`main_params` are extra ffmpeg options for it only).
+        """
+        import subprocess
+        import tempfile
+        from moviepy.config import FFMPEG_BINARY
+
+        audio_path = None
+        if final_video.audio is not None:
+            # The mixed soundtrack is rendered once too, then copied or re-encoded per output
+            audio_path = os.path.join(self.output_dir, "renditions_audio.m4a")
+            try:
+                final_video.audio.write_audiofile(audio_path, fps=44100, codec="aac", logger=None)
+            except Exception:
+                if os.path.exists(audio_path):
+                    os.remove(audio_path)
+                raise
+
+        width, height = final_video.size
+        graph = [f"[0:v]split={len(outputs)}" + "".join(f"[s{i}]" for i in range(len(outputs)))]
+        cmd = [FFMPEG_BINARY, "-y", "-loglevel", "error",
+               "-f", "rawvideo", "-vcodec", "rawvideo", "-s", f"{width}x{height}", "-pix_fmt", "rgb24",
+               "-r", f"{fps:.02f}", "-i", "-"]
+        if audio_path:
+            cmd += ["-i", audio_path]
+        output_args = []
+        for i, (rendition, path) in enumerate(outputs):
+            label = f"[s{i}]"
+            if rendition.width and rendition.height:
+                graph.append(f"{label}scale={rendition.width}:{rendition.height}[v{i}]")
+                label = f"[v{i}]"
+            args = ["-map", label, "-c:v", rendition.codec, "-pix_fmt", "yuv420p", "-threads", str(threads)]
+            if rendition.codec in ("libx264", "libx265"):
+                args += ["-preset", rendition.preset]
+            if rendition.video_bitrate:
+                args += ["-b:v", rendition.video_bitrate]
+            elif rendition.crf is not None:
+                args += ["-crf", str(rendition.crf)]
+            if audio_path:
+                args += ["-map", "1:a"]
+                if rendition.audio_codec == "aac" and not rendition.audio_bitrate:
+                    args += ["-c:a", "copy"]
+                else:
+                    args += ["-c:a", rendition.audio_codec] + (["-b:a", rendition.audio_bitrate] if rendition.audio_bitrate else [])
+            if i == 0:
+                args += list(main_params)
+            output_args += args + [path]
+        cmd += ["-filter_complex", ";".join(graph)] + output_args
+
+        print(f"🎞️ Encoding {len(outputs)} renditions in one pass: " + ", ".join(r.name for r, _ in outputs))
+        # stderr goes to a temp file: a pipe read only at the end could fill up and stall ffmpeg
+        with tempfile.TemporaryFile() as stderr:
+            proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=stderr)
+            finished = False
+            try:
+                try:
+                    for frame in final_video.iter_frames(fps=fps, dtype="uint8", logger="bar"):
+                        proc.stdin.write(frame[:, :, :3].tobytes())
+                    proc.stdin.close()
+                except BrokenPipeError: # ffmpeg exited early; its error is reported below
+                    pass
+                proc.wait()
+                finished = True
+            finally:
+                if not finished: # Frame generation failed: don't leave ffmpeg waiting on stdin
+                    with contextlib.suppress(OSError):
+                        proc.stdin.close()
+                    proc.kill()
+                    proc.wait()
+                if audio_path and os.path.exists(audio_path):
+                    os.remove(audio_path)
+            if proc.returncode != 0:
+                stderr.seek(0)
+                error = stderr.read()[-2000:].decode("utf-8", "replace")
+                raise OSError(f"ffmpeg rendition encode failed: {error}")
+
     def create_hook_clip(self, hook_data, audio_path=None):
         """Creates a viral hook clip with massive text overlay and optional audio."""
+        from PIL import Image, ImageDraw, ImageFont
+        from moviepy import AudioFileClip, CompositeVideoClip, vfx, ImageClip
         print("🪝 Creating Viral Hook Clip...")
         
         try:
@@ -1293,14 +1783,11 @@ class VideoGenerator:
             text_overlay = hook_data.get('overlay_text') or hook_data.get('text_overlay', 'WARNING')
             text_overlay = text_overlay.upper()
             
-            image_prompt = hook_data.get('image_description') or hook_data.get('image_prompt', 'dark cinematic background')
-            
             mood_color = hook_data.get('mood_color', 'red').lower()
             
-            # 1. Fetch Background
-            # Force high contrast, no text
-            full_prompt = f"{image_prompt}, high contrast, cinematic, no text, vertical, 9:16 aspect ratio"
-            bg_path = self.fetch_image_from_providers(full_prompt, "hook_bg", 1080, 1920)
+            # 1. Fetch Background (prefetched while the script was streaming, if available)
+            full_prompt = self.hook_image_prompt(hook_data)
+            bg_path = self.fetch_image(full_prompt, "hook_bg", 1080, 1920)
             
             if not bg_path or not os.path.exists(bg_path):
                 print("⚠️ Hook background fetch failed. Skipping hook.")
@@ -1330,7 +1817,7 @@ class VideoGenerator:
                 font_size = 180 
                 font = None
                 try:
-                    font = ImageFont.truetype(FONT_PATH, font_size)
+                    font = ImageFont.truetype(self.font_path, font_size)
                 except:
                     font = ImageFont.load_default()
                 
@@ -1392,21 +1879,19 @@ class VideoGenerator:
 
     def create_thumbnail(self, topic, title_text, thumbnail_prompt=None, thumbnail_text=None):
         """Creates a high-quality thumbnail with text overlay."""
+        from PIL import Image, ImageDraw, ImageFont
+        from moviepy import ImageClip
         # Use specific thumbnail text if provided, else fall back to video title
         final_text = thumbnail_text if thumbnail_text else title_text
         print(f"🖼️ Creating Thumbnail for '{final_text}'...")
         
         # 1. Fetch Background Image
         if thumbnail_prompt:
-             # Use the specific prompt from LLM
-             thumb_prompt = f"{thumbnail_prompt}, no text, vertical, 9:16 aspect ratio"
              print(f"   Using LLM Thumbnail Prompt: {thumbnail_prompt}")
-        else:
-             # Fallback to generic
-             thumb_prompt = f"{topic}, cinematic background, dark atmosphere, high contrast, 8k, no text, vertical, 9:16 aspect ratio"
+        thumb_prompt = self.thumbnail_image_prompt(topic, thumbnail_prompt)
         
-        # Use existing method to fetch
-        bg_path = self.fetch_image_from_providers(thumb_prompt, "thumbnail", 1080, 1920)
+        # Use existing method to fetch (or the prefetched image)
+        bg_path = self.fetch_image(thumb_prompt, "thumbnail", 1080, 1920)
         
         if not bg_path or not os.path.exists(bg_path):
             print("⚠️ Thumbnail background fetch failed. Skipping thumbnail.")
@@ -1448,7 +1933,7 @@ class VideoGenerator:
                 draw = ImageDraw.Draw(img)
                 
                 # Font Setup
-                font_path = FONT_PATH 
+                font_path = self.font_path 
                 font_size = 120 # Large font for title
                 
                 try:
@@ -1534,6 +2019,24 @@ class VideoGenerator:
             return None
 
 if __name__ == "__main__":
+    import argparse
+    import memtrace
+    import profiling
+    from local_env import load_local_env
+
+    load_local_env()
+
+    parser = argparse.ArgumentParser(description="Render a test short.")
+    parser.add_argument("--profile", nargs="?", const=profiling.DEFAULT_PROFILE_DIR, default=profiling.profile_dir(),
+                        help=f"cProfile + sampled stacks per stage (default dir: {profiling.DEFAULT_PROFILE_DIR})")
+    parser.add_argument("--memory", nargs="?", const=memtrace.DEFAULT_REPORT_PATH, default=memtrace.report_path(),
+                        help=f"RSS + tracemalloc per stage, JSON report (default path: {memtrace.DEFAULT_REPORT_PATH})")
+    args = parser.parse_args()
+    if args.profile:
+        profiling.enable()
+    if args.memory:
+        memtrace.enable()
+
     # Test Payload
     test_payload = {
         "title": "Semiconductor Boom",
@@ -1546,4 +2049,10 @@ if __name__ == "__main__":
     test_topic = "Semiconductor"
     
     generator = VideoGenerator()
-    asyncio.run(generator.create_shorts(test_payload, test_topic))
+    try:
+        asyncio.run(generator.create_shorts(test_payload, test_topic))
+    finally:
+        if args.profile:
+            profiling.write_all(args.profile)
+        if args.memory:
+            memtrace.write_report(args.memory)
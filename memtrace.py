@@ -0,0 +1,329 @@
+"""
+Per-stage memory instrumentation (process RSS + tracemalloc).
+
+    import memtrace
+    memtrace.enable()                       # or SHORTS_MEMORY=1 / --memory
+    with memtrace.stage("render.encode"):
+        ...
+    memtrace.write_report("temp_assets/memory.json")
+
+For every stage this records
+    - process RSS and RSS high-water mark (ru_maxrss) at entry and exit
+    - the highest RSS sampled while the stage ran (RSS_INTERVAL polling)
+    - tracemalloc current / peak traced memory while the stage ran
+and, whenever traced memory at a stage exit reaches a new high, the top
+allocation sites alive at that point (what the process is holding at its
+largest boundary). Modes:
+    rss      RSS only, no tracemalloc (negligible overhead)
+    peak     + tracemalloc and high-water allocation sites (default)
+    stages   + per-stage retained sites: a snapshot diff over every stage,
+             i.e. the arrays a stage keeps alive for its dependents
+             (two snapshots per stage, slow on long pipelines)
+
+An allocation site is the innermost frame in this repo's code (so
+`np.dstack` inside numpy is reported at the make_video.py line that called
+it), with the library frame that actually allocated noted as "via".
+
+Pipeline stages (pipeline_dag.py) are instrumented automatically, named
+"<pipeline>.<stage>". Stages run concurrently, so the sampled RSS and the
+tracemalloc peak between two stage boundaries are credited to every stage
+running at the time: a stage's peak is "the process peak while it ran", not
+its own allocations. numpy registers its buffers with tracemalloc, so
+decoded images, karaoke state images and composite frames show up with the
+line that allocated them. ffmpeg runs in a child process and is not counted.
+
+"""
+import contextlib
+import json
+import linecache
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError: # Windows
+    resource = None
+
+MEMORY_ENV = "SHORTS_MEMORY"
+DEFAULT_REPORT_PATH = os.path.join("temp_assets", "memory.json")
+RSS_INTERVAL = 0.05
+TOP_SITES = 10
+MODES = ("rss", "peak", "stages")
+HIGH_WATER_STEP = 1.05 # New high-water site table only when traced memory grew by 5%+
+TRACE_FRAMES = 8 # Deep enough to get from numpy/PIL/moviepy back into make_video
+
+MB = 1024 * 1024
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+# tracemalloc's own bookkeeping and import machinery are noise in the allocation tables
+_SNAPSHOT_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),
+    tracemalloc.Filter(False, linecache.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+]
+
+_enabled = False
+_mode = "peak"
+_trace_allocations = False
+_high_water = {"traced": 0}  # {"traced", "stage", "t", "sites"} at the largest stage exit so far
+_top = TOP_SITES
+_lock = threading.Lock()
+_active = {}          # id(stage) -> _StageMemory
+_records = []         # finished stage records (dicts)
+_boundaries = []      # {"t", "event", "stage", "rss_mb", "hwm_mb", "traced_mb"}
+_origin = time.perf_counter()
+_sampler = None
+_NULL_STAGE = contextlib.nullcontext()
+
+
+def rss_bytes():
+    """Current resident set size of this process (None if unavailable)."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def hwm_bytes():
+    """RSS high-water mark of this process so far (None if unavailable)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024 # Linux reports KiB
+
+
+def _mb(value):
+    return None if value is None else round(value / MB, 1)
+
+
+def enable(mode="peak", top=TOP_SITES, frames=TRACE_FRAMES, interval=RSS_INTERVAL):
+    global _enabled, _mode, _trace_allocations, _top, _sampler, _origin
+    if mode not in MODES:
+        raise ValueError(f"memtrace mode must be one of {MODES}, got {mode!r}")
+    _enabled = True
+    _mode = mode
+    _top = top
+    _origin = time.perf_counter()
+    _trace_allocations = trace_allocations = mode != "rss"
+    if trace_allocations and not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+    if _sampler is None:
+        _sampler = _RssSampler(interval)
+        _sampler.start()
+
+
+def disable():
+    global _enabled, _sampler
+    _enabled = False
+    if _sampler is not None:
+        _sampler.stopped.set()
+        _sampler = None
+    if _trace_allocations and tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def enabled():
+    return _enabled
+
+
+def report_path():
+    """Report path from SHORTS_MEMORY (a path, or 1/true for the default), else None."""
+    value = os.environ.get(MEMORY_ENV, "").strip()
+    if not value or value.lower() in ("0", "false", "no"):
+        return None
+    return DEFAULT_REPORT_PATH if value.lower() in ("1", "true", "yes") else value
+
+
+def _credit_interval():
+    """
+    Credits the tracemalloc peak since the previous stage boundary to every
+    running stage, then starts a new interval. Caller holds _lock.
+    """
+    if not _trace_allocations or not tracemalloc.is_tracing():
+        return
+    _current, peak = tracemalloc.get_traced_memory()
+    for active in _active.values():
+        active.traced_peak = max(active.traced_peak, peak)
+    tracemalloc.reset_peak()
+
+
+def _boundary(event, name):
+    traced = tracemalloc.get_traced_memory()[0] if _trace_allocations and tracemalloc.is_tracing() else None
+    row = {"t": round(time.perf_counter() - _origin, 3), "event": event, "stage": name,
+           "rss_mb": _mb(rss_bytes()), "hwm_mb": _mb(hwm_bytes()), "traced_mb": _mb(traced)}
+    _boundaries.append(row)
+    return row
+
+
+class _RssSampler(threading.Thread):
+    """Polls RSS and raises the sampled peak of every running stage."""
+
+    def __init__(self, interval):
+        super().__init__(name="memtrace-rss", daemon=True)
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            rss = rss_bytes()
+            if rss is None:
+                return
+            with _lock:
+                for active in _active.values():
+                    active.rss_peak = max(active.rss_peak, rss)
+
+
+def _short_path(filename):
+    if filename.startswith("<"):
+        return filename
+    if filename.startswith(BASE_DIR + os.sep):
+        return os.path.relpath(filename, BASE_DIR)
+    head, sep, tail = filename.rpartition("site-packages" + os.sep)
+    return tail if sep else os.path.basename(filename)
+
+
+def _frame_label(frame):
+    return f"{_short_path(frame.filename)}:{frame.lineno}"
+
+
+def _sites(stats, size_attr, count_attr, top):
+    """Groups per-traceback statistics by the innermost repo frame; largest first."""
+    sites = {}
+    for stat in stats:
+        size = getattr(stat, size_attr)
+        if size <= 0:
+            continue
+        frames = list(stat.traceback) # Oldest → most recent
+        leaf = frames[-1]
+        owner = next((f for f in reversed(frames)
+                      if f.filename.startswith(BASE_DIR + os.sep) and f.filename != __file__), leaf)
+        key = (owner.filename, owner.lineno)
+        site = sites.get(key)
+        if site is None:
+            site = sites[key] = {"file": _short_path(owner.filename), "line": owner.lineno,
+                                 "code": linecache.getline(owner.filename, owner.lineno).strip()[:120],
+                                 "via": _frame_label(leaf) if owner is not leaf else None,
+                                 "size": 0, "count": 0}
+        site["size"] += size
+        site["count"] += getattr(stat, count_attr)
+    ranked = sorted(sites.values(), key=lambda site: -site["size"])[:top]
+    for site in ranked:
+        site["size_mb"] = _mb(site.pop("size"))
+    return ranked
+
+
+class _StageMemory:
+    __slots__ = ("name", "started", "entry", "rss_peak", "traced_peak", "snapshot")
+
+    def __init__(self, name):
+        self.name = name
+        self.snapshot = None
+
+    def __enter__(self):
+        with _lock:
+            _credit_interval()
+            self.entry = _boundary("enter", self.name)
+            self.rss_peak = rss_bytes() or 0
+            self.traced_peak = 0
+            _active[id(self)] = self
+        if _mode == "stages" and tracemalloc.is_tracing():
+            self.snapshot = _snapshot()
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.started
+        sites = []
+        if self.snapshot is not None and tracemalloc.is_tracing():
+            sites = _sites(_snapshot().compare_to(self.snapshot, "traceback"), "size_diff", "count_diff", _top)
+            self.snapshot = None
+        with _lock:
+            _credit_interval()
+            _active.pop(id(self), None)
+            exit_row = _boundary("exit", self.name)
+            rss_peak = max(self.rss_peak, rss_bytes() or 0)
+            _records.append({
+                "stage": self.name,
+                "seconds": round(elapsed, 3),
+                "rss_entry_mb": self.entry["rss_mb"],
+                "rss_exit_mb": exit_row["rss_mb"],
+                "rss_peak_mb": _mb(rss_peak) if rss_peak else None,
+                "hwm_exit_mb": exit_row["hwm_mb"],
+                "traced_entry_mb": self.entry["traced_mb"],
+                "traced_exit_mb": exit_row["traced_mb"],
+                "traced_peak_mb": _mb(self.traced_peak) if exit_row["traced_mb"] is not None else None,
+                "retained_sites": sites,
+                "error": exc_type.__name__ if exc_type is not None else None,
+            })
+            traced = tracemalloc.get_traced_memory()[0] if _trace_allocations and tracemalloc.is_tracing() else 0
+            new_high = traced > _high_water["traced"] * HIGH_WATER_STEP
+            if new_high:
+                _high_water.update(traced=traced, stage=self.name, t=exit_row["t"], sites=None)
+        if new_high:
+            # Outside the lock: a snapshot takes a while and the RSS sampler must keep running
+            sites = _sites(_snapshot().statistics("traceback"), "size", "count", _top)
+            with _lock:
+                if _high_water.get("stage") == self.name:
+                    _high_water["sites"] = sites
+        return False
+
+
+def _snapshot():
+    return tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+
+
+def stage(name):
+    """Context manager recording one stage's memory (no-op when disabled)."""
+    if not _enabled:
+        return _NULL_STAGE
+    return _StageMemory(name)
+
+
+def records():
+    with _lock:
+        return list(_records)
+
+
+def write_report(path=DEFAULT_REPORT_PATH, top=12):
+    """Writes the JSON artifact and prints the stages with the highest memory peaks."""
+    with _lock:
+        _credit_interval()
+        stages = list(_records)
+        boundaries = list(_boundaries)
+        high_water = dict(_high_water) if _high_water.get("sites") else None
+    process = {"rss_mb": _mb(rss_bytes()), "hwm_mb": _mb(hwm_bytes())}
+    if _trace_allocations and tracemalloc.is_tracing():
+        process["traced_mb"] = _mb(tracemalloc.get_traced_memory()[0])
+    if high_water:
+        high_water["traced_mb"] = _mb(high_water.pop("traced"))
+
+    report = {"pid": os.getpid(), "mode": _mode, "process": process, "stages": stages,
+              "boundaries": boundaries, "high_water": high_water}
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=1)
+
+    print(f"\n🧠 Memory report written: {path} ({len(stages)} stages, process peak RSS {process['hwm_mb']} MB)")
+    if stages:
+        print(f"   {'stage':<32} {'rss peak':>9} {'Δ rss':>8} {'traced pk':>9}  {'top retained site' if _mode == 'stages' else ''}")
+    for r in sorted(stages, key=lambda r: -(r["rss_peak_mb"] or 0))[:top]:
+        delta = (r["rss_exit_mb"] or 0) - (r["rss_entry_mb"] or 0)
+        traced = f"{r['traced_peak_mb']:>9.1f}" if r["traced_peak_mb"] is not None else f"{'-':>9}"
+        site = r["retained_sites"][0] if r["retained_sites"] and r["retained_sites"][0]["size_mb"] >= 0.1 else None
+        where = f"{site['file']}:{site['line']} (+{site['size_mb']} MB)" if site else ""
+        if site and site["via"]:
+            where += f" via {site['via']}"
+        print(f"   {r['stage']:<32} {r['rss_peak_mb'] or 0:>9.1f} {delta:>+8.1f} {traced}  {where}")
+    if high_water:
+        print(f"   Largest traced memory at a stage exit: {high_water['traced_mb']} MB after {high_water['stage']}")
+        for site in high_water["sites"][:5]:
+            via = f" via {site['via']}" if site["via"] else ""
+            print(f"      {site['size_mb']:>8.1f} MB  {site['file']}:{site['line']}{via}  {site['code']}")
+    return path
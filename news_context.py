@@ -0,0 +1,154 @@
+"""
+Token-budgeted news context for the Gemini prompt.
+
+Replaces the raw summary concatenation with a bounded context:
+
+    1. html.unescape + tag strip + whitespace collapse
+    2. boilerplate sentences removed ("The post ... appeared first on", "Read more", ...)
+    3. duplicate sentences removed across all articles (including summaries
+       that only repeat the title)
+    4. each article trimmed to a per-item token budget, keeping the title and
+       preferring sentences with entities (names, numbers, tickers)
+    5. the whole context capped at `max_tokens` by shrinking the per-item budget
+
+Token counts are a fast heuristic (~4 characters per token for English),
+close enough for budgeting and day-to-day comparison without an API call.
+"""
+import html
+import re
+from urllib.parse import urlparse
+
+PER_ITEM_TOKENS = 160
+MAX_CONTEXT_TOKENS = 450
+CHARS_PER_TOKEN = 4
+MAX_LINK_CHARS = 80  # Longer links (Google News redirects) are shortened to their domain
+
+_TAG_RE = re.compile(r"<[^<]+?>")
+_SPACE_RE = re.compile(r"\s+")
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9\"'“])")
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_ENTITY_RE = re.compile(r"\b(?:[A-Z][A-Za-z0-9&]*[A-Z0-9][A-Za-z0-9&]*|[A-Z][a-z]+|\$?\d[\d.,]*%?[A-Za-z]{0,2})\b")
+_PUBLISHER_RE = re.compile(r"\s+[-|]\s+([^-|]{2,60})$")
+
+BOILERPLATE_PATTERNS = [
+    r"the post .* appeared first on",
+    r"^(read|continue reading|read more|learn more|click here|full coverage|view full coverage)\b",
+    r"\bsubscribe (to|for)\b",
+    r"\ball rights reserved\b",
+    r"\bsign up for\b.*\bnewsletter\b",
+    r"^(advertisement|sponsored)$",
+    r"\bcookies?\b.*\b(policy|consent)\b",
+]
+_BOILERPLATE_RE = re.compile("|".join(f"(?:{p})" for p in BOILERPLATE_PATTERNS), re.IGNORECASE)
+
+
+def count_tokens(text):
+    """Heuristic token count (~4 chars per token)."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def clean_text(text):
+    """Unescapes entities (twice: feeds often double-escape), strips tags, collapses whitespace."""
+    text = html.unescape(html.unescape(text or ""))
+    text = _TAG_RE.sub(" ", text).replace("\xa0", " ")
+    return _SPACE_RE.sub(" ", text).strip()
+
+
+def split_sentences(text):
+    return [s.strip() for s in _SENTENCE_RE.split(text) if s.strip()]
+
+
+def _fingerprint(sentence):
+    return frozenset(_WORD_RE.findall(sentence.lower()))
+
+
+def _is_duplicate(words, seen):
+    """True if (almost) all words of the sentence already appeared in one earlier sentence."""
+    if not words:
+        return True
+    for other in seen:
+        if len(words & other) >= 0.8 * len(words):
+            return True
+    return False
+
+
+def _entity_score(sentence):
+    return len(_ENTITY_RE.findall(sentence))
+
+
+def short_link(link):
+    if len(link) <= MAX_LINK_CHARS:
+        return link
+    parsed = urlparse(link)
+    return f"{parsed.scheme}://{parsed.netloc}" if parsed.netloc else link[:MAX_LINK_CHARS]
+
+
+def compress_entry(entry, budget, seen):
+    """
+    Returns (title, content) for one entry within `budget` tokens.
+    `seen` holds sentence fingerprints of earlier articles and is updated.
+    """
+    title = clean_text(entry.get("title", ""))
+    headline = _PUBLISHER_RE.sub("", title)
+    publisher = title[len(headline):].strip(" -|")
+    seen.append(_fingerprint(headline))
+
+    # Google News summaries are "<a>headline</a>&nbsp;<font>publisher</font> ..."
+    summary = clean_text(entry.get("summary", ""))
+    for prefix in (headline, publisher):
+        if prefix and summary.lower().startswith(prefix.lower()):
+            summary = summary[len(prefix):].lstrip(" -|")
+
+    candidates = []
+    for position, sentence in enumerate(split_sentences(summary)):
+        if _BOILERPLATE_RE.search(sentence):
+            continue
+        words = _fingerprint(sentence)
+        if _is_duplicate(words, seen):
+            continue
+        seen.append(words)
+        candidates.append((position, sentence))
+
+    # Entity-dense sentences first, then restore the original order
+    remaining = budget - count_tokens(title)
+    kept = []
+    for position, sentence in sorted(candidates, key=lambda c: (-_entity_score(c[1]), c[0])):
+        cost = count_tokens(sentence) + 1
+        if cost <= remaining:
+            kept.append((position, sentence))
+            remaining -= cost
+    if not kept and candidates and remaining > 8:
+        # A single long sentence: truncate at a word boundary rather than drop it
+        sentence = candidates[0][1][:remaining * CHARS_PER_TOKEN].rsplit(" ", 1)[0]
+        kept.append((candidates[0][0], sentence + "…"))
+    return title, " ".join(s for _, s in sorted(kept))
+
+
+def build_news_context(entries, limit=3, per_item_tokens=PER_ITEM_TOKENS, max_tokens=MAX_CONTEXT_TOKENS):
+    """
+    Returns (context_text, stats) for the top `limit` entries, in the same
+    "- Title / - Content / - Link" layout the prompt already uses.
+    """
+    entries = entries[:limit]
+    if not entries:
+        return "", {"items": 0, "raw_tokens": 0, "context_tokens": 0, "per_item_tokens": per_item_tokens}
+
+    raw_tokens = sum(count_tokens(e.get("title", "")) + count_tokens(e.get("summary", "")) + count_tokens(e.get("link", ""))
+                     for e in entries)
+    # Links and the fixed labels also count against the cap
+    overhead = sum(count_tokens(short_link(e.get("link", ""))) + 8 for e in entries)
+    budget = max(24, min(per_item_tokens, (max_tokens - overhead) // len(entries)))
+
+    seen = []
+    items = []
+    for entry in entries:
+        title, content = compress_entry(entry, budget, seen)
+        items.append(f"- Title: {title}\n- Content: {content}\n- Link: {short_link(entry.get('link', ''))}")
+    context = "\n\n".join(items)
+    stats = {
+        "items": len(items),
+        "raw_tokens": raw_tokens,
+        "context_tokens": count_tokens(context),
+        "per_item_tokens": budget,
+    }
+    return context, stats
@@ -0,0 +1,205 @@
+"""
+Concurrent multi-feed news ingestion with conditional GET caching.
+
+Each mode has a list of Google News RSS queries (the primary query from
+`get_topic_by_time` plus the extra/fallback feeds below). All of them are
+fetched in parallel; ETag / Last-Modified validators and the parsed entries
+are persisted under `.cache/news/` so the second cron run of the day gets a
+cheap 304 instead of re-downloading unchanged feeds.
+"""
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from time import mktime
+
+import tracing
+
+CACHE_DIR = os.environ.get("SHORTS_CACHE_DIR", ".cache")
+# Google News base URL (override to point at a local stand-in, see standin_server.py)
+NEWS_FEED_BASE = os.environ.get("NEWS_FEED_BASE", "https://news.google.com").rstrip("/")
+FEED_CACHE_PATH = os.path.join(CACHE_DIR, "news", "feed_cache.json")
+
+# Extra feeds per mode. Feeds marked "fallback" are fetched in parallel with
+# the primary query but only used if the primary feeds have no recent news.
+# Override with a JSON file of the same shape via NEWS_FEEDS_FILE.
+MODE_FEEDS = {
+    "Semicon": [],
+    "General_IT": [
+        {"keyword": "IT", "query": "IT+industry+news+technology+trends", "fallback": True},
+    ],
+}
+
+
+def build_feed_url(query):
+    """Google News RSS search URL for a '+'-joined query."""
+    return f"{NEWS_FEED_BASE}/rss/search?q={query}+when:1d&hl=en-US&gl=US&ceid=US:en"
+
+
+def feeds_for(target_config):
+    """Primary feed from the topic config followed by the configured extra feeds for its mode."""
+    mode_feeds = MODE_FEEDS
+    feeds_file = os.environ.get("NEWS_FEEDS_FILE")
+    if feeds_file and os.path.exists(feeds_file):
+        with open(feeds_file, "r", encoding="utf-8") as f:
+            mode_feeds = json.load(f)
+
+    feeds = [{"keyword": target_config["keyword"], "query": target_config["search_query"]}]
+    feeds += [dict(f) for f in mode_feeds.get(target_config["mode"], [])]
+    for feed in feeds:
+        feed.setdefault("url", build_feed_url(feed["query"]))
+    return feeds
+
+
+def load_cache(path=FEED_CACHE_PATH):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_cache(cache, path=FEED_CACHE_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(cache, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _entry_to_dict(entry):
+    published = None
+    if getattr(entry, "published_parsed", None):
+        published = mktime(entry.published_parsed)
+
+    # Try to find a summary or description
+    summary = ""
+    if hasattr(entry, "summary"):
+        summary = entry.summary
+    elif hasattr(entry, "description"):
+        summary = entry.description
+
+    return {
+        "title": entry.get("title", ""),
+        "link": entry.get("link", ""),
+        "summary": summary,
+        "published": published,
+    }
+
+
+def fetch_feed(url, cached=None):
+    """
+    Fetches one feed with If-None-Match / If-Modified-Since.
+    Returns (cache_record, status) where status is 'fresh', 'not_modified' or 'stale'.
+    """
+    import feedparser # Loaded on first fetch (cache-only runs never need it)
+
+    cached = cached or {}
+    started = time.perf_counter()
+    with tracing.span("feed.fetch", url=url[:80]):
+        feed = feedparser.parse(url, etag=cached.get("etag"), modified=cached.get("modified"))
+    elapsed = time.perf_counter() - started
+    status_code = getattr(feed, "status", None)
+
+    if status_code == 304 and "entries" in cached:
+        print(f"   ♻️ Not modified ({elapsed:.2f}s): {url[:80]}")
+        return dict(cached, fetched_at=time.time()), "not_modified"
+
+    if not feed.entries and cached.get("entries"):
+        # Network error or empty response: keep serving the last good copy
+        print(f"   ⚠️ Feed fetch failed ({getattr(feed, 'bozo_exception', status_code)}), using cached entries.")
+        return cached, "stale"
+
+    print(f"   📥 Fetched {len(feed.entries)} entries ({elapsed:.2f}s): {url[:80]}")
+    return {
+        "etag": getattr(feed, "etag", None),
+        "modified": getattr(feed, "modified", None),
+        "fetched_at": time.time(),
+        "entries": [_entry_to_dict(e) for e in feed.entries],
+    }, "fresh"
+
+
+def fetch_feeds(urls, cache_path=FEED_CACHE_PATH):
+    """Fetches all URLs concurrently. Returns {url: [entry, ...]} and updates the on-disk cache."""
+    urls = list(dict.fromkeys(urls))
+    if not urls:
+        return {}
+    cache = load_cache(cache_path)
+
+    with ThreadPoolExecutor(max_workers=len(urls)) as pool:
+        futures = {url: pool.submit(fetch_feed, url, cache.get(url)) for url in urls}
+        results = {url: fut.result() for url, fut in futures.items()}
+
+    for url, (record, _status) in results.items():
+        cache[url] = record
+    try:
+        save_cache(cache, cache_path)
+    except OSError as e:
+        print(f"⚠️ Could not persist feed cache: {e}")
+    return {url: record.get("entries", []) for url, (record, _status) in results.items()}
+
+
+def recent_entries(entries, days=1, now=None):
+    """Entries published within the last `days` days (entries without a date are kept)."""
+    cutoff = ((now or datetime.now()) - timedelta(days=days)).timestamp()
+    return [e for e in entries if e.get("published") is None or e["published"] >= cutoff]
+
+
+def merge_entries(entry_lists):
+    """Merges entry lists in order, dropping duplicate links."""
+    seen = set()
+    merged = []
+    for entries in entry_lists:
+        for e in entries:
+            key = e.get("link") or e.get("title")
+            if key in seen:
+                continue
+            seen.add(key)
+            merged.append(e)
+    return merged
+
+
+def select_entries(feeds, by_url, days=1):
+    """
+    Returns (keyword, entries) from already fetched feeds. The keyword switches
+    to the fallback feed's keyword only if the primary feeds are empty.
+    """
+    primary = [f for f in feeds if not f.get("fallback")]
+    fallback = [f for f in feeds if f.get("fallback")]
+
+    entries = merge_entries(recent_entries(by_url[f["url"]], days) for f in primary)
+    if entries:
+        return primary[0]["keyword"], entries
+
+    for feed in fallback:
+        entries = recent_entries(by_url[feed["url"]], days)
+        if entries:
+            print(f"⚠️ No news found for '{primary[0]['keyword']}'. Using fallback keyword '{feed['keyword']}'...")
+            return feed["keyword"], entries
+
+    return primary[0]["keyword"], []
+
+
+def ingest(target_config, days=1):
+    """
+    Fetches every feed for the topic's mode in parallel (fallback feeds included)
+    and returns (keyword, entries) with the recent, merged entries.
+    """
+    feeds = feeds_for(target_config)
+    print(f"🔍 Fetching {len(feeds)} feed(s) for mode {target_config['mode']} in parallel...")
+    by_url = fetch_feeds([f["url"] for f in feeds])
+    return select_entries(feeds, by_url, days)
+
+
+def ingest_many(target_configs, days=1):
+    """
+    One concurrent fetch for the feeds of several modes (shared URLs fetched once).
+    Returns [(keyword, entries), ...] in the order of `target_configs`.
+    """
+    feeds_by_mode = [feeds_for(config) for config in target_configs]
+    urls = [f["url"] for feeds in feeds_by_mode for f in feeds]
+    modes = ", ".join(config["mode"] for config in target_configs)
+    print(f"🔍 Fetching {len(set(urls))} feed(s) for modes {modes} in parallel...")
+    by_url = fetch_feeds(urls)
+    return [select_entries(feeds, by_url, days) for feeds in feeds_by_mode]
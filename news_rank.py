@@ -0,0 +1,118 @@
+"""
+Relevance ranking of feed candidates before the LLM call.
+
+Instead of taking the first N entries in feed order, every candidate is
+scored at once with a vectorized BM25 over title + summary against a
+per-mode keyword profile (optionally multiplied by a recency decay), and
+only the top-k go into the Gemini prompt.
+"""
+import html
+import re
+import time
+
+import numpy as np
+
+# Per-mode keyword profiles: term -> weight.
+# Semicon mirrors the [TONE & STYLE] keywords in generate_english_shorts_script.
+MODE_PROFILES = {
+    "Semicon": {
+        "semiconductor": 1.5, "chip": 1.2, "wafer": 1.5, "capex": 1.5, "yield": 1.5, "hbm": 1.5,
+        "gpu": 1.2, "valuation": 1.0, "foundry": 1.3, "fab": 1.2, "tsmc": 1.3, "samsung": 1.0,
+        "nvidia": 1.0, "intel": 1.0, "micron": 1.0, "hynix": 1.0, "asml": 1.2, "lithography": 1.2,
+        "euv": 1.2, "dram": 1.2, "nand": 1.2, "memory": 0.8, "node": 0.8, "nm": 0.8,
+        "packaging": 1.0, "supply": 0.6, "export": 0.6, "stock": 0.6, "earning": 0.8, "revenue": 0.6,
+    },
+    "General_IT": {
+        "iphone": 1.3, "apple": 1.0, "android": 1.0, "smartphone": 1.2, "phone": 1.0, "ai": 1.0,
+        "chatgpt": 1.2, "openai": 1.0, "gemini": 1.0, "google": 0.8, "tesla": 1.0, "gadget": 1.3,
+        "app": 0.8, "feature": 1.2, "launch": 1.0, "update": 0.8, "release": 0.8, "laptop": 1.0,
+        "wearable": 1.2, "watch": 0.8, "headset": 1.0, "robot": 1.0, "meta": 0.8, "microsoft": 0.8,
+        "privacy": 1.0, "ev": 0.8, "user": 0.6, "price": 0.6,
+    },
+}
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+TITLE_WEIGHT = 2  # Title tokens count this many times
+
+_TAG_RE = re.compile(r"<[^<]+?>")
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    """Lowercase alphanumeric tokens with crude plural folding (chips -> chip)."""
+    tokens = []
+    for tok in _TOKEN_RE.findall(text.lower()):
+        if len(tok) > 3 and tok.endswith("s") and not tok.endswith("ss"):
+            tok = tok[:-1]
+        tokens.append(tok)
+    return tokens
+
+
+def _entry_tokens(entry):
+    title = tokenize(html.unescape(entry.get("title", "")))
+    summary = tokenize(html.unescape(_TAG_RE.sub(" ", entry.get("summary", ""))))
+    return title * TITLE_WEIGHT + summary
+
+
+def score_entries(entries, mode, half_life_hours=None, recency_weight=0.5, now=None):
+    """
+    Returns a numpy array with one BM25 (x recency) score per entry.
+
+    half_life_hours: if set, score *= (1 - recency_weight) + recency_weight * 0.5 ** (age / half_life)
+    """
+    profile = MODE_PROFILES.get(mode) or MODE_PROFILES["General_IT"]
+    terms = list(profile)
+    term_index = {t: i for i, t in enumerate(terms)}
+    weights = np.array([profile[t] for t in terms], dtype=np.float64)
+
+    n_docs = len(entries)
+    if n_docs == 0:
+        return np.zeros(0)
+
+    # Sparse doc-term counts restricted to the profile vocabulary
+    tf = np.zeros((n_docs, len(terms)), dtype=np.float64)
+    doc_len = np.zeros(n_docs, dtype=np.float64)
+    rows, cols = [], []
+    for d, entry in enumerate(entries):
+        tokens = _entry_tokens(entry)
+        doc_len[d] = len(tokens)
+        for tok in tokens:
+            j = term_index.get(tok)
+            if j is not None:
+                rows.append(d)
+                cols.append(j)
+    if rows:
+        np.add.at(tf, (np.array(rows), np.array(cols)), 1.0)
+
+    # BM25 with the always-positive idf variant (small candidate pools)
+    df = np.count_nonzero(tf, axis=0)
+    idf = np.log1p((n_docs - df + 0.5) / (df + 0.5))
+    avgdl = max(doc_len.mean(), 1.0)
+    norm = K1 * (1 - B + B * doc_len / avgdl)
+    scores = ((tf * (K1 + 1)) / (tf + norm[:, None])) @ (idf * weights)
+
+    if half_life_hours:
+        now = now or time.time()
+        published = np.array([e.get("published") or now for e in entries], dtype=np.float64)
+        age_hours = np.clip((now - published) / 3600.0, 0, None)
+        decay = np.power(0.5, age_hours / half_life_hours)
+        scores *= (1 - recency_weight) + recency_weight * decay
+
+    return scores
+
+
+def rank_entries(entries, mode, top_k=3, half_life_hours=12, recency_weight=0.5):
+    """Top-k entries by relevance to the mode profile (stable for ties, i.e. feed order)."""
+    if not entries:
+        return []
+    started = time.perf_counter()
+    scores = score_entries(entries, mode, half_life_hours, recency_weight)
+    order = np.argsort(-scores, kind="stable")[:top_k]
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    print(f"📊 Ranked {len(entries)} candidates for {mode} in {elapsed_ms:.1f}ms")
+    for rank, i in enumerate(order, 1):
+        print(f"   {rank}. ({scores[i]:.2f}) {entries[i].get('title', '')[:70]}")
+    return [entries[i] for i in order]
+
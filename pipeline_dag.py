@@ -0,0 +1,201 @@
+"""
+Small dependency-aware stage executor.
+
+Stages declare their inputs (names of other stages); a stage starts as soon
+as all of its inputs are done and receives their results as positional
+arguments, in the declared order. Independent stages run concurrently on a
+thread pool; stages returning a coroutine run it in their own event loop on
+that thread.
+
+    dag = Pipeline("daily")
+    dag.add("news", fetch_news)
+    dag.add("script", make_script, inputs=["news"])
+    dag.add("video", render, inputs=["script"])
+    results = dag.run()
+    dag.report()           # per-stage timings + critical path
+
+A stage that raises fails and its dependents are skipped; raising `Skip`
+marks the stage (and its dependents) as skipped without counting as an error.
+Each stage is also recorded as a tracing span (category = pipeline name) and,
+when enabled, profiled (profiling.py) and memory-instrumented (memtrace.py)
+as "<pipeline>.<stage>".
+"""
+import asyncio
+import inspect
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import memtrace
+import profiling
+import tracing
+
+
+class Skip(Exception):
+    """Raised by a stage that has nothing to do (its dependents are skipped too)."""
+
+
+class Stage:
+    def __init__(self, name, fn, inputs=()):
+        self.name = name
+        self.fn = fn
+        self.inputs = list(inputs)
+        self.status = "pending"   # pending / running / done / failed / skipped
+        self.result = None
+        self.error = None
+        self.started = None
+        self.finished = None
+
+    @property
+    def duration(self):
+        if self.started is None or self.finished is None:
+            return 0.0
+        return self.finished - self.started
+
+    def call(self, args):
+        result = self.fn(*args)
+        if inspect.iscoroutine(result):  # async def stage (or a lambda returning a coroutine)
+            result = asyncio.run(result)
+        return result
+
+
+class Pipeline:
+    def __init__(self, name="pipeline", max_workers=None):
+        self.name = name
+        self.max_workers = max_workers
+        self.stages = {}
+        self.started = None
+        self.finished = None
+
+    def add(self, name, fn, inputs=()):
+        if name in self.stages:
+            raise ValueError(f"Duplicate stage: {name}")
+        self.stages[name] = Stage(name, fn, inputs)
+        return name
+
+    def stage(self, name=None, inputs=()):
+        """Decorator form of `add`."""
+        def register(fn):
+            self.add(name or fn.__name__, fn, inputs)
+            return fn
+        return register
+
+    def _validate(self):
+        for stage in self.stages.values():
+            for dep in stage.inputs:
+                if dep not in self.stages:
+                    raise ValueError(f"Stage '{stage.name}' depends on unknown stage '{dep}'")
+        # Kahn's algorithm: every stage must be reachable without a cycle
+        remaining = {name: len(stage.inputs) for name, stage in self.stages.items()}
+        ready = [name for name, count in remaining.items() if count == 0]
+        seen = 0
+        while ready:
+            name = ready.pop()
+            seen += 1
+            for other in self.stages.values():
+                if name in other.inputs:
+                    remaining[other.name] -= 1
+                    if remaining[other.name] == 0:
+                        ready.append(other.name)
+        if seen != len(self.stages):
+            raise ValueError(f"Pipeline '{self.name}' has a dependency cycle")
+
+    def _run_stage(self, stage):
+        stage.started = time.perf_counter()
+        try:
+            qualified = f"{self.name}.{stage.name}"
+            with tracing.span(stage.name, cat=self.name), profiling.stage(qualified), memtrace.stage(qualified):
+                stage.result = stage.call([self.stages[dep].result for dep in stage.inputs])
+            stage.status = "done"
+        except Skip as e:
+            stage.status = "skipped"
+            stage.error = e
+            print(f"⏭️ [{self.name}] {stage.name} skipped: {e}")
+        except Exception as e:
+            stage.status = "failed"
+            stage.error = e
+            print(f"❌ [{self.name}] {stage.name} failed: {e}")
+        finally:
+            stage.finished = time.perf_counter()
+        return stage
+
+    def run(self):
+        """Runs every stage. Returns {stage name: result} (None for failed/skipped stages)."""
+        self._validate()
+        dependents = {name: [] for name in self.stages}
+        waiting = {}
+        for stage in self.stages.values():
+            waiting[stage.name] = set(stage.inputs)
+            for dep in stage.inputs:
+                dependents[dep].append(stage.name)
+
+        self.started = time.perf_counter()
+        workers = self.max_workers or max(1, len(self.stages))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=self.name) as pool:
+            running = {}
+
+            def submit_ready():
+                for name in [n for n, deps in waiting.items() if not deps]:
+                    del waiting[name]
+                    stage = self.stages[name]
+                    stage.status = "running"
+                    running[pool.submit(self._run_stage, stage)] = name
+
+            def skip_dependents(name, reason):
+                for child in dependents[name]:
+                    if child in waiting:
+                        del waiting[child]
+                        self.stages[child].status = "skipped"
+                        self.stages[child].error = Skip(reason)
+                        skip_dependents(child, reason)
+
+            submit_ready()
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    stage = self.stages[name]
+                    if stage.status == "done":
+                        for child in dependents[name]:
+                            if child in waiting:
+                                waiting[child].discard(name)
+                    else:
+                        skip_dependents(name, f"upstream '{name}' {stage.status}")
+                submit_ready()
+
+        self.finished = time.perf_counter()
+        return {name: stage.result for name, stage in self.stages.items()}
+
+    # ---------- reporting ----------
+    def critical_path(self):
+        """
+        Chain of stages that determined the total wall time: starting from the
+        stage that finished last, repeatedly step to the input that finished last.
+        """
+        timed = [s for s in self.stages.values() if s.finished is not None]
+        if not timed:
+            return []
+        stage = max(timed, key=lambda s: s.finished)
+        path = [stage]
+        while True:
+            inputs = [self.stages[dep] for dep in stage.inputs if self.stages[dep].finished is not None]
+            if not inputs:
+                break
+            stage = max(inputs, key=lambda s: s.finished)
+            path.append(stage)
+        return list(reversed(path))
+
+    def report(self, top=None):
+        """Prints per-stage timings (offset from pipeline start) and the critical path."""
+        if self.started is None:
+            return
+        total = (self.finished or time.perf_counter()) - self.started
+        stages = sorted((s for s in self.stages.values() if s.started is not None), key=lambda s: s.started)
+        if top:
+            stages = sorted(stages, key=lambda s: -s.duration)[:top]
+        print(f"\n⏱️ [{self.name}] {len(self.stages)} stages in {total:.1f}s")
+        for s in stages:
+            print(f"   {s.name:<32} {s.status:<8} start {s.started - self.started:6.1f}s  took {s.duration:6.1f}s")
+        path = self.critical_path()
+        if path:
+            chain = " → ".join(f"{s.name} ({s.duration:.1f}s)" for s in path)
+            print(f"   Critical path: {chain}")
@@ -0,0 +1,198 @@
+"""
+Per-stage profiling (cProfile + stack sampling).
+
+    import profiling
+    profiling.enable()                      # or SHORTS_PROFILE=1 / --profile
+    with profiling.stage("render.encode"):
+        ...
+    profiling.write_all("temp_assets/profiles")
+
+For every stage this writes
+    <stage>.pstats      cProfile data (python -m pstats, snakeviz, ...)
+    <stage>.collapsed   sampled stacks, one "frame;frame;frame count" line per
+                        stack (flamegraph.pl / speedscope / inferno compatible)
+
+Pipeline stages (pipeline_dag.py) are profiled automatically, named
+"<pipeline>.<stage>". cProfile is per-thread, so each stage enables its own
+profiler in the thread it runs on; a single sampler thread snapshots the
+stacks of all threads currently inside a stage (this is what shows the frame
+generation loop inside write_videofile). Results stay in memory until
+write_all(), because the render work dir is wiped when a run starts.
+Stages with the same name (batch runs) are merged.
+"""
+import cProfile
+import contextlib
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+
+PROFILE_ENV = "SHORTS_PROFILE"
+DEFAULT_PROFILE_DIR = os.path.join("temp_assets", "profiles")
+SAMPLE_INTERVAL = 0.005 # 200 Hz
+MAX_STACK_DEPTH = 96
+
+_enabled = False
+_lock = threading.Lock()
+_profiles = defaultdict(list)         # stage -> [cProfile.Profile]
+_samples = defaultdict(Counter)       # stage -> {collapsed stack: count}
+_durations = defaultdict(float)       # stage -> wall seconds
+_active = {}                          # thread id -> stage name
+_local = threading.local()
+_sampler = None
+_NULL_STAGE = contextlib.nullcontext()
+
+
+def enable(interval=SAMPLE_INTERVAL):
+    global _enabled, _sampler
+    _enabled = True
+    if _sampler is None:
+        _sampler = _Sampler(interval)
+        _sampler.start()
+
+
+def disable():
+    global _enabled, _sampler
+    _enabled = False
+    if _sampler is not None:
+        _sampler.stopped.set()
+        _sampler = None
+
+
+def enabled():
+    return _enabled
+
+
+def profile_dir():
+    """Output dir from SHORTS_PROFILE (a dir, or 1/true for the default), else None."""
+    value = os.environ.get(PROFILE_ENV, "").strip()
+    if not value or value.lower() in ("0", "false", "no"):
+        return None
+    return DEFAULT_PROFILE_DIR if value.lower() in ("1", "true", "yes") else value
+
+
+def _frame_name(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _collapse(frame):
+    names = []
+    while frame is not None and len(names) < MAX_STACK_DEPTH:
+        names.append(_frame_name(frame.f_code))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class _Sampler(threading.Thread):
+    """Snapshots the stacks of every thread that is inside a stage."""
+
+    def __init__(self, interval):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            with _lock:
+                active = dict(_active)
+            if not active:
+                continue
+            frames = sys._current_frames()
+            for tid, stage_name in active.items():
+                frame = frames.get(tid)
+                if frame is not None:
+                    stack = _collapse(frame)
+                    with _lock:
+                        _samples[stage_name][stack] += 1
+
+
+class _StageProfile:
+    __slots__ = ("name", "profile", "started", "tid", "outer")
+
+    def __init__(self, name):
+        self.name = name
+        self.profile = None
+
+    def __enter__(self):
+        self.tid = threading.get_ident()
+        # A stage nested in another one on the same thread is already covered by the outer profiler
+        self.outer = getattr(_local, "stage", None)
+        if self.outer is None:
+            self.profile = cProfile.Profile()
+            try:
+                self.profile.enable()
+            except ValueError: # Another profiler is active (e.g. run under python -m cProfile)
+                self.profile = None
+        _local.stage = self.name
+        with _lock:
+            _active[self.tid] = self.name
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.started
+        if self.profile is not None:
+            self.profile.disable()
+        _local.stage = self.outer
+        with _lock:
+            if self.outer is None:
+                _active.pop(self.tid, None)
+            else:
+                _active[self.tid] = self.outer
+            if self.profile is not None:
+                _profiles[self.name].append(self.profile)
+            _durations[self.name] += elapsed
+        return False
+
+
+def stage(name):
+    """Context manager profiling one stage (no-op when profiling is disabled)."""
+    if not _enabled:
+        return _NULL_STAGE
+    return _StageProfile(name)
+
+
+def _safe_name(name):
+    return "".join(c if c.isalnum() or c in "._-" else "_" for c in name)
+
+
+def write_all(out_dir=DEFAULT_PROFILE_DIR, top=8):
+    """Writes <stage>.pstats and <stage>.collapsed files; prints the slowest stages."""
+    with _lock:
+        profiles = {name: list(items) for name, items in _profiles.items()}
+        samples = {name: Counter(counts) for name, counts in _samples.items()}
+        durations = dict(_durations)
+    if not durations:
+        return []
+    os.makedirs(out_dir, exist_ok=True)
+
+    written = []
+    for name in durations:
+        base = os.path.join(out_dir, _safe_name(name))
+        if profiles.get(name):
+            stats = pstats.Stats(profiles[name][0])
+            for extra in profiles[name][1:]:
+                stats.add(extra)
+            stats.dump_stats(base + ".pstats")
+            written.append(base + ".pstats")
+        if samples.get(name):
+            with open(base + ".collapsed", "w", encoding="utf-8") as f:
+                for stack, count in samples[name].most_common():
+                    f.write(f"{stack} {count}\n")
+            written.append(base + ".collapsed")
+
+    print(f"\n🔬 Profiles written to {out_dir} ({len(durations)} stages)")
+    for name, seconds in sorted(durations.items(), key=lambda kv: -kv[1])[:top]:
+        hot = samples.get(name)
+        leaf = ""
+        if hot:
+            # Most frequently sampled leaf function = where the stage spends its time
+            leaves = Counter()
+            for stack, count in hot.items():
+                leaves[stack.rsplit(";", 1)[-1]] += count
+            frame, count = leaves.most_common(1)[0]
+            leaf = f"  hottest: {frame} ({count * 100 // sum(leaves.values())}%)"
+        print(f"   {name:<32} {seconds:7.2f}s{leaf}")
+    return written
@@ -0,0 +1,295 @@
+"""
+Local render queue + long-lived render worker.
+
+A one-shot render pays interpreter start-up, the moviepy/PIL/edge_tts
+imports, font loading and header/SFX preparation before any real work.
+`work` pays them once (make_video.warm_up) and then renders queued jobs
+back to back, so the per-video cost is only that video's assets,
+composition and encode.
+
+The queue is a SQLite table (.cache/render_queue.db) with at-least-once
+semantics: a worker claims a job under a lease it keeps renewing while
+rendering; if the worker dies the lease expires and another worker (or
+the restarted one) claims the job again. A job that keeps failing is
+marked failed after MAX_ATTEMPTS claims.
+
+Each claim renders into its own work dir and a temporary output next to
+the real one. The output is moved into place only by the worker that still
+holds the job when it completes, so a worker that lost its lease (and
+keeps rendering) never overwrites or deletes the new owner's files.
+
+Usage:
+    python render_daemon.py submit scripts/260210_semicon_script.json [--out renders/x.mp4] [--topic semicon]
+    python render_daemon.py work [--once] [--poll 2] [--lease 600]
+    python render_daemon.py status
+"""
+import argparse
+import json
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+
+from local_env import load_local_env
+
+CACHE_DIR = os.environ.get("SHORTS_CACHE_DIR", ".cache")
+QUEUE_PATH = os.path.join(CACHE_DIR, "render_queue.db")
+LEASE_SECONDS = 600 # Renewed every LEASE_SECONDS / 3 while the job renders
+POLL_SECONDS = 2.0
+MAX_ATTEMPTS = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    script_path TEXT NOT NULL,
+    output_file TEXT NOT NULL,
+    topic TEXT,
+    status TEXT NOT NULL DEFAULT 'queued',  -- queued / running / done / failed
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    lease_until REAL,
+    error TEXT,
+    seconds REAL,
+    created_at REAL NOT NULL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id);
+"""
+
+
+class RenderQueue:
+    def __init__(self, path=QUEUE_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Autocommit; claims use an explicit BEGIN IMMEDIATE so two workers never take the same job
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self._lock = threading.Lock() # Heartbeat thread shares the connection
+
+    def close(self):
+        self.conn.close()
+
+    def submit(self, script_path, output_file, topic=None):
+        with self._lock:
+            cursor = self.conn.execute(
+                "INSERT INTO jobs (script_path, output_file, topic, created_at) VALUES (?, ?, ?, ?)",
+                (script_path, output_file, topic, time.time()))
+            return cursor.lastrowid
+
+    def claim(self, worker, lease=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS):
+        """Next queued (or lease-expired) job as a dict, or None."""
+        now = time.time()
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Jobs whose worker died after its last allowed attempt are given up
+                self.conn.execute(
+                    "UPDATE jobs SET status = 'failed', error = COALESCE(error, 'lease expired'), finished_at = ? "
+                    "WHERE status = 'running' AND lease_until < ? AND attempts >= ?",
+                    (now, now, max_attempts))
+                row = self.conn.execute(
+                    "SELECT id, script_path, output_file, topic, attempts FROM jobs "
+                    "WHERE status = 'queued' OR (status = 'running' AND lease_until < ?) ORDER BY id LIMIT 1",
+                    (now,)).fetchone()
+                if row is None:
+                    self.conn.execute("COMMIT")
+                    return None
+                self.conn.execute(
+                    "UPDATE jobs SET status = 'running', worker = ?, lease_until = ?, attempts = attempts + 1 WHERE id = ?",
+                    (worker, now + lease, row[0]))
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        job_id, script_path, output_file, topic, attempts = row
+        return {"id": job_id, "script_path": script_path, "output_file": output_file,
+                "topic": topic, "attempt": attempts + 1}
+
+    def heartbeat(self, job_id, worker, lease=LEASE_SECONDS):
+        """Extends the lease. False if the job was taken over by another worker."""
+        with self._lock:
+            cursor = self.conn.execute(
+                "UPDATE jobs SET lease_until = ? WHERE id = ? AND worker = ? AND status = 'running'",
+                (time.time() + lease, job_id, worker))
+            return cursor.rowcount == 1
+
+    def complete(self, job_id, worker, seconds, publish=None):
+        """
+        Marks the job done if `worker` still holds it, calling `publish()` (moving
+        the output into place) in the same transaction. False if the job was taken over.
+        """
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                cursor = self.conn.execute(
+                    "UPDATE jobs SET status = 'done', error = NULL, seconds = ?, finished_at = ? "
+                    "WHERE id = ? AND worker = ? AND status = 'running'",
+                    (seconds, time.time(), job_id, worker))
+                if cursor.rowcount != 1:
+                    self.conn.execute("ROLLBACK")
+                    return False
+                if publish is not None:
+                    publish()
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return True
+
+    def fail(self, job_id, worker, error, max_attempts=MAX_ATTEMPTS):
+        """Re-queues the job, or marks it failed once it used up its attempts. False if the job was taken over."""
+        with self._lock:
+            cursor = self.conn.execute(
+                "UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END, "
+                "error = ?, lease_until = NULL, finished_at = ? WHERE id = ? AND worker = ? AND status = 'running'",
+                (max_attempts, error, time.time(), job_id, worker))
+            return cursor.rowcount == 1
+
+    def counts(self):
+        with self._lock:
+            return dict(self.conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+
+    def recent(self, limit=10):
+        with self._lock:
+            return self.conn.execute(
+                "SELECT id, status, attempts, seconds, script_path, error FROM jobs ORDER BY id DESC LIMIT ?",
+                (limit,)).fetchall()
+
+
+class _Heartbeat(threading.Thread):
+    """Keeps renewing a job's lease while it renders."""
+
+    def __init__(self, queue, job_id, worker, lease):
+        super().__init__(daemon=True)
+        self.queue, self.job_id, self.worker, self.lease = queue, job_id, worker, lease
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.lease / 3):
+            if not self.queue.heartbeat(self.job_id, self.worker, self.lease):
+                print(f"⚠️ Lost lease on job {self.job_id}: its output will be discarded")
+                return
+
+
+def claim_paths(job):
+    """(work dir name, temporary output file) private to this claim of the job."""
+    tag = f"job{job['id']}-{job['attempt']}"
+    base, ext = os.path.splitext(job["output_file"])
+    return tag, f"{base}.{tag}.partial{ext or '.mp4'}"
+
+
+def _output_pairs(temp_file, output_file):
+    """(temporary, final) paths of the main output and its extra renditions."""
+    from make_video import RenderConfig
+    return [(temp_file, output_file)] + [(r.path_for(temp_file), r.path_for(output_file))
+                                         for r in RenderConfig.from_env().renditions]
+
+
+def publish_output(temp_file, output_file):
+    for temp, final in _output_pairs(temp_file, output_file):
+        if os.path.exists(temp):
+            os.replace(temp, final)
+
+
+def discard_output(temp_file, output_file):
+    for temp, _final in _output_pairs(temp_file, output_file):
+        if os.path.exists(temp):
+            os.remove(temp)
+
+
+def work(queue, once=False, poll=POLL_SECONDS, lease=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS):
+    """Warms up once, then renders jobs until interrupted (or until the queue is empty with once=True)."""
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    started = time.time()
+    import make_video
+    from backfill_render import render_one
+    make_video.warm_up()
+    print(f"🔥 Worker {worker} warm in {time.time() - started:.1f}s, waiting for jobs...")
+
+    done = failed = 0
+    try:
+        while True:
+            job = queue.claim(worker, lease, max_attempts)
+            if job is None:
+                if once:
+                    break
+                time.sleep(poll)
+                continue
+
+            print(f"\n🎬 Job {job['id']} (attempt {job['attempt']}): {job['script_path']} → {job['output_file']}")
+            work_name, temp_file = claim_paths(job)
+            heartbeat = _Heartbeat(queue, job["id"], worker, lease)
+            heartbeat.start()
+            try:
+                _video_path, seconds = render_one(job["script_path"], temp_file, job["topic"], work_name=work_name)
+            except Exception as e:
+                discard_output(temp_file, job["output_file"])
+                failed += 1
+                print(f"❌ Job {job['id']} failed: {e}")
+                if not queue.fail(job["id"], worker, f"{type(e).__name__}: {e}", max_attempts):
+                    print(f"⚠️ Job {job['id']} was taken over by another worker: failure not recorded")
+            else:
+                if queue.complete(job["id"], worker, round(seconds, 1),
+                                  publish=lambda: publish_output(temp_file, job["output_file"])):
+                    done += 1
+                    print(f"✅ Job {job['id']} done in {seconds:.1f}s")
+                else:
+                    discard_output(temp_file, job["output_file"])
+                    print(f"⚠️ Job {job['id']} was taken over by another worker: discarded this render ({seconds:.1f}s)")
+            finally:
+                heartbeat.stopped.set()
+    except KeyboardInterrupt:
+        # The claimed job (if any) stays 'running' until its lease expires, then gets picked up again
+        print("\n🛑 Worker stopped.")
+    print(f"📊 Worker {worker}: {done} done, {failed} failed in {time.time() - started:.0f}s")
+
+
+def main():
+    if sys.platform.startswith('win'):
+        sys.stdout.reconfigure(encoding='utf-8')
+    parser = argparse.ArgumentParser(description="Local render queue and warm render worker.")
+    parser.add_argument("--db", default=QUEUE_PATH, help="queue database")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    submit_parser = sub.add_parser("submit", help="queue script(s) for rendering")
+    submit_parser.add_argument("scripts", nargs="+")
+    submit_parser.add_argument("--out", help="output file (single script) or directory (default: renders/)")
+    submit_parser.add_argument("--topic", help="topic keyword (default: from the script file name)")
+
+    work_parser = sub.add_parser("work", help="run a warm worker")
+    work_parser.add_argument("--once", action="store_true", help="exit when the queue is empty")
+    work_parser.add_argument("--poll", type=float, default=POLL_SECONDS)
+    work_parser.add_argument("--lease", type=float, default=LEASE_SECONDS)
+    work_parser.add_argument("--max-attempts", type=int, default=MAX_ATTEMPTS)
+
+    sub.add_parser("status", help="show queue counts and recent jobs")
+    args = parser.parse_args()
+    load_local_env() # Provider keys for make_video (imported by `work`)
+
+    queue = RenderQueue(args.db)
+    try:
+        if args.command == "submit":
+            for script_path in args.scripts:
+                name = os.path.splitext(os.path.basename(script_path))[0]
+                if args.out and args.out.endswith(".mp4") and len(args.scripts) == 1:
+                    output_file = args.out
+                else:
+                    output_file = os.path.join(args.out or "renders", f"{name}.mp4")
+                os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
+                job_id = queue.submit(script_path, output_file, args.topic)
+                print(f"📥 Queued job {job_id}: {script_path} → {output_file}")
+        elif args.command == "work":
+            work(queue, args.once, args.poll, args.lease, args.max_attempts)
+        else:
+            print(json.dumps(queue.counts()))
+            for job_id, status, attempts, seconds, script_path, error in queue.recent():
+                took = f"{seconds:.0f}s" if seconds else "-"
+                print(f"   #{job_id:<5} {status:<8} x{attempts} {took:>6}  {script_path}" + (f"  ({error})" if error else ""))
+    finally:
+        queue.close()
+
+
+if __name__ == "__main__":
+    main()
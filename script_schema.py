@@ -0,0 +1,290 @@
+"""
+Typed schema, validation and targeted repair for LLM script output.
+
+    script, issues = parse_script(response_text)
+
+1. `repair_json_text` fixes what can be fixed locally: code fences, prose
+   around the object, trailing commas and truncated output (cut back to the
+   last complete object and close the open containers).
+2. `repair_script` fills fixable gaps (missing image_prompt / camera_effect /
+   title / mood_color) and returns the issues it could not fix;
+   `repair_segment` does the segment part for one streamed segment.
+3. `repair_with_llm` re-prompts only for the failing portion (hook_plan,
+   thumbnail_plan or the missing segments), with bounded retries.
+"""
+import json
+import re
+from typing import TypedDict
+
+
+class HookPlan(TypedDict, total=False):
+    overlay_text: str
+    narration: str
+    image_description: str
+    mood_color: str
+
+
+class ThumbnailPlan(TypedDict, total=False):
+    thumbnail_text: str
+    image_description: str
+    reasoning: str
+
+
+class Segment(TypedDict, total=False):
+    text: str
+    image_prompt: str
+    camera_effect: str
+    keyword: str
+
+
+class Script(TypedDict, total=False):
+    hook_plan: HookPlan
+    thumbnail_plan: ThumbnailPlan
+    title: str
+    segments: list
+
+
+CAMERA_EFFECTS = ("zoom_in", "zoom_out", "pan_right", "pan_left", "static")
+MOOD_COLORS = ("red", "neon_green", "yellow")
+MIN_SEGMENTS = 3          # Fewer body segments than this is worth a re-prompt
+MAX_REPAIR_ATTEMPTS = 2   # Re-prompts per failing portion
+
+_FENCE_RE = re.compile(r"```(?:json)?\s*|\s*```")
+_TRAILING_COMMA_RE = re.compile(r",(\s*[}\]])")
+
+
+class Issue:
+    def __init__(self, path, message, portion=None):
+        self.path = path          # e.g. "segments[2].image_prompt"
+        self.message = message
+        self.portion = portion    # Part to re-prompt for ("hook_plan", "thumbnail_plan", "segments") or None
+
+    def __repr__(self):
+        return f"Issue({self.path}: {self.message})"
+
+
+# ==========================================
+# JSON text repair
+# ==========================================
+def _scan(text):
+    """
+    Single pass over JSON text. Returns the list of cut points (index just after
+    a closed object/array) with the container stack open at that point.
+    """
+    cuts = []
+    stack = []
+    in_string = False
+    escape = False
+    for i, c in enumerate(text):
+        if in_string:
+            if escape:
+                escape = False
+            elif c == "\\":
+                escape = True
+            elif c == '"':
+                in_string = False
+            continue
+        if c == '"':
+            in_string = True
+        elif c in "{[":
+            stack.append(c)
+        elif c in "}]":
+            if stack:
+                stack.pop()
+            cuts.append((i + 1, "".join(stack)))
+    return cuts, "".join(stack), in_string
+
+
+def _close(text, stack):
+    text = text.rstrip().rstrip(",")
+    text = _TRAILING_COMMA_RE.sub(r"\1", text)
+    return text + "".join("}" if c == "{" else "]" for c in reversed(stack))
+
+
+def repair_json_text(text):
+    """Best-effort local repair. Returns (obj, repaired: bool) or (None, False)."""
+    if not text:
+        return None, False
+    text = _FENCE_RE.sub("", text).strip()
+    start = text.find("{")
+    if start < 0:
+        return None, False
+    text = text[start:]
+
+    try:
+        return json.loads(text), False
+    except ValueError:
+        pass
+
+    # Trailing commas / prose after the closing brace
+    candidate = _TRAILING_COMMA_RE.sub(r"\1", text)
+    cuts, stack, _in_string = _scan(candidate)
+    for end, open_stack in reversed(cuts):
+        if not open_stack:
+            try:
+                return json.loads(candidate[:end]), True
+            except ValueError:
+                break
+
+    # Truncated output: cut back to the last complete object/array and close the rest
+    for end, open_stack in reversed(cuts[-200:]):
+        try:
+            return json.loads(_close(candidate[:end], open_stack)), True
+        except ValueError:
+            continue
+    return None, False
+
+
+# ==========================================
+# Validation / local repair
+# ==========================================
+def _is_text(value):
+    return isinstance(value, str) and value.strip() != ""
+
+
+def validate_script(data):
+    """Returns a list of Issues (empty means the script is fully valid)."""
+    issues = []
+    if not isinstance(data, dict):
+        return [Issue("$", "script is not a JSON object", "script")]
+
+    hook = data.get("hook_plan")
+    if not isinstance(hook, dict):
+        issues.append(Issue("hook_plan", "missing", "hook_plan"))
+    else:
+        for field in ("overlay_text", "narration", "image_description"):
+            if not _is_text(hook.get(field)):
+                issues.append(Issue(f"hook_plan.{field}", "missing", "hook_plan"))
+        if hook.get("mood_color") not in MOOD_COLORS:
+            issues.append(Issue("hook_plan.mood_color", f"not one of {MOOD_COLORS}"))
+
+    thumb = data.get("thumbnail_plan")
+    if not isinstance(thumb, dict):
+        issues.append(Issue("thumbnail_plan", "missing", "thumbnail_plan"))
+    else:
+        for field in ("thumbnail_text", "image_description"):
+            if not _is_text(thumb.get(field)):
+                issues.append(Issue(f"thumbnail_plan.{field}", "missing", "thumbnail_plan"))
+
+    if not _is_text(data.get("title")):
+        issues.append(Issue("title", "missing"))
+
+    segments = data.get("segments")
+    if not isinstance(segments, list):
+        issues.append(Issue("segments", "missing", "segments"))
+        return issues
+    body = [s for s in segments if isinstance(s, dict) and _is_text(s.get("text"))]
+    if len(body) < MIN_SEGMENTS:
+        issues.append(Issue("segments", f"only {len(body)} usable segments (< {MIN_SEGMENTS})", "segments"))
+    for i, seg in enumerate(segments):
+        if not isinstance(seg, dict) or not _is_text(seg.get("text")):
+            issues.append(Issue(f"segments[{i}].text", "missing"))
+            continue
+        if not _is_text(seg.get("image_prompt")):
+            issues.append(Issue(f"segments[{i}].image_prompt", "missing"))
+        if seg.get("camera_effect") not in CAMERA_EFFECTS:
+            issues.append(Issue(f"segments[{i}].camera_effect", f"{seg.get('camera_effect')!r} not in {CAMERA_EFFECTS}"))
+    return issues
+
+
+def repair_segment(seg):
+    """
+    Fills a segment's image_prompt / camera_effect in place. Returns the
+    segment, or None when it has no text. Streamed segments go through this
+    before they are prefetched, so the prefetched image request matches the
+    one the renderer makes from the repaired script.
+    """
+    if not isinstance(seg, dict) or not _is_text(seg.get("text")):
+        return None
+    if not _is_text(seg.get("image_prompt")):
+        seg["image_prompt"] = seg.get("keyword") or seg["text"]
+    effect = str(seg.get("camera_effect") or "").lower().strip()
+    seg["camera_effect"] = effect if effect in CAMERA_EFFECTS else "static"
+    return seg
+
+
+def repair_script(data):
+    """
+    Applies local fixes in place. Returns the issues that still need the model
+    (those with a `portion`).
+    """
+    if not isinstance(data, dict):
+        return [Issue("$", "script is not a JSON object", "script")]
+
+    if "hook_plan" not in data and isinstance(data.get("hook"), dict):
+        data["hook_plan"] = data.pop("hook")  # Legacy key
+    hook = data.get("hook_plan")
+    if isinstance(hook, dict) and hook.get("mood_color") not in MOOD_COLORS:
+        color = str(hook.get("mood_color") or "").lower()
+        hook["mood_color"] = "neon_green" if "green" in color else "yellow" if "yellow" in color else "red"
+
+    if isinstance(data.get("segments"), list):
+        # Unusable segments are dropped (re-prompted below if too few remain)
+        data["segments"] = [seg for seg in map(repair_segment, data["segments"]) if seg is not None]
+
+    if not _is_text(data.get("title")):
+        thumb = data.get("thumbnail_plan") if isinstance(data.get("thumbnail_plan"), dict) else {}
+        hook = hook if isinstance(hook, dict) else {}
+        data["title"] = (thumb.get("thumbnail_text") or hook.get("overlay_text") or "Daily News").title()
+
+    return [issue for issue in validate_script(data) if issue.portion]
+
+
+def parse_script(text):
+    """Parses, repairs and validates a raw response. Returns (script or None, remaining issues)."""
+    data, repaired = repair_json_text(text)
+    if data is None:
+        return None, [Issue("$", "unparseable response", "script")]
+    if repaired:
+        print("🩹 Repaired malformed JSON from the model locally.")
+    return data, repair_script(data)
+
+
+# ==========================================
+# Targeted re-prompting
+# ==========================================
+PORTION_SHAPES = {
+    "hook_plan": '{"hook_plan": {"overlay_text": "...", "narration": "...", "image_description": "...", "mood_color": "red"}}',
+    "thumbnail_plan": '{"thumbnail_plan": {"thumbnail_text": "...", "image_description": "...", "reasoning": "..."}}',
+    "segments": '{"segments": [{"text": "...", "image_prompt": "...", "camera_effect": "zoom_in"}, ...]}',
+}
+
+
+def portion_prompt(original_prompt, data, portion):
+    """Prompt asking only for the failing portion, with the rest of the script as context."""
+    partial = json.dumps(data, ensure_ascii=False, indent=1)
+    if portion == "segments":
+        have = len(data.get("segments") or [])
+        ask = (f"The script currently has {have} usable body segments. Return ONLY the ADDITIONAL segments "
+               f"needed to reach 5-6 body segments, continuing naturally after the existing ones.")
+    else:
+        ask = f"The `{portion}` part is missing or incomplete. Return ONLY a complete `{portion}`."
+    return (f"{original_prompt}\n\n[REPAIR REQUEST]\nA previous answer produced this partial script:\n{partial}\n\n"
+            f"{ask}\nRespond with JSON only, exactly in this shape:\n{PORTION_SHAPES[portion]}")
+
+
+def repair_with_llm(data, issues, original_prompt, generate, invalidate=None):
+    """
+    Re-prompts only for the failing portions (bounded retries) and merges them in.
+    `generate(prompt) -> text`; `invalidate(prompt)` drops a cached reply that
+    did not fix its portion, so the next attempt (or a same-day rerun) asks the
+    model again instead of replaying it. Returns the remaining issues.
+    """
+    for portion in ("hook_plan", "thumbnail_plan", "segments"):
+        if not any(issue.portion == portion for issue in issues):
+            continue
+        for attempt in range(1, MAX_REPAIR_ATTEMPTS + 1):
+            print(f"🔧 Re-prompting for '{portion}' only (attempt {attempt}/{MAX_REPAIR_ATTEMPTS})...")
+            prompt = portion_prompt(original_prompt, data, portion)
+            part, _ = repair_json_text(generate(prompt))
+            if isinstance(part, dict) and portion in part:
+                if portion == "segments" and isinstance(part["segments"], list):
+                    data["segments"] = (data.get("segments") or []) + part["segments"]
+                else:
+                    data[portion] = part[portion]
+                issues = repair_script(data)
+                if not any(issue.portion == portion for issue in issues):
+                    break
+            if invalidate is not None:
+                invalidate(prompt)
+    return issues
@@ -0,0 +1,103 @@
+"""
+Incremental JSON scanner for streamed Gemini script output.
+
+Feed it text chunks as they arrive; it reports each top-level plan object
+(`hook_plan`, `thumbnail_plan`) and each element of `segments` as soon as
+that object is complete, so asset work can start before the full response
+(and the final `json.loads`) is available.
+
+    scanner = ScriptStreamScanner()
+    for chunk in stream:
+        for kind, index, obj in scanner.feed(chunk):
+            ...   # ("hook_plan", None, {...}) / ("segments", 0, {...})
+"""
+import json
+
+PLAN_KEYS = ("hook_plan", "thumbnail_plan", "hook")
+ARRAY_KEYS = ("segments",)
+
+
+class ScriptStreamScanner:
+    def __init__(self):
+        self.buffer = ""
+        self.pos = 0              # Next character to scan
+        self.depth = 0            # Open containers ({ or [)
+        self.in_string = False
+        self.escape = False
+        self.string_start = None
+        self.last_string = None   # Last complete string at depth 1 (candidate key)
+        self.key = None           # Key whose value is being scanned at depth 1
+        self.value_start = None   # Buffer index where a reported object starts
+        self.array_key = None     # Set while inside a reported array
+        self.array_index = 0
+        self.started = False      # Seen the top-level '{' (skips ```json fences / prose)
+
+    def feed(self, text):
+        """Consumes a chunk and returns a list of (kind, index, obj) for completed objects."""
+        self.buffer += text
+        events = []
+        buf = self.buffer
+        i = self.pos
+        n = len(buf)
+        while i < n:
+            c = buf[i]
+            if not self.started:
+                if c == "{":
+                    self.started = True
+                    self.depth = 1
+                i += 1
+                continue
+
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif c == "\\":
+                    self.escape = True
+                elif c == '"':
+                    self.in_string = False
+                    if self.depth == 1:
+                        try:
+                            self.last_string = json.loads(buf[self.string_start:i + 1])
+                        except ValueError:
+                            self.last_string = None
+                i += 1
+                continue
+
+            if c == '"':
+                self.in_string = True
+                self.string_start = i
+            elif c == ":" and self.depth == 1:
+                self.key = self.last_string
+            elif c == "," and self.depth == 1:
+                self.key = None
+            elif c in "{[":
+                if self.depth == 1 and c == "{" and self.key in PLAN_KEYS:
+                    self.value_start = i
+                elif self.depth == 1 and c == "[" and self.key in ARRAY_KEYS:
+                    self.array_key = self.key
+                    self.array_index = 0
+                elif self.depth == 2 and c == "{" and self.array_key:
+                    self.value_start = i
+                self.depth += 1
+            elif c in "}]":
+                self.depth -= 1
+                if self.value_start is not None and c == "}" and (
+                        (self.depth == 1 and not self.array_key) or (self.depth == 2 and self.array_key)):
+                    try:
+                        obj = json.loads(buf[self.value_start:i + 1])
+                    except ValueError:
+                        obj = None
+                    if isinstance(obj, dict):
+                        if self.array_key:
+                            events.append((self.array_key, self.array_index, obj))
+                        else:
+                            events.append((self.key, None, obj))
+                    if self.array_key:
+                        self.array_index += 1
+                    self.value_start = None
+                elif c == "]" and self.depth == 1:
+                    self.array_key = None
+            i += 1
+
+        self.pos = i
+        return events
@@ -0,0 +1,569 @@
+"""
+Local stand-in for the external providers used by the shorts pipeline.
+
+Serves endpoints shaped like the real APIs so that `VideoGenerator` and
+`daily_shorts.py` can run (and be benchmarked) fully offline:
+
+    POST /client/v4/accounts/<id>/ai/run/<model>      Cloudflare Workers AI (JSON + base64 image)
+    POST /hf-inference/models/<model>                 Hugging Face router (raw image bytes)
+    GET  /prompt/<query>?width=&height=               Pollinations (raw image bytes)
+    POST /tts                                         edge-tts stand-in (NDJSON audio/WordBoundary chunks)
+    POST /v1beta/models/<model>:generateContent       Gemini REST
+    POST /v1beta/models/<model>:streamGenerateContent Gemini REST (streamed JSON array)
+    GET  /rss/search?q=<query>                        Google News RSS (fresh, unique headlines)
+    POST /token                                       OAuth token refresh
+    GET  /discovery/v1/apis/youtube/v3/rest           YouTube Data API discovery document
+    POST /upload/youtube/v3/videos?uploadType=resumable   YouTube resumable upload session
+    PUT  /upload/youtube/v3/videos?upload_id=<id>     Upload bytes (Content-Range chunks, 308 until complete)
+
+Images, audio and headlines are deterministic (derived from the request
+content), and latency / error rate / 429 injection are configurable.
+
+Usage:
+    python standin_server.py --port 8765 --latency 0.3 --error-rate 0.05 --rate-limit-rate 0.1
+    eval "$(python standin_server.py --port 8765 --print-env)"   # point the pipeline at it
+"""
+import argparse
+import base64
+import glob
+import hashlib
+import io
+import json
+import math
+import os
+import random
+import re
+import struct
+import sys
+import threading
+import time
+import uuid
+from array import array
+from email.utils import formatdate
+from xml.sax.saxutils import escape
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+# Windows CP949 encoding fix
+if sys.platform.startswith('win'):
+    sys.stdout.reconfigure(encoding='utf-8')
+
+DEFAULT_PORT = 8765
+SCRIPTS_GLOB = os.path.join("scripts", "*_script.json")
+
+# edge-tts reports offsets in 100ns units
+TICKS_PER_SECOND = 10_000_000
+TTS_SAMPLE_RATE = 24000
+TTS_SECONDS_PER_WORD = 0.32
+
+
+class StandinConfig:
+    """Behaviour knobs for the stand-in server."""
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, rate_limit_rate=0.0,
+                 seed=0, stream_chunk_delay=0.05, scripts_glob=SCRIPTS_GLOB):
+        self.latency = latency                      # Base latency per request (seconds)
+        self.jitter = jitter                        # +/- uniform jitter (seconds)
+        self.error_rate = error_rate                # Probability of a 500 response
+        self.rate_limit_rate = rate_limit_rate      # Probability of a 429 response
+        self.seed = seed
+        self.stream_chunk_delay = stream_chunk_delay
+        self.scripts_glob = scripts_glob
+
+
+def env_overrides(base_url):
+    """Environment variables that point the pipeline at a stand-in server."""
+    return {
+        "CLOUDFLARE_API_BASE": f"{base_url}/client/v4",
+        "CLOUDFLARE_ACCOUNT_ID": "standin",
+        "CLOUDFLARE_API_KEY": "standin",
+        "HF_API_BASE": base_url,
+        "HF_TOKEN": "standin",
+        "POLLINATIONS_API_BASE": base_url,
+        "EDGE_TTS_API_BASE": base_url,
+        "GEMINI_API_BASE": base_url,
+        "GEMINI_API_KEY": "standin",
+        "NEWS_FEED_BASE": base_url,
+        "YOUTUBE_API_BASE": base_url,
+        "YOUTUBE_TOKEN_URI": f"{base_url}/token",
+        "YOUTUBE_CLIENT_ID": "standin",
+        "YOUTUBE_CLIENT_SECRET": "standin",
+        "YOUTUBE_REFRESH_TOKEN": "standin",
+    }
+
+
+# ==========================================
+# Deterministic payloads
+# ==========================================
+def _digest(*parts):
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(str(part).encode("utf-8"))
+        h.update(b"\x00")
+    return h.digest()
+
+
+def make_image(prompt, width, height):
+    """Deterministic JPEG for a prompt: two-tone gradient with a few blocks."""
+    from PIL import Image, ImageDraw
+
+    width = max(16, min(int(width), 2048))
+    height = max(16, min(int(height), 2048))
+    d = _digest(prompt, width, height)
+    top = (d[0] // 2, d[1] // 2, 40 + d[2] // 3)
+    bottom = (d[3] // 3, 40 + d[4] // 3, d[5] // 2)
+
+    # Build the gradient on a 1px wide strip and stretch it (cheap)
+    strip = Image.new("RGB", (1, 256))
+    for y in range(256):
+        a = y / 255
+        strip.putpixel((0, y), tuple(int(top[c] * (1 - a) + bottom[c] * a) for c in range(3)))
+    img = strip.resize((width, height))
+
+    draw = ImageDraw.Draw(img)
+    for i in range(4):
+        b = d[6 + i * 4: 10 + i * 4]
+        x0, y0 = b[0] * width // 256, b[1] * height // 256
+        x1 = min(width, x0 + 32 + b[2] * width // 512)
+        y1 = min(height, y0 + 32 + b[3] * height // 512)
+        draw.rectangle((x0, y0, x1, y1), fill=(b[2], b[3], (b[0] + b[1]) // 2))
+
+    buf = io.BytesIO()
+    img.save(buf, format="JPEG", quality=85)
+    return buf.getvalue()
+
+
+def make_tts_chunks(text, rate="+0%"):
+    """
+    Returns edge-tts style chunks (WordBoundary events + one audio chunk).
+    Audio is a quiet deterministic tone in a WAV container; ffmpeg probes by
+    content, so it can be saved under the usual .mp3 names.
+    """
+    words = text.split() or [""]
+    try:
+        speed = 1 + int(rate.strip().rstrip("%")) / 100
+    except ValueError:
+        speed = 1.0
+    per_word = TTS_SECONDS_PER_WORD / max(speed, 0.1)
+
+    chunks = []
+    for i, word in enumerate(words):
+        if not word:
+            continue
+        chunks.append({
+            "type": "WordBoundary",
+            "offset": int(i * per_word * TICKS_PER_SECOND),
+            "duration": int(per_word * 0.9 * TICKS_PER_SECOND),
+            "text": word,
+        })
+
+    duration = max(0.5, len(words) * per_word + 0.2)
+    n_samples = int(duration * TTS_SAMPLE_RATE)
+    freq = 180 + _digest(text)[0]
+    step = 2 * math.pi * freq / TTS_SAMPLE_RATE
+    pcm = array("h", (int(1200 * math.sin(step * n)) for n in range(n_samples))).tobytes()
+
+    header = b"RIFF" + struct.pack("<I", 36 + len(pcm)) + b"WAVE"
+    header += b"fmt " + struct.pack("<IHHIIHH", 16, 1, 1, TTS_SAMPLE_RATE, TTS_SAMPLE_RATE * 2, 2, 16)
+    header += b"data" + struct.pack("<I", len(pcm))
+    chunks.append({"type": "audio", "data": header + pcm})
+    return chunks
+
+
+HEADLINE_WORDS = ("Nvidia TSMC Samsung Intel AMD Micron ASML Apple Qualcomm Broadcom SK-Hynix Arm "
+                  "wafer foundry HBM memory GPU accelerator datacenter packaging lithography EUV "
+                  "chiplet export tariff earnings guidance capex yield node roadmap startup model").split()
+FEED_ITEMS = 8
+
+
+def make_rss(query, base_url, items=FEED_ITEMS, now=None):
+    """
+    Google News-shaped RSS for a query. Headlines are derived from the query
+    and the current hour, so each run sees fresh stories the dedup index has
+    not covered yet, while runs within the same hour are identical.
+    """
+    now = now or time.time()
+    hour = int(now // 3600)
+    entries = []
+    for i in range(items):
+        rnd = random.Random(_digest("rss", query, hour, i))
+        words = rnd.sample(HEADLINE_WORDS, 6)
+        title = f"{words[0]} and {words[1]} {words[2]} {words[3]} update as {words[4]} {words[5]} shifts"
+        number = rnd.randint(2, 60)
+        summary = (f"{words[0]} said {words[2]} demand rose {number}% this quarter. "
+                   f"Analysts expect {words[1]} to expand {words[3]} capacity by {number + 5}% next year. "
+                   f"The post {title} appeared first on Stand-in Wire.")
+        link = f"{base_url}/article/{_digest(query, hour, i).hex()[:16]}"
+        entries.append(
+            f"<item><title>{escape(title)} - Stand-in Wire</title><link>{escape(link)}</link>"
+            f"<guid>{escape(link)}</guid><pubDate>{formatdate(now - i * 600)}</pubDate>"
+            f"<description>{escape(summary)}</description></item>")
+    return (f'<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel>'
+            f"<title>{escape(query)} - Stand-in News</title><link>{escape(base_url)}</link>"
+            f"{''.join(entries)}</channel></rss>").encode("utf-8")
+
+
+def youtube_discovery(base_url):
+    """Minimal YouTube Data API v3 discovery document (videos.insert with media upload)."""
+    return {
+        "kind": "discovery#restDescription", "discoveryVersion": "v1",
+        "id": "youtube:v3", "name": "youtube", "version": "v3", "protocol": "rest",
+        "rootUrl": f"{base_url}/", "servicePath": "youtube/v3/", "baseUrl": f"{base_url}/youtube/v3/",
+        "batchPath": "batch/youtube/v3",
+        "parameters": {
+            "alt": {"type": "string", "default": "json", "location": "query"},
+            "key": {"type": "string", "location": "query"},
+        },
+        "schemas": {"Video": {"id": "Video", "type": "object"}},
+        "resources": {"videos": {"methods": {"insert": {
+            "id": "youtube.videos.insert", "path": "videos", "flatPath": "videos", "httpMethod": "POST",
+            "parameters": {"part": {"type": "string", "required": True, "repeated": True, "location": "query"}},
+            "parameterOrder": ["part"],
+            "request": {"$ref": "Video"}, "response": {"$ref": "Video"},
+            "supportsMediaUpload": True,
+            "mediaUpload": {"accept": ["video/*", "application/octet-stream"], "maxSize": "274877906944",
+                            "protocols": {"simple": {"multipart": True, "path": "/upload/youtube/v3/videos"},
+                                          "resumable": {"multipart": True, "path": "/upload/youtube/v3/videos"}}},
+            "scopes": ["https://www.googleapis.com/auth/youtube.upload"],
+        }}}},
+    }
+
+
+class ScriptFixtures:
+    """Replays the committed scripts/*.json corpus as Gemini output."""
+
+    def __init__(self, pattern):
+        self.paths = sorted(glob.glob(pattern))
+
+    def pick(self, prompt):
+        if not self.paths:
+            return {
+                "hook_plan": {"overlay_text": "STAND-IN", "narration": "This is a stand-in script.",
+                              "image_description": "glowing chip", "mood_color": "red"},
+                "thumbnail_plan": {"thumbnail_text": "STAND-IN", "image_description": "server rack",
+                                   "reasoning": "offline"},
+                "title": "Stand-in Script",
+                "segments": [{"text": "The stand-in server generated this segment.",
+                              "image_prompt": "circuit board", "camera_effect": "zoom_in"}],
+            }
+        idx = int.from_bytes(_digest(prompt)[:4], "big") % len(self.paths)
+        with open(self.paths[idx], "r", encoding="utf-8") as f:
+            script = json.load(f)
+        # Drop the appended static outro, the pipeline adds its own
+        script["segments"] = [s for s in script.get("segments", []) if s.get("keyword") != "Subscribe"]
+        return script
+
+
+# ==========================================
+# HTTP server
+# ==========================================
+class StandinServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, config):
+        super().__init__(address, StandinHandler)
+        self.config = config
+        self.fixtures = ScriptFixtures(config.scripts_glob)
+        self.stats = defaultdict(int)
+        self.uploads = {} # upload_id -> {"metadata", "data": bytearray}
+        self._occurrences = defaultdict(int)
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def roll(self, key):
+        """
+        Deterministic fault injection: the outcome depends on the seed, the
+        request content and how many times that request was seen, so retries
+        of the same request may succeed and results do not depend on thread
+        scheduling.
+        """
+        with self._lock:
+            n = self._occurrences[key]
+            self._occurrences[key] += 1
+        r = random.Random(_digest(self.config.seed, key, n)).random()
+        if r < self.config.rate_limit_rate:
+            return 429
+        if r < self.config.rate_limit_rate + self.config.error_rate:
+            return 500
+        return 200
+
+    def delay(self, key):
+        latency = self.config.latency
+        if self.config.jitter:
+            latency += random.Random(_digest("jitter", self.config.seed, key)).uniform(
+                -self.config.jitter, self.config.jitter)
+        if latency > 0:
+            time.sleep(latency)
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, fmt, *args):
+        pass  # Keep benchmark output clean
+
+    # ---------- helpers ----------
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _send(self, status, payload, content_type="application/json", headers=None):
+        if isinstance(payload, (dict, list)):
+            payload = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _gate(self, endpoint, key):
+        """Applies latency and fault injection. Returns True if the request may proceed."""
+        server = self.server
+        server.delay(key)
+        status = server.roll(f"{endpoint}:{key}")
+        with server._lock:
+            server.stats[f"{endpoint}.{status}"] += 1
+        if status == 429:
+            self._send(429, {"error": {"code": 429, "message": "Rate limited (stand-in)"}},
+                       headers={"Retry-After": "1"})
+            return False
+        if status != 200:
+            self._send(status, {"error": {"code": status, "message": "Injected failure (stand-in)"}})
+            return False
+        return True
+
+    # ---------- routes ----------
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        if parsed.path.startswith("/prompt/"):
+            return self._pollinations(parsed)
+        if parsed.path == "/stats":
+            with self.server._lock:
+                return self._send(200, dict(self.server.stats))
+        if parsed.path == "/rss/search":
+            return self._rss(parsed)
+        if parsed.path == "/discovery/v1/apis/youtube/v3/rest":
+            return self._send(200, youtube_discovery(self.server.base_url))
+        self._send(404, {"error": "not found"})
+
+    def do_POST(self):
+        parsed = urlparse(self.path)
+        path = parsed.path
+        body = self._body()
+        if re.match(r"^/client/v4/accounts/[^/]+/ai/run/", path):
+            return self._cloudflare(body)
+        if path.startswith("/hf-inference/models/"):
+            return self._hf(path, body)
+        if path == "/tts":
+            return self._tts(body)
+        m = re.match(r"^/v1(?:beta)?/models/([^:]+):(generateContent|streamGenerateContent)$", path)
+        if m:
+            return self._gemini(m.group(1), m.group(2) == "streamGenerateContent", body)
+        if path == "/token":
+            return self._send(200, {"access_token": "standin", "expires_in": 3600, "token_type": "Bearer"})
+        if path == "/upload/youtube/v3/videos":
+            return self._upload_start(parsed, body)
+        self._send(404, {"error": "not found"})
+
+    def do_PUT(self):
+        parsed = urlparse(self.path)
+        if parsed.path == "/upload/youtube/v3/videos":
+            return self._upload_chunk(parsed, self._body())
+        self._send(404, {"error": "not found"})
+
+    def _cloudflare(self, body):
+        req = json.loads(body or b"{}")
+        prompt = req.get("prompt", "")
+        if not self._gate("cloudflare", prompt):
+            return
+        image = make_image(prompt, req.get("width", 1024), req.get("height", 1024))
+        self._send(200, {"result": {"image": base64.b64encode(image).decode("ascii")},
+                         "success": True, "errors": [], "messages": []})
+
+    def _hf(self, path, body):
+        req = json.loads(body or b"{}")
+        prompt = req.get("inputs", "")
+        params = req.get("parameters", {})
+        if not self._gate("hf", f"{path}:{prompt}"):
+            return
+        image = make_image(prompt, params.get("width", 1024), params.get("height", 1024))
+        self._send(200, image, content_type="image/jpeg")
+
+    def _pollinations(self, parsed):
+        prompt = unquote(parsed.path[len("/prompt/"):])
+        qs = parse_qs(parsed.query)
+        width = int(qs.get("width", ["1024"])[0])
+        height = int(qs.get("height", ["1024"])[0])
+        if not self._gate("pollinations", prompt):
+            return
+        self._send(200, make_image(prompt, width, height), content_type="image/jpeg")
+
+    def _rss(self, parsed):
+        query = parse_qs(parsed.query).get("q", [""])[0]
+        if not self._gate("rss", query):
+            return
+        self._send(200, make_rss(query, self.server.base_url), content_type="application/rss+xml")
+
+    def _upload_start(self, parsed, body):
+        """Opens a resumable upload session; the video metadata is the request body."""
+        if parse_qs(parsed.query).get("uploadType", [""])[0] != "resumable":
+            return self._send(400, {"error": {"code": 400, "message": "Only resumable uploads are supported"}})
+        upload_id = uuid.uuid4().hex
+        with self.server._lock:
+            self.server.uploads[upload_id] = {"metadata": json.loads(body or b"{}"), "data": bytearray()}
+        location = f"{self.server.base_url}/upload/youtube/v3/videos?uploadType=resumable&upload_id={upload_id}"
+        self._send(200, b"", headers={"Location": location})
+
+    def _upload_chunk(self, parsed, body):
+        """
+        Receives bytes for a session (`Content-Range: bytes a-b/total`, or
+        `bytes */total` / `bytes a-b/*` for unknown totals). Replies 308 with
+        the persisted Range until the upload is complete, then 200 + video.
+        """
+        upload_id = parse_qs(parsed.query).get("upload_id", [""])[0]
+        upload = self.server.uploads.get(upload_id)
+        if upload is None:
+            return self._send(404, {"error": {"code": 404, "message": "Unknown upload session"}})
+        if not self._gate("upload", f"{upload_id}:{len(upload['data'])}:{len(body)}"):
+            return
+
+        total = None
+        content_range = self.headers.get("Content-Range", "")
+        m = re.match(r"bytes (\d+)-(\d+)/(\d+|\*)", content_range)
+        with self.server._lock:
+            data = upload["data"]
+            if m:
+                start = int(m.group(1))
+                if start <= len(data): # Re-sent bytes overwrite, gaps are refused
+                    del data[start:]
+                    data += body
+                total = None if m.group(3) == "*" else int(m.group(3))
+            elif content_range.startswith("bytes */"):
+                total = None if content_range.endswith("*") else int(content_range[len("bytes */"):])
+            else:
+                data[:] = body # Single request without Content-Range
+                total = len(data)
+            received = len(data)
+            self.server.stats["upload.bytes"] = self.server.stats.get("upload.bytes", 0) + len(body)
+
+        if total is None or received < total:
+            headers = {"Range": f"bytes=0-{received - 1}"} if received else {}
+            return self._send(308, b"", headers=headers)
+
+        metadata = upload["metadata"]
+        video_id = hashlib.sha256(bytes(upload["data"])).hexdigest()[:11]
+        self._send(200, {"kind": "youtube#video", "id": video_id,
+                         "snippet": metadata.get("snippet", {}), "status": metadata.get("status", {}),
+                         "standin": {"bytes": received, "sha256": hashlib.sha256(bytes(upload["data"])).hexdigest()}})
+
+    def _tts(self, body):
+        req = json.loads(body or b"{}")
+        text = req.get("text", "")
+        if not self._gate("tts", text):
+            return
+        lines = []
+        for chunk in make_tts_chunks(text, req.get("rate", "+0%")):
+            if chunk["type"] == "audio":
+                chunk = {"type": "audio", "data": base64.b64encode(chunk["data"]).decode("ascii")}
+            lines.append(json.dumps(chunk))
+        self._send(200, ("\n".join(lines) + "\n").encode("utf-8"), content_type="application/x-ndjson")
+
+    def _gemini(self, model, stream, body):
+        req = json.loads(body or b"{}")
+        prompt = "".join(
+            part.get("text", "")
+            for content in req.get("contents", [])
+            for part in content.get("parts", [])
+        )
+        if not self._gate("gemini", f"{model}:{prompt}"):
+            return
+        text = json.dumps(self.server.fixtures.pick(prompt), ensure_ascii=False, indent=2)
+        if not stream:
+            return self._send(200, _gemini_payload(text, finished=True))
+
+        # Streamed JSON array, one candidate chunk per element (REST `alt=json` shape)
+        pieces = [text[i:i + 400] for i in range(0, len(text), 400)]
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def write_chunk(data):
+            data = data.encode("utf-8")
+            self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.flush()
+
+        write_chunk("[")
+        for i, piece in enumerate(pieces):
+            if i:
+                write_chunk(",\r\n")
+                time.sleep(self.server.config.stream_chunk_delay)
+            write_chunk(json.dumps(_gemini_payload(piece, finished=i == len(pieces) - 1)))
+        write_chunk("]")
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+
+def _gemini_payload(text, finished):
+    candidate = {"content": {"parts": [{"text": text}], "role": "model"}, "index": 0}
+    if finished:
+        candidate["finishReason"] = "STOP"
+    return {
+        "candidates": [candidate],
+        "usageMetadata": {"promptTokenCount": 0, "candidatesTokenCount": len(text) // 4},
+    }
+
+
+def start_server(config=None, host="127.0.0.1", port=0):
+    """Starts the stand-in server in a daemon thread. Returns the server (use .base_url / .shutdown())."""
+    server = StandinServer((host, port), config or StandinConfig())
+    thread = threading.Thread(target=server.serve_forever, name="standin-server", daemon=True)
+    thread.start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for image/TTS/LLM providers.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--latency", type=float, default=0.0, help="Base latency per request (s)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Uniform latency jitter (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probability of HTTP 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Probability of HTTP 429")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--stream-chunk-delay", type=float, default=0.05,
+                        help="Delay between streamed Gemini chunks (s)")
+    parser.add_argument("--scripts", default=SCRIPTS_GLOB, help="Glob of scripts replayed as Gemini output")
+    parser.add_argument("--print-env", action="store_true", help="Print export lines for the pipeline and exit")
+    args = parser.parse_args()
+
+    base_url = f"http://{args.host}:{args.port}"
+    if args.print_env:
+        for k, v in env_overrides(base_url).items():
+            print(f"export {k}={v}")
+        return
+
+    config = StandinConfig(
+        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate, seed=args.seed,
+        stream_chunk_delay=args.stream_chunk_delay, scripts_glob=args.scripts,
+    )
+    server = StandinServer((args.host, args.port), config)
+    print(f"🧪 Stand-in providers listening on {base_url} "
+          f"(latency={args.latency}s, errors={args.error_rate}, 429={args.rate_limit_rate})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Stand-in server stopped.")
+        print(json.dumps(dict(server.stats), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+"""
+Persistent story dedup index across daily runs.
+
+Stores every article link we covered plus MinHash signatures of article
+titles and of the texts of the generated scripts (scripts/*.json) in a local
+SQLite file. Feed candidates are checked against it before anything is sent
+to Gemini:
+
+    1. exact link match (any age)
+    2. MinHash/LSH near-duplicate match against stories seen in the last
+       `window_days` days (title contained in an earlier title / script text)
+
+The LSH buckets for the window are held in memory, so a lookup is a few
+dict probes plus an exact check of the (few) bucket candidates, well under 1ms.
+
+Usage:
+    python story_index.py backfill                  # index the existing scripts/*.json corpus
+    python story_index.py check "Nvidia ships HBM4"  # test a title against the index
+    python story_index.py stats
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+import zlib
+from array import array
+from datetime import datetime
+
+# Windows CP949 encoding fix
+if sys.platform.startswith('win'):
+    sys.stdout.reconfigure(encoding='utf-8')
+
+CACHE_DIR = os.environ.get("SHORTS_CACHE_DIR", ".cache")
+INDEX_PATH = os.path.join(CACHE_DIR, "story_index.sqlite3")
+SCRIPTS_GLOB = os.path.join("scripts", "*_script.json")
+
+# MinHash / LSH parameters: 64 hashes in 32 bands of 2 rows keeps recall high
+# for short titles (Jaccard ~0.3 against a longer script segment).
+NUM_PERM = 64
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+
+# A candidate is a duplicate if this much of its shingles appear in an earlier story
+CONTAINMENT_THRESHOLD = 0.6
+
+STOPWORDS = frozenset("""
+a an the and or but if of to in on at by for with from as is are was were be been being it its
+this that these those into over after before about than then so such up down out new says said
+will would could should can may might has have had do does did not no just more most very
+how why what when where who which while your you our we they their his her he she them us
+""".split())
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[.'][a-z0-9]+)*")
+_PUBLISHER_RE = re.compile(r"\s+[-|]\s+[^-|]{2,60}$")  # Google News "Title - Publisher"
+
+
+def _permutations():
+    # Fixed seed so signatures are stable across processes (never use hash())
+    import random
+    rng = random.Random(0x5EED)
+    return [(rng.randrange(1, MERSENNE_PRIME), rng.randrange(0, MERSENNE_PRIME)) for _ in range(NUM_PERM)]
+
+
+PERMUTATIONS = _permutations()
+
+
+def shingles(text):
+    """Normalized content-word shingles (unigrams, crude plural folding)."""
+    tokens = set()
+    for tok in _TOKEN_RE.findall(text.lower()):
+        if tok in STOPWORDS or len(tok) < 2:
+            continue
+        if len(tok) > 4 and tok.endswith("s") and not tok.endswith("ss"):
+            tok = tok[:-1]
+        tokens.add(tok)
+    return tokens
+
+
+def minhash(tokens):
+    """64-value MinHash signature of a token set."""
+    hashes = [zlib.crc32(t.encode("utf-8")) for t in tokens]
+    if not hashes:
+        return None
+    return [
+        min(((a * h + b) % MERSENNE_PRIME) & MAX_HASH for h in hashes)
+        for a, b in PERMUTATIONS
+    ]
+
+
+def _band_keys(signature):
+    return [(band, tuple(signature[band * ROWS:(band + 1) * ROWS])) for band in range(BANDS)]
+
+
+def clean_title(title):
+    return _PUBLISHER_RE.sub("", title or "").strip()
+
+
+class StoryIndex:
+    def __init__(self, path=INDEX_PATH, window_days=7):
+        self.path = path
+        self.window_days = window_days
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Pipeline stages open, query and update the index from different threads (one at a time)
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS links (link TEXT PRIMARY KEY, seen_at REAL);
+            CREATE TABLE IF NOT EXISTS stories (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                source TEXT, text TEXT, seen_at REAL, size INTEGER, signature BLOB
+            );
+            CREATE INDEX IF NOT EXISTS stories_seen_at ON stories (seen_at);
+            CREATE TABLE IF NOT EXISTS sources (source TEXT PRIMARY KEY, indexed_at REAL);
+        """)
+        self._load_window()
+
+    # ---------- in-memory LSH ----------
+    def _load_window(self):
+        self._stories = {}
+        self._buckets = {}
+        cutoff = time.time() - self.window_days * 86400
+        rows = self.db.execute(
+            "SELECT id, text, signature FROM stories WHERE seen_at >= ?", (cutoff,))
+        for story_id, text, blob in rows:
+            self._remember(story_id, text, array("Q", blob).tolist())
+
+    def _remember(self, story_id, text, signature):
+        self._stories[story_id] = text
+        for key in _band_keys(signature):
+            self._buckets.setdefault(key, []).append(story_id)
+
+    # ---------- writes ----------
+    def add_text(self, text, source="", seen_at=None):
+        tokens = shingles(text)
+        signature = minhash(tokens)
+        if signature is None:
+            return None
+        seen_at = seen_at or time.time()
+        cur = self.db.execute(
+            "INSERT INTO stories (source, text, seen_at, size, signature) VALUES (?, ?, ?, ?, ?)",
+            (source, text, seen_at, len(tokens), array("Q", signature).tobytes()))
+        if seen_at >= time.time() - self.window_days * 86400:
+            self._remember(cur.lastrowid, text, signature)
+        return cur.lastrowid
+
+    def add_entry(self, entry, seen_at=None):
+        """Records a feed entry (link + title) as covered."""
+        seen_at = seen_at or time.time()
+        if entry.get("link"):
+            self.db.execute("INSERT OR IGNORE INTO links (link, seen_at) VALUES (?, ?)", (entry["link"], seen_at))
+        self.add_text(clean_title(entry.get("title", "")), source=entry.get("link", ""), seen_at=seen_at)
+
+    def add_entries(self, entries, seen_at=None):
+        for entry in entries:
+            self.add_entry(entry, seen_at)
+        self.db.commit()
+
+    def add_script(self, path, script=None):
+        """Indexes the title, hook and segment texts of one generated script."""
+        if script is None:
+            with open(path, "r", encoding="utf-8") as f:
+                script = json.load(f)
+        seen_at = _script_date(path) or time.time()
+
+        texts = [script.get("title", "")]
+        hook = script.get("hook_plan") or script.get("hook") or {}
+        texts.append(hook.get("narration", ""))
+        texts += [s.get("text", "") for s in script.get("segments", []) if s.get("keyword") != "Subscribe"]
+
+        for text in texts:
+            if text:
+                self.add_text(text, source=path, seen_at=seen_at)
+        self.db.execute("INSERT OR REPLACE INTO sources (source, indexed_at) VALUES (?, ?)", (path, time.time()))
+        self.db.commit()
+
+    def backfill(self, pattern=SCRIPTS_GLOB):
+        """Indexes every script matching `pattern` that is not indexed yet. Returns the count."""
+        done = {row[0] for row in self.db.execute("SELECT source FROM sources")}
+        count = 0
+        for path in sorted(glob.glob(pattern)):
+            path = path.replace("\\", "/")
+            if path in done:
+                continue
+            try:
+                self.add_script(path)
+                count += 1
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Skipping {path}: {e}")
+        return count
+
+    # ---------- reads ----------
+    def match(self, entry):
+        """Returns a reason string if the entry was already covered, else None."""
+        link = entry.get("link")
+        if link and self.db.execute("SELECT 1 FROM links WHERE link = ?", (link,)).fetchone():
+            return "link already covered"
+
+        tokens = shingles(clean_title(entry.get("title", "")))
+        signature = minhash(tokens)
+        if signature is None:
+            return None
+
+        candidates = set()
+        for key in _band_keys(signature):
+            candidates.update(self._buckets.get(key, ()))
+
+        # LSH only proposes candidates; verify with the exact containment |A ∩ B| / |A|
+        for story_id in candidates:
+            text = self._stories[story_id]
+            containment = len(tokens & shingles(text)) / len(tokens)
+            if containment >= CONTAINMENT_THRESHOLD:
+                return f"near-duplicate ({containment:.2f}) of: {text[:60]}"
+        return None
+
+    def filter_new(self, entries):
+        """Drops entries that were already covered. Prints what was skipped."""
+        started = time.perf_counter()
+        fresh = []
+        for entry in entries:
+            reason = self.match(entry)
+            if reason:
+                print(f"   🔁 Skip '{clean_title(entry.get('title', ''))[:50]}' ({reason})")
+            else:
+                fresh.append(entry)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        print(f"🧮 Dedup: {len(fresh)}/{len(entries)} new stories ({elapsed_ms:.2f}ms)")
+        return fresh
+
+    def stats(self):
+        return {
+            "links": self.db.execute("SELECT COUNT(*) FROM links").fetchone()[0],
+            "stories": self.db.execute("SELECT COUNT(*) FROM stories").fetchone()[0],
+            "scripts": self.db.execute("SELECT COUNT(*) FROM sources").fetchone()[0],
+            "in_window": len(self._stories),
+        }
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
+
+
+def _script_date(path):
+    """Seen date from the YYMMDD_topic_script.json filename."""
+    m = re.match(r"(\d{6})_", os.path.basename(path))
+    if not m:
+        return None
+    try:
+        return datetime.strptime(m.group(1), "%y%m%d").timestamp()
+    except ValueError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Story dedup index across daily runs.")
+    parser.add_argument("--index", default=INDEX_PATH)
+    parser.add_argument("--window-days", type=int, default=7)
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_backfill = sub.add_parser("backfill", help="Index the existing scripts corpus")
+    p_backfill.add_argument("--scripts", default=SCRIPTS_GLOB)
+    p_check = sub.add_parser("check", help="Check a title (and optional link) against the index")
+    p_check.add_argument("title")
+    p_check.add_argument("--link", default="")
+    sub.add_parser("stats")
+    args = parser.parse_args()
+
+    index = StoryIndex(args.index, window_days=args.window_days)
+    try:
+        if args.command == "backfill":
+            started = time.perf_counter()
+            count = index.backfill(args.scripts)
+            print(f"✅ Indexed {count} script(s) in {time.perf_counter() - started:.2f}s")
+            print(json.dumps(index.stats(), indent=2))
+        elif args.command == "check":
+            started = time.perf_counter()
+            reason = index.match({"title": args.title, "link": args.link})
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            print(f"🔁 Seen: {reason}" if reason else "🆕 New story", f"({elapsed_ms:.3f}ms)")
+        else:
+            print(json.dumps(index.stats(), indent=2))
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
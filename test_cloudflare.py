@@ -1,13 +1,13 @@
 import os
 import sys
-from dotenv import load_dotenv
+from local_env import load_local_env
 
 # Enhance encoding for Windows
 if sys.platform.startswith('win'):
     sys.stdout.reconfigure(encoding='utf-8')
 
 # Load .env
-load_dotenv(r"C:\Coding\Python\.env")
+load_local_env()
 
 from make_video import VideoGenerator
 
@@ -12,10 +12,10 @@ import numpy as np
 if sys.platform.startswith('win'):
     sys.stdout.reconfigure(encoding='utf-8')
 
-from dotenv import load_dotenv
+from local_env import load_local_env
 
 # Load environment variables
-load_dotenv(r"C:\Coding\Python\.env")
+load_local_env()
 
 # Configuration
 CLOUDFLARE_ACCOUNT_ID = os.environ.get("CLOUDFLARE_ACCOUNT_ID")
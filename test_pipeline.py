@@ -7,6 +7,9 @@ import sys
 if sys.platform.startswith('win'):
     sys.stdout.reconfigure(encoding='utf-8')
 
+from local_env import load_local_env
+
+load_local_env()
 from make_video import VideoGenerator
 
 async def test_pipeline():
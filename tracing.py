@@ -0,0 +1,175 @@
+"""
+Lightweight spans with wall / CPU time and Chrome trace export.
+
+    import tracing
+    tracing.enable()                         # or SHORTS_TRACE=trace.json
+    with tracing.span("tts", voice=voice):
+        ...
+    @tracing.traced("image.cloudflare")      # sync or async functions
+    def fetch(...): ...
+    tracing.export_chrome("temp_assets/trace.json")   # open in chrome://tracing or ui.perfetto.dev
+    tracing.print_summary()
+
+Pipeline stages (pipeline_dag.py) are recorded as spans automatically.
+CPU time is the recording thread's (time.thread_time), so for async spans
+it also includes other coroutines that ran on the same loop meanwhile.
+
+When tracing is disabled `span()` returns one shared no-op context manager
+and `traced` wrappers only check a flag, so instrumented code pays one
+attribute lookup per call.
+"""
+import contextlib
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+
+TRACE_ENV = "SHORTS_TRACE"
+DEFAULT_TRACE_PATH = os.path.join("temp_assets", "trace.json")
+
+_enabled = False
+_events = []
+_events_lock = threading.Lock()
+_origin = time.perf_counter()
+_NULL_SPAN = contextlib.nullcontext()
+
+
+def enable(reset=True):
+    global _enabled, _origin
+    if reset:
+        with _events_lock:
+            _events.clear()
+        _origin = time.perf_counter()
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def enabled():
+    return _enabled
+
+
+def trace_path():
+    """Export path from SHORTS_TRACE (a path, or 1/true for the default), else None."""
+    value = os.environ.get(TRACE_ENV, "").strip()
+    if not value or value.lower() in ("0", "false", "no"):
+        return None
+    return DEFAULT_TRACE_PATH if value.lower() in ("1", "true", "yes") else value
+
+
+class _Span:
+    __slots__ = ("name", "cat", "args", "start", "cpu_start")
+
+    def __init__(self, name, cat, args):
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        self.cpu_start = time.thread_time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        cpu = time.thread_time() - self.cpu_start
+        thread = threading.current_thread()
+        event = {
+            "name": self.name,
+            "cat": self.cat,
+            "start": self.start - _origin,
+            "wall": end - self.start,
+            "cpu": cpu,
+            "tid": thread.ident,
+            "thread": thread.name,
+            "args": self.args,
+        }
+        if exc_type is not None:
+            event["error"] = exc_type.__name__
+        with _events_lock:
+            _events.append(event)
+        return False
+
+
+def span(name, cat="shorts", **args):
+    """Context manager timing a block (no-op when tracing is disabled)."""
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(name, cat, args)
+
+
+def traced(name=None, cat="shorts"):
+    """Decorator form of `span` for sync and async functions."""
+    def decorate(fn):
+        span_name = name or fn.__qualname__
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                if not _enabled:
+                    return await fn(*args, **kwargs)
+                with _Span(span_name, cat, {}):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with _Span(span_name, cat, {}):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def events():
+    with _events_lock:
+        return list(_events)
+
+
+def export_chrome(path=DEFAULT_TRACE_PATH):
+    """Writes Chrome trace-event JSON (complete 'X' events + thread names)."""
+    recorded = events()
+    pid = os.getpid()
+    trace = []
+    for tid, thread_name in sorted({(e["tid"], e["thread"]) for e in recorded}, key=lambda t: str(t[1])):
+        trace.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": thread_name}})
+    for e in recorded:
+        args = dict(e["args"], cpu_ms=round(e["cpu"] * 1000, 3))
+        if "error" in e:
+            args["error"] = e["error"]
+        trace.append({
+            "name": e["name"], "cat": e["cat"], "ph": "X", "pid": pid, "tid": e["tid"],
+            "ts": round(e["start"] * 1e6, 1), "dur": round(e["wall"] * 1e6, 1), "args": args,
+        })
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, f, default=str)
+    print(f"🧭 Trace written: {path} ({len(recorded)} spans)")
+    return path
+
+
+def summary():
+    """[(name, count, wall_total, cpu_total, wall_max)] sorted by total wall time."""
+    totals = {}
+    for e in events():
+        row = totals.setdefault(e["name"], [0, 0.0, 0.0, 0.0])
+        row[0] += 1
+        row[1] += e["wall"]
+        row[2] += e["cpu"]
+        row[3] = max(row[3], e["wall"])
+    return sorted(((name, *row) for name, row in totals.items()), key=lambda r: -r[2])
+
+
+def print_summary(top=25):
+    rows = summary()
+    if not rows:
+        return
+    print(f"\n🧭 Trace summary ({len(rows)} span names)")
+    print(f"   {'span':<36} {'count':>5} {'wall s':>8} {'cpu s':>8} {'max s':>7}")
+    for name, count, wall, cpu, wall_max in rows[:top]:
+        print(f"   {name:<36} {count:>5} {wall:>8.2f} {cpu:>8.2f} {wall_max:>7.2f}")
@@ -1,25 +1,207 @@
+"""
+YouTube upload with resumable, chunked transfer.
+
+The video goes up in CHUNK_SIZE pieces through `next_chunk()`. Transient
+failures (5xx / 429 responses, socket and transport errors) are retried
+with exponential backoff plus jitter. After a failure the client asks the
+server how many bytes it has, so nothing is re-sent.
+
+The resumable session URI is saved under .cache/uploads/ as soon as the
+session opens. An upload interrupted by a crash or a CI timeout continues
+from the server's offset on the next run; `.cache` survives between CI
+runs. A session the server no longer knows (404 / 410) is dropped and the
+upload starts over.
+
+Progress and throughput are printed per chunk.
+
+The API client is built from a local discovery document (bundled with
+google-api-python-client, or cached under .cache/discovery/ for a stand-in
+base) and reused per thread together with its HTTP transport; the OAuth
+access token is kept in memory and reused until it expires. It is never
+written to disk: .cache/ is saved to the Actions cache.
+
+    python upload_shorts.py video.mp4 --title "..." [--chunk-mb 8]
+"""
+import json
 import os
-from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
-
-def upload_video(file_path, title, description):
-    # GitHub Secrets에서 환경변수로 주입받은 값들
-    client_id = os.environ.get("YOUTUBE_CLIENT_ID")
-    client_secret = os.environ.get("YOUTUBE_CLIENT_SECRET")
-    refresh_token = os.environ.get("YOUTUBE_REFRESH_TOKEN")
-
-    creds = Credentials(
-        None,
-        refresh_token=refresh_token,
-        token_uri="https://oauth2.googleapis.com/token",
-        client_id=client_id,
-        client_secret=client_secret
-    )
+import random
+import threading
+import time
+
+import tracing
+
+# API / token endpoints (override to point at a local stand-in, see standin_server.py)
+YOUTUBE_API_BASE = (os.environ.get("YOUTUBE_API_BASE") or "").rstrip("/") # Empty -> real YouTube API
+YOUTUBE_TOKEN_URI = os.environ.get("YOUTUBE_TOKEN_URI", "https://oauth2.googleapis.com/token")
+
+CACHE_DIR = os.environ.get("SHORTS_CACHE_DIR", ".cache")
+UPLOAD_SESSION_DIR = os.path.join(CACHE_DIR, "uploads")
+CHUNK_SIZE = int(float(os.environ.get("SHORTS_UPLOAD_CHUNK_MB", 8)) * 1024 * 1024) # Rounded to 256 KiB below
+MAX_RETRIES = 8 # Consecutive failures without progress before giving up
+MAX_BACKOFF = 64
+RETRIABLE_STATUS = {429, 500, 502, 503, 504}
+SESSION_MAX_AGE = 6 * 24 * 3600 # YouTube keeps resumable sessions for about a week
+
+_CHUNK_UNIT = 256 * 1024 # Resumable chunks must be a multiple of 256 KiB
+
+
+def _retriable_exceptions():
+    import http.client
+
+    import httplib2
+
+    return (httplib2.HttpLib2Error, http.client.HTTPException, OSError)
+
+
+# ---------- session persistence ----------
+def _session_path(file_path):
+    """One session file per (video path, size, mtime): a re-rendered file gets a fresh session."""
+    import hashlib
+
+    stat = os.stat(file_path)
+    key = f"{os.path.abspath(file_path)}:{stat.st_size}:{stat.st_mtime_ns}"
+    return os.path.join(UPLOAD_SESSION_DIR, hashlib.sha256(key.encode("utf-8")).hexdigest()[:24] + ".json")
+
+
+def load_session(file_path):
+    try:
+        with open(_session_path(file_path), "r", encoding="utf-8") as f:
+            session = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if time.time() - session.get("created_at", 0) > SESSION_MAX_AGE:
+        clear_session(file_path)
+        return None
+    return session
+
+
+def save_session(file_path, uri, title):
+    os.makedirs(UPLOAD_SESSION_DIR, exist_ok=True)
+    path = _session_path(file_path)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"file": file_path, "uri": uri, "title": title, "created_at": time.time()}, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def clear_session(file_path):
+    try:
+        os.remove(_session_path(file_path))
+    except OSError:
+        pass
+
 
-    youtube = build("youtube", "v3", credentials=creds)
+def query_offset(http, uri, size):
+    """
+    Asks the server how much of a saved session it has.
+    Returns (offset, None), (size, response) if it is already complete,
+    or (None, None) if the session is gone.
+    """
+    resp, content = http.request(uri, "PUT", headers={"Content-Range": f"bytes */{size}", "Content-Length": "0"})
+    if resp.status in (200, 201):
+        return size, json.loads(content)
+    if resp.status == 308:
+        received = resp.get("range")
+        return (int(received.split("-")[1]) + 1 if received else 0), None
+    if resp.status in (404, 410):
+        return None, None
+    from googleapiclient.errors import HttpError
+    raise HttpError(resp, content, uri=uri)
 
-    body = {
+
+# ---------- client ----------
+# 업로드마다 discovery 문서 다운로드 + 토큰 갱신을 반복하지 않도록 재사용
+DISCOVERY_CACHE_DIR = os.path.join(CACHE_DIR, "discovery")
+
+_creds = None
+_creds_lock = threading.Lock()
+_clients = threading.local() # httplib2 transports are not thread-safe: one client per thread
+
+
+def discovery_document():
+    """
+    YouTube v3 discovery document without a network round trip: the copy bundled
+    with google-api-python-client for the real API, a copy cached under
+    .cache/discovery/ (fetched once) for a custom YOUTUBE_API_BASE.
+    """
+    if not YOUTUBE_API_BASE:
+        from googleapiclient.discovery_cache import get_static_doc
+        return get_static_doc("youtube", "v3")
+
+    import hashlib
+    key = hashlib.sha256(YOUTUBE_API_BASE.encode("utf-8")).hexdigest()[:12]
+    path = os.path.join(DISCOVERY_CACHE_DIR, f"youtube.v3.{key}.json")
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+    except OSError:
+        pass
+
+    import httplib2
+    url = f"{YOUTUBE_API_BASE}/discovery/v1/apis/youtube/v3/rest"
+    resp, content = httplib2.Http(timeout=60).request(url)
+    if resp.status != 200:
+        raise RuntimeError(f"Discovery document fetch failed: HTTP {resp.status} ({url})")
+    os.makedirs(DISCOVERY_CACHE_DIR, exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+    return content.decode("utf-8")
+
+
+def credentials():
+    """
+    Shared OAuth credentials for this process: the refresh token is exchanged
+    once and the access token reused by every upload until it expires.
+    """
+    global _creds
+    with _creds_lock:
+        if _creds is None:
+            from google.oauth2.credentials import Credentials
+
+            # GitHub Secrets에서 환경변수로 주입받은 값들
+            client_id = os.environ.get("YOUTUBE_CLIENT_ID")
+            client_secret = os.environ.get("YOUTUBE_CLIENT_SECRET")
+            refresh_token = os.environ.get("YOUTUBE_REFRESH_TOKEN")
+
+            _creds = Credentials(
+                None,
+                refresh_token=refresh_token,
+                token_uri=YOUTUBE_TOKEN_URI,
+                client_id=client_id,
+                client_secret=client_secret
+            )
+        if not _creds.valid:
+            import google_auth_httplib2
+            import httplib2
+
+            _creds.refresh(google_auth_httplib2.Request(httplib2.Http(timeout=60)))
+        return _creds
+
+
+def youtube_client():
+    """YouTube API client for the current thread, built once from the cached discovery document."""
+    creds = credentials()
+    client = getattr(_clients, "youtube", None)
+    if client is None:
+        # Google API 클라이언트는 업로드 시에만 로드 (import 시간 절약)
+        import google_auth_httplib2
+        from googleapiclient.discovery import build_from_document
+        from googleapiclient.http import build_http
+
+        # build_http: resumable 308 응답을 redirect로 따라가지 않는 transport
+        http = google_auth_httplib2.AuthorizedHttp(creds, http=build_http())
+        client = _clients.youtube = build_from_document(discovery_document(), http=http)
+    return client
+
+
+def _backoff(attempt):
+    return min(2 ** attempt, MAX_BACKOFF) * (0.5 + random.random() / 2)
+
+
+def _video_body(title, description):
+    return {
         "snippet": {
             "title": title,
             "description": description,
@@ -32,16 +214,286 @@ def upload_video(file_path, title, description):
         }
     }
 
-    media = MediaFileUpload(file_path, chunksize=-1, resumable=True)
 
+def _chunk_size(chunk_size):
+    return max(_CHUNK_UNIT, chunk_size // _CHUNK_UNIT * _CHUNK_UNIT)
+
+
+def _send_chunks(request, max_retries, before_chunk=None, on_session=None, on_progress=None):
+    """
+    Calls next_chunk() until the upload completes, retrying transient failures
+    with backoff (the library re-queries the server offset after an error).
+    Returns (response, retries).
+    """
+    from googleapiclient.errors import HttpError
+
+    retriable = _retriable_exceptions()
+    response = None
+    failures = 0
+    retries = 0
+    while response is None:
+        progress_before = request.resumable_progress
+        if before_chunk is not None:
+            before_chunk(progress_before)
+        try:
+            status, response = request.next_chunk()
+        except HttpError as e:
+            if e.resp.status not in RETRIABLE_STATUS:
+                raise
+            error = f"HTTP {e.resp.status}"
+        except retriable as e:
+            error = f"{type(e).__name__}: {e}"
+        else:
+            failures = 0
+            if on_session is not None and request.resumable_uri:
+                on_session(request.resumable_uri)
+            if status is not None and on_progress is not None:
+                on_progress(status.resumable_progress)
+            continue
+
+        # Persist the session even if its first chunk failed
+        if on_session is not None and request.resumable_uri:
+            on_session(request.resumable_uri)
+        failures = 0 if request.resumable_progress > progress_before else failures + 1
+        if failures > max_retries:
+            raise RuntimeError(f"Upload failed after {max_retries} retries ({error}); session kept for the next run")
+        retries += 1
+        delay = _backoff(failures)
+        print(f"   ⚠️ Upload chunk failed ({error}), retry in {delay:.1f}s")
+        time.sleep(delay)
+    return response, retries
+
+
+def upload_video(file_path, title, description, chunk_size=CHUNK_SIZE, max_retries=MAX_RETRIES):
+    from googleapiclient.http import MediaFileUpload
+
+    chunk_size = _chunk_size(chunk_size)
+    size = os.path.getsize(file_path)
+    youtube = youtube_client()
+
+    media = MediaFileUpload(file_path, mimetype="video/mp4", chunksize=chunk_size, resumable=True)
+
+    request = youtube.videos().insert(
+        part="snippet,status",
+        body=_video_body(title, description),
+        media_body=media
+    )
+
+    with tracing.span("youtube.upload", file=file_path, bytes=size, chunk=chunk_size) as span:
+        response = None
+        resumed_from = 0
+        session = load_session(file_path)
+        if session:
+            offset, response = query_offset(request.http, session["uri"], size)
+            if offset is None:
+                print("⚠️ Saved upload session expired, starting over.")
+                clear_session(file_path)
+                session = None
+            else:
+                request.resumable_uri = session["uri"]
+                request.resumable_progress = resumed_from = offset
+                print(f"🔁 Resuming upload at {offset / 1e6:.1f}/{size / 1e6:.1f} MB")
+
+        started = time.perf_counter()
+
+        def on_session(uri, saved=[bool(session)]):
+            if not saved[0]:
+                saved[0] = True
+                save_session(file_path, uri, title)
+
+        def on_progress(progress):
+            elapsed = time.perf_counter() - started
+            sent = progress - resumed_from
+            print(f"   ⬆️ {progress / size:5.1%}  {progress / 1e6:6.1f}/{size / 1e6:.1f} MB"
+                  f"  {sent / 1e6 / elapsed if elapsed else 0:.1f} MB/s")
+
+        retries = 0
+        if response is None:
+            response, retries = _send_chunks(request, max_retries, on_session=on_session, on_progress=on_progress)
+
+        elapsed = time.perf_counter() - started
+        sent = size - resumed_from
+        if span is not None:
+            span.args.update(resumed_from=resumed_from, retries=retries, seconds=round(elapsed, 2))
+    clear_session(file_path)
+    print(f"✅ Uploaded! Video ID: {response['id']} ({sent / 1e6:.1f} MB in {elapsed:.1f}s, "
+          f"{sent / 1e6 / elapsed if elapsed else 0:.1f} MB/s, {retries} retries)")
+    return response # 업로드 영수증 (checkpoint에 기록되어 --resume 시 중복 업로드 방지)
+
+
+# ---------- pipelined (encode-while-uploading) ----------
+class EncodeStream:
+    """
+    Hand-off between an encoder writing an append-only mp4 (fragmented, moov
+    up front) and upload_stream(). The encoder calls open(path) before it
+    starts writing, then close() when the file is final or abort() if
+    encoding failed; the uploader reads completed bytes as they appear.
+    """
+
+    POLL_INTERVAL = 0.2
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self.path = None
+        self.final_size = None # Known once the encoder has closed the file
+        self.aborted = False
+
+    def open(self, path):
+        with self._cond:
+            self.path = path
+            self._cond.notify_all()
+
+    def close(self):
+        with self._cond:
+            self.final_size = os.path.getsize(self.path)
+            self._cond.notify_all()
+
+    def abort(self):
+        with self._cond:
+            if self.final_size is None:
+                self.aborted = True
+                self._cond.notify_all()
+
+    @property
+    def finished(self):
+        return self.final_size is not None
+
+    def wait_open(self):
+        """Output path once encoding starts, None if it was aborted before."""
+        with self._cond:
+            self._cond.wait_for(lambda: self.path is not None or self.aborted)
+            return None if self.aborted else self.path
+
+    def wait_for(self, size):
+        """Blocks until the file holds at least `size` bytes or is final. False if encoding was aborted."""
+        with self._cond:
+            while not (self.finished or self.aborted):
+                try:
+                    if os.path.getsize(self.path) >= size:
+                        return True
+                except OSError: # Not created yet
+                    pass
+                self._cond.wait(self.POLL_INTERVAL)
+            return not self.aborted
+
+
+class _PrefixChanged(Exception):
+    """The encoder rewrote bytes that were already uploaded."""
+
+
+def _growing_media(stream, chunk_size):
+    """MediaUpload over a file that is still being written (total size unknown until it is closed)."""
+    import hashlib
+
+    from googleapiclient.http import MediaUpload
+
+    class GrowingFileUpload(MediaUpload):
+        def __init__(self):
+            self.sent = {} # begin -> (length, sha256) of every range handed to the uploader
+
+        def chunksize(self):
+            return chunk_size
+
+        def mimetype(self):
+            return "video/mp4"
+
+        def size(self):
+            return stream.final_size # None -> Content-Range "bytes a-b/*"
+
+        def resumable(self):
+            return True
+
+        def has_stream(self):
+            return False
+
+        def getbytes(self, begin, length):
+            with open(stream.path, "rb") as f:
+                f.seek(begin)
+                data = f.read(length)
+            self.sent[begin] = (len(data), hashlib.sha256(data).digest())
+            return data
+
+        def verify_prefix(self, end):
+            """Checks that the ranges uploaded below `end` still match the (final) file."""
+            with open(stream.path, "rb") as f:
+                for begin, (length, digest) in sorted(self.sent.items()):
+                    if begin >= end:
+                        break
+                    f.seek(begin)
+                    if hashlib.sha256(f.read(length)).digest() != digest:
+                        return begin
+            return None
+
+    return GrowingFileUpload()
+
+
+def upload_stream(stream, title, description, chunk_size=CHUNK_SIZE, max_retries=MAX_RETRIES):
+    """
+    Uploads the file behind an EncodeStream while it is being encoded: full
+    chunks are sent as soon as the encoder has written them, the last one
+    (with the total size) once the file is closed. Before finalizing, every
+    range already sent is re-hashed against the final file; if the encoder
+    rewrote any of it, the open session is abandoned (never finalized) and
+    the final file is uploaded normally. Returns None if encoding was aborted.
+    """
+    path = stream.wait_open()
+    if path is None:
+        return None
+    chunk_size = _chunk_size(chunk_size)
+    youtube = youtube_client()
+    media = _growing_media(stream, chunk_size)
     request = youtube.videos().insert(
         part="snippet,status",
-        body=body,
+        body=_video_body(title, description),
         media_body=media
     )
+    print(f"📡 Streaming upload of {path} while it is encoded...")
+
+    with tracing.span("youtube.upload_stream", file=path, chunk=chunk_size) as span:
+        started = time.perf_counter()
+        overlapped = [0] # Bytes sent before the encoder finished
 
-    response = request.execute()
-    print(f"✅ Uploaded! Video ID: {response['id']}")
+        def before_chunk(progress):
+            # One byte past the chunk: a full chunk is then never the last one, so the
+            # final size is always known when the last chunk goes out
+            if not stream.wait_for(progress + chunk_size + 1):
+                raise RuntimeError("Encoding aborted during streaming upload")
+            if stream.finished and stream.final_size - progress <= chunk_size:
+                changed_at = media.verify_prefix(progress)
+                if changed_at is not None:
+                    raise _PrefixChanged(changed_at)
+
+        def on_progress(progress):
+            if not stream.finished:
+                overlapped[0] = progress
+            elapsed = time.perf_counter() - started
+            total = f"/{stream.final_size / 1e6:.1f}" if stream.finished else " (encoding)"
+            print(f"   ⬆️ {progress / 1e6:6.1f}{total} MB  {progress / 1e6 / elapsed if elapsed else 0:.1f} MB/s")
+
+        try:
+            response, retries = _send_chunks(request, max_retries, before_chunk=before_chunk, on_progress=on_progress)
+        except _PrefixChanged as e:
+            print(f"⚠️ Encoder rewrote already-uploaded bytes (offset {e}); uploading the final file instead.")
+            return upload_video(path, title, description, chunk_size, max_retries)
+
+        elapsed = time.perf_counter() - started
+        size = stream.final_size
+        if span is not None:
+            span.args.update(bytes=size, overlapped=overlapped[0], retries=retries, seconds=round(elapsed, 2))
+    print(f"✅ Uploaded! Video ID: {response['id']} ({size / 1e6:.1f} MB, {overlapped[0] / 1e6:.1f} MB sent during encode, "
+          f"{elapsed:.1f}s since encode start, {retries} retries)")
+    return response
 
 if __name__ == "__main__":
-    upload_video("final_generated_shorts.mp4", "Daily Semiconductor Update #Shorts", "Generated by AI")
\ No newline at end of file
+    import argparse
+
+    from local_env import load_local_env
+
+    parser = argparse.ArgumentParser(description="Upload a video to YouTube (resumable, chunked).")
+    parser.add_argument("file", nargs="?", default="final_generated_shorts.mp4")
+    parser.add_argument("--title", default="Daily Semiconductor Update #Shorts")
+    parser.add_argument("--description", default="Generated by AI")
+    parser.add_argument("--chunk-mb", type=float, default=CHUNK_SIZE / 1024 / 1024)
+    args = parser.parse_args()
+    load_local_env()
+    upload_video(args.file, args.title, args.description, chunk_size=int(args.chunk_mb * 1024 * 1024))